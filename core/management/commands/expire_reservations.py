@@ -1,4 +1,5 @@
 from django.core.management.base import BaseCommand
+from reservations.services.expiry import ExpiryScheduler
 from reservations.services.reservations import expire_pending_reservations
 
 # Custom Django Management Commands
@@ -8,6 +9,36 @@ from reservations.services.reservations import expire_pending_reservations
 class Command(BaseCommand):
     help = "Expire pending reservations"
 
-    def handle(self, *args, **kwargs):
-        count = expire_pending_reservations()
-        self.stdout.write(f"Expired {count} reservations")
\ No newline at end of file
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--daemon",
+            action="store_true",
+            help="Keep running and expire each hold when it is due",
+        )
+        parser.add_argument("--batch-size", type=int, default=100)
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            default=5,
+            help="Max seconds between checks for new pending reservations",
+        )
+
+    def handle(self, *args, **options):
+        if not options["daemon"]:
+            count = expire_pending_reservations()
+            self.stdout.write(f"Expired {count} reservations")
+            return
+
+        scheduler = ExpiryScheduler(
+            batch_size=options["batch_size"],
+            poll_interval=options["poll_interval"],
+        )
+        self.stdout.write("Expiry scheduler running (Ctrl+C to stop)")
+        try:
+            scheduler.run(
+                on_expired=lambda count: self.stdout.write(
+                    f"Expired {count} reservations"
+                )
+            )
+        except KeyboardInterrupt:
+            self.stdout.write("Expiry scheduler stopped")
@@ -0,0 +1,30 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from reservations.services.export import EXPORT_FORMATS, iter_export
+
+
+class Command(BaseCommand):
+    help = "Stream reservations of a date range as CSV or NDJSON"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--start", help="First date to export (YYYY-MM-DD)")
+        parser.add_argument("--end", help="Last date to export (YYYY-MM-DD)")
+        parser.add_argument("--format", choices=EXPORT_FORMATS, default="csv")
+        parser.add_argument("--output", help="File to write (default: stdout)")
+
+    def handle(self, *args, **options):
+        try:
+            start_date = date.fromisoformat(options["start"]) if options["start"] else None
+            end_date = date.fromisoformat(options["end"]) if options["end"] else None
+        except ValueError:
+            raise CommandError("Invalid date format (YYYY-MM-DD)")
+
+        lines = iter_export(options["format"], start_date, end_date)
+
+        if options["output"]:
+            with open(options["output"], "w", newline="", encoding="utf-8") as output:
+                output.writelines(lines)
+        else:
+            for line in lines:
+                self.stdout.write(line, ending="")
@@ -0,0 +1,22 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from reservations.services.availability import rebuild_availability_index
+
+
+class Command(BaseCommand):
+    help = "Rebuild the per-room slot availability index from reservations"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--start", help="First date to rebuild (YYYY-MM-DD)")
+        parser.add_argument("--end", help="Last date to rebuild (YYYY-MM-DD)")
+
+    def handle(self, *args, **options):
+        try:
+            start_date = date.fromisoformat(options["start"]) if options["start"] else None
+            end_date = date.fromisoformat(options["end"]) if options["end"] else None
+        except ValueError:
+            raise CommandError("Invalid date format (YYYY-MM-DD)")
+
+        count = rebuild_availability_index(start_date, end_date)
+        self.stdout.write(f"Rebuilt {count} availability rows")
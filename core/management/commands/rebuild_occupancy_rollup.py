@@ -0,0 +1,35 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from reservations.services.rollups import (
+    rebuild_daily_occupancy,
+    rebuild_occupancy_prefix,
+)
+
+
+class Command(BaseCommand):
+    help = "Rebuild the per-room daily occupancy rollup from reservations"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--start", help="First date to rebuild (YYYY-MM-DD)")
+        parser.add_argument("--end", help="Last date to rebuild (YYYY-MM-DD)")
+        parser.add_argument(
+            "--prefix-only",
+            action="store_true",
+            help="Only recompute the per-room prefix sums of the existing rows",
+        )
+
+    def handle(self, *args, **options):
+        if options["prefix_only"]:
+            count = rebuild_occupancy_prefix()
+            self.stdout.write(f"Updated {count} prefix sums")
+            return
+
+        try:
+            start_date = date.fromisoformat(options["start"]) if options["start"] else None
+            end_date = date.fromisoformat(options["end"]) if options["end"] else None
+        except ValueError:
+            raise CommandError("Invalid date format (YYYY-MM-DD)")
+
+        count = rebuild_daily_occupancy(start_date, end_date)
+        self.stdout.write(f"Rebuilt {count} daily occupancy rows")
@@ -2,6 +2,7 @@ import random
 from datetime import datetime, timedelta, time
 
 from django.core.management.base import BaseCommand
+from django.db import IntegrityError, transaction
 from rooms.models import Room
 from reservations.models import Reservation
 
@@ -26,6 +27,7 @@ class Command(BaseCommand):
         start_date = datetime(2026, 3, 1)
         end_date = datetime(2026, 3, 31)
 
+        created = 0
         for _ in range(15):
             room = random.choice(rooms)
 
@@ -39,12 +41,19 @@ class Command(BaseCommand):
             start_time = time(start_hour, 0)
             end_time = time(start_hour + duration, 0)
 
-            Reservation.objects.create(
-                room=room,
-                date=random_day.date(),
-                start_time=start_time,
-                end_time=end_time,
-                status=Reservation.Status.CONFIRMED,
-            )
-
-        self.stdout.write(self.style.SUCCESS("Reservations created"))
+            try:
+                # Savepoint, so a taken slot only drops this row
+                with transaction.atomic():
+                    Reservation.objects.create(
+                        room=room,
+                        date=random_day.date(),
+                        start_time=start_time,
+                        end_time=end_time,
+                        status=Reservation.Status.CONFIRMED,
+                    )
+            except IntegrityError:
+                # Overlaps a reservation already seeded in that room
+                continue
+            created += 1
+
+        self.stdout.write(self.style.SUCCESS(f"{created} reservations created"))
@@ -51,6 +51,7 @@ MIDDLEWARE = [
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    "reservations.middleware.RankingMemoMiddleware",
 ]
 
 ROOT_URLCONF = "coworking_reservations.urls"
@@ -126,3 +127,22 @@ LOGOUT_REDIRECT_URL = 'login'
 # Global variables
 COWORKING_OPENING_HOUR = 8
 COWORKING_CLOSING_HOUR = 18
+
+# Idempotency-Key replays (seconds). Use a shared cache backend in
+# production so every worker sees the same keys.
+IDEMPOTENCY_CACHE_TTL = 60 * 60 * 24
+IDEMPOTENCY_LOCK_TIMEOUT = 30
+IDEMPOTENCY_WAIT_SECONDS = 5
+
+# Async dashboard: worker threads shared by all requests and the time
+# each metric group gets before it is reported as missing (seconds)
+DASHBOARD_MAX_WORKERS = 4
+DASHBOARD_METRIC_TIMEOUT = 5
+
+# Per-day analytics partials of closed days (seconds). Writes drop the
+# days they touch, so this only bounds how long unused days are kept.
+ANALYTICS_DAY_CACHE_TTL = 60 * 60 * 24 * 7
+
+# "rollup" reads occupancy from the daily rollup and its prefix sums.
+# "cube" builds a rooms x days x slots NumPy array instead (pip install numpy).
+OCCUPANCY_BACKEND = "rollup"
@@ -1,27 +1,48 @@
 from django.urls import path
 
 from .views import (
+    availability_cache_stats_view,
+    availability_grid_view,
     availability_view,
+    bulk_create_reservations_view,
     confirm_reservation_view,
+    confirm_series_view,
+    create_series_view,
     create_reservation_api_view,
     delete_reservation_view,
+    export_reservations_view,
+    free_rooms_view,
     globalMonthlyOccupancy,
+    AsyncDashboardView,
     DashboardView,
+    dailyOccupancySeriesView,
     GlobalDailyOccupancyView,
     list_reservations_view,
     monthlyOccupancyRate,
+    my_reservation_detail_view,
     peakDay,
+    roomHeatmapView,
     roomsMonthlyRankingView,
 )
 
 urlpatterns = [
     path("availability/", availability_view),
+    path("availability/rooms/", free_rooms_view),
+    path("availability/grid/", availability_grid_view),
+    path("availability/cache-stats/", availability_cache_stats_view),
     path("reservations/", create_reservation_api_view),
+    path("reservations/bulk/", bulk_create_reservations_view),
     path("my-reservations/", list_reservations_view),
-    path("my-reservations/<int:reservation_id>/", list_reservations_view),
+    path("my-reservations/<int:reservation_id>/", my_reservation_detail_view),
     path("reservations/<int:reservation_id>/", delete_reservation_view),
     path("reservations/<int:reservation_id>/confirm/", confirm_reservation_view),
+    path("export/reservations/", export_reservations_view),
+    path("series/", create_series_view),
+    path("series/<int:series_id>/confirm/", confirm_series_view),
     path("dashboard/", DashboardView.as_view(), name="dashboard"),
+    path(
+        "dashboard/async/", AsyncDashboardView.as_view(), name="dashboard-async"
+    ),
     path(
         "dashboard2/global-daily-occupancy/",
         GlobalDailyOccupancyView.as_view(),
@@ -43,4 +64,14 @@ urlpatterns = [
         name="global-monthly-occupancy",
     ),
     path("dashboard2/peak-day/", peakDay.as_view(), name="peak-day"),
+    path(
+        "dashboard2/daily-occupancy-series/",
+        dailyOccupancySeriesView.as_view(),
+        name="daily-occupancy-series",
+    ),
+    path(
+        "dashboard2/room-heatmap/",
+        roomHeatmapView.as_view(),
+        name="room-heatmap",
+    ),
 ]
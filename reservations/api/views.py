@@ -1,33 +1,63 @@
-from django.http import JsonResponse
+from django.http import JsonResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
 from django.views import View
 from django.views.decorators.http import require_GET
 from django.shortcuts import get_object_or_404
 from datetime import date as date_type, datetime
-from reservations.services.dashboard import dashboard_metrics
+from reservations.services.dashboard import (
+    dashboard_metrics,
+    dashboard_metrics_concurrent,
+)
 from reservations.services.occupancy import (
+    daily_occupancy_series,
     global_daily_occupancy,
     global_monthly_occupancy,
     monthly_occupancy_rate,
+    most_used_time_slot,
     peak_day,
+    room_heatmap,
 )
 from reservations.services.ranking import rooms_monthly_ranking
+from reservations.services.series import confirm_series, create_reservation_series
+from reservations.services.availability_cache import (
+    availability_cache_stats,
+    availability_etag,
+)
+from reservations.services.export import EXPORT_FORMATS, iter_export
+from reservations.services.freshness import user_reservations_state
+from reservations.slots import SLOT_MINUTES
+from reservations.services.idempotency import (
+    IdempotencyInProgressError,
+    run_idempotent,
+)
 from rooms.models import Room
 from reservations.services.reservations import (
     confirm_reservation,
-    get_available_slots,
+    find_free_rooms,
+    get_availability_grid,
+    cached_available_slots_and_etag,
     create_reservation_service,
+    create_reservations_bulk,
+    BulkItemStatus,
     ReservationOverlapError,
     ReservationConfirmationError,
-    get_user_reservations,
+    get_user_reservation,
+    get_user_reservations_page,
+    RESERVATION_LIST_FIELDS,
 )
+import hashlib
 import json
+import uuid
 from datetime import date as date_type, time as time_type
 from django.views.decorators.http import require_POST
 from django.views.decorators.csrf import csrf_exempt
-from reservations.models import Reservation
+from reservations.models import Reservation, ReservationSeries
 from django.views.decorators.http import require_http_methods
 from django.core.exceptions import PermissionDenied
 from django.http import JsonResponse
+from django.db import transaction
 from rest_framework.views import APIView
 
 
@@ -43,6 +73,10 @@ def availability_view(request):
         date = date_type.fromisoformat(date_str)
     except ValueError:
         return error_response("Invalid date format (YYYY-MM-DD)", 400)
+    try:
+        room_id = int(room_id)
+    except ValueError:
+        return error_response("Invalid room_id", 400)
 
     # Ensure to show only valid dates
     current_date = datetime.now().date()
@@ -50,14 +84,27 @@ def availability_view(request):
     if date < current_date:
         return error_response("Selected date is in the past", 400)
 
+    # Today's answer also changes as slots start, once per slot
+    def quoted(tag):
+        if tag is not None and date == current_date:
+            tag += f"-{(now_time.hour * 60 + now_time.minute) // SLOT_MINUTES}"
+        return tag and f'"{tag}"'
+
+    # Answer polls from the cache alone while nothing changed
+    not_modified = conditional_response(
+        request, etag=quoted(availability_etag(room_id, date, timezone.now()))
+    )
+    if not_modified:
+        return not_modified
+
     room = get_object_or_404(Room, id=room_id)
-    slots = get_available_slots(room=room, date=date)
+    slots, etag = cached_available_slots_and_etag(room=room, date=date)
 
     # Show only future slots
     if date == current_date:
         slots = [(start, end) for start, end in slots if start > now_time]
 
-    return JsonResponse(
+    response = JsonResponse(
         {
             "room_id": room.id,
             "name": room.name,
@@ -71,6 +118,131 @@ def availability_view(request):
             ],
         }
     )
+    if etag is not None:
+        response["ETag"] = quoted(etag)
+    return response
+
+
+@require_GET
+def availability_cache_stats_view(request):
+    if not request.user.is_authenticated:
+        return error_response("Authentication required", 401)
+    if not request.user.is_staff:
+        return error_response("Staff only", 403)
+    return JsonResponse(availability_cache_stats())
+
+
+AVAILABILITY_GRID_MAX_DAYS = 62
+
+
+@require_GET
+def availability_grid_view(request):
+    if not request.user.is_authenticated:
+        return error_response("Authentication required", 401)
+    start_str = request.GET.get("start")
+    end_str = request.GET.get("end")
+    if not start_str or not end_str:
+        return error_response("start and end are required", 400)
+    try:
+        start_date = date_type.fromisoformat(start_str)
+        end_date = date_type.fromisoformat(end_str)
+    except ValueError:
+        return error_response("Invalid date format (YYYY-MM-DD)", 400)
+    if start_date > end_date:
+        return error_response("start must be before end", 400)
+    if (end_date - start_date).days + 1 > AVAILABILITY_GRID_MAX_DAYS:
+        return error_response(
+            f"Range is limited to {AVAILABILITY_GRID_MAX_DAYS} days", 400
+        )
+
+    current_date = datetime.now().date()
+    now_time = datetime.now().time()
+    if start_date < current_date:
+        return error_response("Selected date is in the past", 400)
+
+    rooms = Room.objects.filter(is_active=True)
+    room_ids = request.GET.get("room_ids")
+    if room_ids:
+        try:
+            rooms = rooms.filter(id__in=[int(r) for r in room_ids.split(",")])
+        except ValueError:
+            return error_response("Invalid room_ids", 400)
+    rooms = list(rooms)
+
+    grid = get_availability_grid(rooms=rooms, start_date=start_date, end_date=end_date)
+
+    return JsonResponse(
+        {
+            "start": start_date.isoformat(),
+            "end": end_date.isoformat(),
+            "rooms": [
+                {
+                    "id": room.id,
+                    "name": room.name,
+                    "days": {
+                        day.isoformat(): [
+                            [start.strftime("%H:%M"), end.strftime("%H:%M")]
+                            for start, end in slots
+                            # Show only future slots
+                            if day != current_date or start > now_time
+                        ]
+                        for day, slots in grid[room.id].items()
+                    },
+                }
+                for room in rooms
+            ],
+        }
+    )
+
+
+@require_GET
+def free_rooms_view(request):
+    if not request.user.is_authenticated:
+        return error_response("Authentication required", 401)
+    date_str = request.GET.get("date")
+    start_str = request.GET.get("start_time")
+    end_str = request.GET.get("end_time")
+    if not date_str or not start_str or not end_str:
+        return error_response("date, start_time and end_time are required", 400)
+    try:
+        date = date_type.fromisoformat(date_str)
+        start_time = time_type.fromisoformat(start_str)
+        end_time = time_type.fromisoformat(end_str)
+    except ValueError:
+        return error_response("Invalid date or time format", 400)
+    if start_time >= end_time:
+        return error_response("start_time must be before end_time", 400)
+    if date < datetime.now().date():
+        return error_response("Selected date is in the past", 400)
+    min_capacity = request.GET.get("min_capacity")
+    if min_capacity is not None:
+        try:
+            min_capacity = int(min_capacity)
+        except ValueError:
+            return error_response("Invalid min_capacity", 400)
+
+    rooms = find_free_rooms(
+        date=date,
+        start_time=start_time,
+        end_time=end_time,
+        min_capacity=min_capacity,
+    )
+
+    return JsonResponse(
+        {
+            "date": date.isoformat(),
+            "start_time": start_time.strftime("%H:%M"),
+            "end_time": end_time.strftime("%H:%M"),
+            "rooms": [
+                {
+                    "id": room.id,
+                    "name": room.name,
+                    "max_capacity": room.max_capacity,
+                }
+                for room in rooms
+            ],
+        }
+    )
 
 
 @csrf_exempt
@@ -78,26 +250,46 @@ def availability_view(request):
 def create_reservation_api_view(request):
 
     if not request.user.is_authenticated:
-        error_response("Authentication required", 401)
+        return error_response("Authentication required", 401)
+    idempotency_key = request.headers.get("Idempotency-Key")
+    if not idempotency_key:
+        return error_response("Idempotency-Key header required", 400)
+    try:
+        idempotency_key = str(uuid.UUID(idempotency_key))
+    except ValueError:
+        return error_response("Invalid Idempotency-Key header", 400)
+    # Replays are answered from the cache, before any transaction or query
+    try:
+        payload, status, replayed = run_idempotent(
+            scope=request.user.pk,
+            key=idempotency_key,
+            compute=lambda: _create_reservation(request, idempotency_key),
+        )
+    except IdempotencyInProgressError as e:
+        return error_response(str(e), 409)
+    response = JsonResponse(payload, status=status)
+    if replayed:
+        response["Idempotent-Replayed"] = "true"
+    return response
+
+
+def _create_reservation(request, idempotency_key):
     try:
         data = json.loads(request.body)
     except json.JSONDecodeError:
-        return error_response("Invalid JSON", 400)
+        return {"error": "Invalid JSON"}, 400
     required_fields = {"room_id", "date", "start_time", "end_time"}
     if not required_fields.issubset(data):
-        return error_response("Missing required fields", 400)
+        return {"error": "Missing required fields"}, 400
     try:
         date = date_type.fromisoformat(data["date"])
         start_time = time_type.fromisoformat(data["start_time"])
         end_time = time_type.fromisoformat(data["end_time"])
     except ValueError:
-        return error_response("Invalid date or time format", 400)
+        return {"error": "Invalid date or time format"}, 400
     if start_time >= end_time:
-        return error_response("start_time must be before end_time", 400)
+        return {"error": "start_time must be before end_time"}, 400
     room = get_object_or_404(Room, id=data["room_id"])
-    idempotency_key = request.headers.get("Idempotency-Key")
-    if not idempotency_key:
-        return error_response("Idempotency-Key header required", 400)
     try:
         reservation = create_reservation_service(
             idempotency_key=idempotency_key,
@@ -108,10 +300,10 @@ def create_reservation_api_view(request):
             user=request.user,
         )
     except ReservationOverlapError as e:
-        return error_response(str(e), 409)
+        return {"error": str(e)}, 409
     except ValueError as e:
-        return error_response(str(e), 400)
-    return JsonResponse(
+        return {"error": str(e)}, 400
+    return (
         {
             "id": reservation.id,
             "room_id": room.id,
@@ -120,37 +312,285 @@ def create_reservation_api_view(request):
             "end_time": reservation.end_time.strftime("%H:%M"),
             "status": reservation.status,
         },
+        201,
+    )
+
+
+BULK_RESERVATIONS_MAX_ITEMS = 100
+
+
+@csrf_exempt
+@require_POST
+def bulk_create_reservations_view(request):
+    if not request.user.is_authenticated:
+        return error_response("Authentication required", 401)
+    try:
+        data = json.loads(request.body)
+    except json.JSONDecodeError:
+        return error_response("Invalid JSON", 400)
+    if not isinstance(data, dict) or not isinstance(data.get("reservations"), list):
+        return error_response("reservations list is required", 400)
+    items = data["reservations"]
+    if not items:
+        return error_response("reservations list is empty", 400)
+    if len(items) > BULK_RESERVATIONS_MAX_ITEMS:
+        return error_response(
+            f"A batch is limited to {BULK_RESERVATIONS_MAX_ITEMS} reservations", 400
+        )
+    mode = data.get("mode", "all_or_nothing")
+    if mode not in ("all_or_nothing", "best_effort"):
+        return error_response("mode must be all_or_nothing or best_effort", 400)
+
+    try:
+        results = create_reservations_bulk(
+            items=items,
+            user=request.user,
+            all_or_nothing=mode == "all_or_nothing",
+        )
+    except ReservationOverlapError as e:
+        return error_response(str(e), 409)
+
+    statuses = {result["status"] for result in results}
+    if BulkItemStatus.ABORTED in statuses:
+        status_code = 409 if BulkItemStatus.CONFLICT in statuses else 400
+    elif BulkItemStatus.CREATED in statuses:
+        status_code = 201
+    else:
+        status_code = 200
+
+    return JsonResponse(
+        {
+            "mode": mode,
+            "results": [
+                {
+                    "index": result["index"],
+                    "status": result["status"],
+                    "error": result["error"],
+                    "reservation": (
+                        reservation_summary(result["reservation"])
+                        if result["reservation"]
+                        else None
+                    ),
+                }
+                for result in results
+            ],
+        },
+        status=status_code,
+    )
+
+
+@csrf_exempt
+@require_POST
+def create_series_view(request):
+    if not request.user.is_authenticated:
+        return error_response("Authentication required", 401)
+    try:
+        data = json.loads(request.body)
+    except json.JSONDecodeError:
+        return error_response("Invalid JSON", 400)
+    required_fields = {"room_id", "frequency", "start_date", "start_time", "end_time"}
+    if not isinstance(data, dict) or not required_fields.issubset(data):
+        return error_response("Missing required fields", 400)
+    if data["frequency"] not in ReservationSeries.Frequency.values:
+        return error_response("Invalid frequency", 400)
+    try:
+        start_date = date_type.fromisoformat(data["start_date"])
+        start_time = time_type.fromisoformat(data["start_time"])
+        end_time = time_type.fromisoformat(data["end_time"])
+        until = date_type.fromisoformat(data["until"]) if data.get("until") else None
+        count = int(data["count"]) if data.get("count") is not None else None
+    except (TypeError, ValueError):
+        return error_response("Invalid date, time or count format", 400)
+    if start_time >= end_time:
+        return error_response("start_time must be before end_time", 400)
+    room = get_object_or_404(Room, id=data["room_id"])
+    try:
+        series, created, conflicts = create_reservation_series(
+            user=request.user,
+            room=room,
+            frequency=data["frequency"],
+            start_date=start_date,
+            start_time=start_time,
+            end_time=end_time,
+            until=until,
+            count=count,
+        )
+    except ReservationOverlapError as e:
+        return error_response(str(e), 409)
+    except ValueError as e:
+        return error_response(str(e), 400)
+    return JsonResponse(
+        {
+            "id": series.id,
+            "room_id": room.id,
+            "frequency": series.frequency,
+            "reservations": [reservation_summary(r) for r in created],
+            "conflicts": [conflict.isoformat() for conflict in conflicts],
+        },
         status=201,
     )
 
 
+@csrf_exempt
+@require_POST
+def confirm_series_view(request, series_id):
+    if not request.user.is_authenticated:
+        return error_response("Authentication required", 401)
+    series = get_object_or_404(ReservationSeries, id=series_id)
+    try:
+        count = confirm_series(series=series, user=request.user)
+    except PermissionDenied as e:
+        return error_response(str(e), 403)
+    return JsonResponse({"id": series.id, "confirmed": count}, status=200)
+
+
+@require_GET
+def export_reservations_view(request):
+    if not request.user.is_authenticated:
+        return error_response("Authentication required", 401)
+    if not request.user.is_staff:
+        return error_response("Staff only", 403)
+    export_format = request.GET.get("format", "csv")
+    if export_format not in EXPORT_FORMATS:
+        return error_response("format must be csv or ndjson", 400)
+    try:
+        start_date = request.GET.get("start") and date_type.fromisoformat(request.GET["start"])
+        end_date = request.GET.get("end") and date_type.fromisoformat(request.GET["end"])
+    except ValueError:
+        return error_response("Invalid date format (YYYY-MM-DD)", 400)
+
+    # Rows are read and written one chunk at a time while the client downloads
+    response = StreamingHttpResponse(
+        iter_export(export_format, start_date, end_date),
+        content_type=(
+            "text/csv" if export_format == "csv" else "application/x-ndjson"
+        ),
+    )
+    response["Content-Disposition"] = (
+        f'attachment; filename="reservations.{export_format}"'
+    )
+    return response
+
+
+MY_RESERVATIONS_PAGE_SIZE = 50
+MY_RESERVATIONS_MAX_PAGE_SIZE = 200
+
+
+def serialize_reservation_fields(row):
+    data = dict(row)
+    if "date" in data:
+        data["date"] = data["date"].isoformat()
+    for field in ("start_time", "end_time"):
+        if field in data:
+            data[field] = data[field].strftime("%H:%M")
+    return data
+
+
 @require_GET
 def list_reservations_view(request):
 
     if not request.user.is_authenticated:
         return error_response("Authentication required", 401)
-    # Only get reservations from authenticated user, only rooms related to user, and order by date
-    # filter ==> select reservations where user = authenticated user
-    # select_related ==> get reservations that has ForeignKey relationship
-    # order_by ==> like sql
-    reservations = (
-        Reservation.objects.filter(user=request.user)
-        .select_related("room")
-        .order_by("date", "start_time")
+    upcoming = request.GET.get("upcoming") in ("1", "true")
+    today = timezone.localdate()
+    # The page depends on the query string, and "upcoming" also on the day
+    count, changed_at = user_reservations_state(request.user.pk)
+    version = int(changed_at.timestamp() * 1_000_000) if changed_at else 0
+    last_modified = int(changed_at.timestamp()) if changed_at else 0
+    if upcoming:
+        version = f"{version}-{today.isoformat()}"
+        last_modified = max(
+            last_modified, int(datetime.combine(today, time_type.min).timestamp())
+        )
+    # Last-Modified has one-second resolution: a change later in the current
+    # second would not move it, so leave it out until that second is over
+    if last_modified >= int(timezone.now().timestamp()):
+        last_modified = None
+    query = hashlib.md5(request.META.get("QUERY_STRING", "").encode()).hexdigest()
+    etag = f'"{request.user.pk}-{count}-{version}-{query[:12]}"'
+    not_modified = conditional_response(
+        request, etag=etag, last_modified=last_modified
     )
-    data = [
+    if not_modified:
+        return not_modified
+
+    try:
+        limit = int(request.GET.get("limit", MY_RESERVATIONS_PAGE_SIZE))
+    except ValueError:
+        return error_response("limit must be an integer", 400)
+    if not 1 <= limit <= MY_RESERVATIONS_MAX_PAGE_SIZE:
+        return error_response(
+            f"limit must be between 1 and {MY_RESERVATIONS_MAX_PAGE_SIZE}", 400
+        )
+
+    fields = None
+    if request.GET.get("fields"):
+        fields = request.GET["fields"].split(",")
+        unknown = [field for field in fields if field not in RESERVATION_LIST_FIELDS]
+        if unknown:
+            return error_response(f"Unknown fields: {', '.join(unknown)}", 400)
+
+    statuses = None
+    if request.GET.get("status"):
+        statuses = request.GET["status"].upper().split(",")
+        if not set(statuses).issubset(Reservation.Status.values):
+            return error_response("Invalid status", 400)
+
+    try:
+        date_from = request.GET.get("from") and date_type.fromisoformat(request.GET["from"])
+        date_to = request.GET.get("to") and date_type.fromisoformat(request.GET["to"])
+    except ValueError:
+        return error_response("Invalid date format (YYYY-MM-DD)", 400)
+    if upcoming:
+        date_from = max(date_from, today) if date_from else today
+
+    try:
+        rows, next_cursor = get_user_reservations_page(
+            request.user,
+            limit=limit,
+            cursor=request.GET.get("cursor"),
+            fields=fields,
+            statuses=statuses,
+            date_from=date_from,
+            date_to=date_to,
+        )
+    except ValueError as e:
+        return error_response(str(e), 400)
+
+    response = JsonResponse(
+        {
+            "reservations": [serialize_reservation_fields(row) for row in rows],
+            "next_cursor": next_cursor,
+        },
+        status=200,
+    )
+    response["ETag"] = etag
+    if last_modified is not None:
+        response["Last-Modified"] = http_date(last_modified)
+    return response
+
+
+@require_GET
+def my_reservation_detail_view(request, reservation_id):
+    if not request.user.is_authenticated:
+        return error_response("Authentication required", 401)
+    try:
+        reservation = get_user_reservation(request.user, reservation_id)
+    except Reservation.DoesNotExist:
+        return error_response("Reservation not found", 404)
+    return JsonResponse(
         {
-            "id": r.id,
-            "room": r.room.name,
-            "room_id": r.room.id,
-            "date": r.date.isoformat(),
-            "start_time": r.start_time.strftime("%H:%M"),
-            "end_time": r.end_time.strftime("%H:%M"),
-            "status": r.status,
+            "id": reservation.id,
+            "room": reservation.room.name,
+            "room_id": reservation.room_id,
+            "date": reservation.date.isoformat(),
+            "start_time": reservation.start_time.strftime("%H:%M"),
+            "end_time": reservation.end_time.strftime("%H:%M"),
+            "status": reservation.status,
+            "expires_at": reservation.expires_at,
+            "confirmed_at": reservation.confirmed_at,
         }
-        for r in reservations
-    ]
-    return JsonResponse({"reservations": data}, status=200)
+    )
 
 
 @require_http_methods(["DELETE"])
@@ -167,8 +607,9 @@ def delete_reservation_view(request, reservation_id):
     # hard delete
     # reservation.delete()
     # soft delete
-    reservation.status = Reservation.Status.CANCELLED
-    reservation.save()
+    with transaction.atomic():
+        reservation.status = Reservation.Status.CANCELLED
+        reservation.save()
     return JsonResponse({"message": "Reservation deleted"}, status=200)
 
 
@@ -196,10 +637,35 @@ def confirm_reservation_view(request, reservation_id):
     )
 
 
+def conditional_response(request, *, etag=None, last_modified=None):
+    """
+    304 response when the request's If-None-Match / If-Modified-Since
+    validators still match, None otherwise.
+    """
+
+    response = get_conditional_response(
+        request, etag=etag, last_modified=last_modified
+    )
+    if response is not None and etag:
+        response["ETag"] = etag
+    return response
+
+
 def error_response(message, status_code):
     return JsonResponse({"error": message}, status=status_code)
 
 
+def reservation_summary(reservation):
+    return {
+        "id": reservation.id,
+        "room_id": reservation.room_id,
+        "date": reservation.date.isoformat(),
+        "start_time": reservation.start_time.strftime("%H:%M"),
+        "end_time": reservation.end_time.strftime("%H:%M"),
+        "status": reservation.status,
+    }
+
+
 class DashboardView(View):
     def get(self, request):
         start_str = request.GET.get("start")
@@ -219,6 +685,30 @@ class DashboardView(View):
         return JsonResponse(data, safe=False)
 
 
+class AsyncDashboardView(View):
+    """
+    DashboardView with the metric groups evaluated concurrently.
+    Slow or failing groups come back as null, flagged in "errors".
+    """
+
+    async def get(self, request):
+        start_str = request.GET.get("start")
+        end_str = request.GET.get("end")
+        if not start_str or not end_str:
+            return JsonResponse(
+                {"error": "start and end parameters are required"}, status=400
+            )
+        try:
+            start_date = datetime.strptime(start_str, "%Y-%m-%d").date()
+            end_date = datetime.strptime(end_str, "%Y-%m-%d").date()
+        except ValueError:
+            return JsonResponse(
+                {"error": "Invalid date format. Use YYYY-MM-DD"}, status=400
+            )
+        data = await dashboard_metrics_concurrent(start_date, end_date)
+        return JsonResponse(data, safe=False)
+
+
 class GlobalDailyOccupancyView(APIView):
     def get(self, request):
         date_str = request.GET.get("date")
@@ -301,3 +791,67 @@ class peakDay(APIView):
                 "occupancy": result["occupancy_rate"],
             }
         )
+
+
+class roomHeatmapView(APIView):
+    def get(self, req):
+        start_str = req.GET.get("start")
+        end_str = req.GET.get("end")
+        if not start_str or not end_str:
+            return JsonResponse({"error": "Missing start or end dates"}, status=400)
+        try:
+            start_date = datetime.strptime(start_str, "%Y-%m-%d").date()
+            end_date = datetime.strptime(end_str, "%Y-%m-%d").date()
+        except ValueError:
+            return JsonResponse(
+                {"error": "Invalid date format. Use YYYY-MM-DD"}, status=400
+            )
+        by_room = req.GET.get("by_room") in ("1", "true")
+        occupied = req.GET.get("occupied") in ("1", "true")
+        return JsonResponse(
+            {
+                "heatmap": room_heatmap(
+                    start_date, end_date, by_room=by_room, occupied=occupied
+                ),
+                "most_used_time_slot": most_used_time_slot(
+                    start_date, end_date, occupied=occupied
+                ),
+            }
+        )
+
+
+DAILY_OCCUPANCY_SERIES_MAX_DAYS = 366
+
+
+class dailyOccupancySeriesView(APIView):
+    def get(self, req):
+        start_str = req.GET.get("start")
+        end_str = req.GET.get("end")
+        if not start_str or not end_str:
+            return JsonResponse({"error": "Missing start or end dates"}, status=400)
+        try:
+            start_date = datetime.strptime(start_str, "%Y-%m-%d").date()
+            end_date = datetime.strptime(end_str, "%Y-%m-%d").date()
+        except ValueError:
+            return JsonResponse(
+                {"error": "Invalid date format. Use YYYY-MM-DD"}, status=400
+            )
+        if end_date < start_date:
+            return JsonResponse({"error": "end must not be before start"}, status=400)
+        if (end_date - start_date).days >= DAILY_OCCUPANCY_SERIES_MAX_DAYS:
+            return JsonResponse(
+                {"error": f"Range is limited to {DAILY_OCCUPANCY_SERIES_MAX_DAYS} days"},
+                status=400,
+            )
+        series = daily_occupancy_series(start_date, end_date)
+        return JsonResponse(
+            {
+                "series": [
+                    {
+                        "date": day["date"].isoformat(),
+                        "occupancy": day["occupancy_rate"],
+                    }
+                    for day in series
+                ]
+            }
+        )
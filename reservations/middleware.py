@@ -0,0 +1,34 @@
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+
+from reservations.services.ranking import ranking_memo
+
+
+class RankingMemoMiddleware:
+    """
+    Shares room rankings between the metrics computed in one read-only
+    request. Writes are left out so they never see a pre-write ranking.
+    Async-capable, so ASGI requests (the async dashboard) stay on the
+    event loop instead of being switched to a thread for it.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if request.method not in ("GET", "HEAD"):
+            return self.get_response(request)
+        with ranking_memo():
+            return self.get_response(request)
+
+    async def __acall__(self, request):
+        if request.method not in ("GET", "HEAD"):
+            return await self.get_response(request)
+        with ranking_memo():
+            return await self.get_response(request)
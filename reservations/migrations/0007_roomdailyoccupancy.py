@@ -0,0 +1,64 @@
+# Generated by Django 6.0.2 on 2026-03-12 20:14
+
+import django.db.models.deletion
+from datetime import date, datetime
+from django.db import migrations, models
+
+
+def backfill_daily_occupancy(apps, schema_editor):
+    Reservation = apps.get_model("reservations", "Reservation")
+    RoomDailyOccupancy = apps.get_model("reservations", "RoomDailyOccupancy")
+
+    rows = {}
+    reservations = Reservation.objects.filter(
+        status__in=["CONFIRMED", "PENDING"]
+    ).values_list("room_id", "date", "status", "start_time", "end_time")
+
+    for room_id, day, status, start, end in reservations.iterator():
+        rollup = rows.setdefault(
+            (room_id, day), RoomDailyOccupancy(room_id=room_id, date=day)
+        )
+        seconds = int(
+            (
+                datetime.combine(date.today(), end)
+                - datetime.combine(date.today(), start)
+            ).total_seconds()
+        )
+        if status == "CONFIRMED":
+            rollup.confirmed_seconds += seconds
+            rollup.confirmed_count += 1
+        else:
+            rollup.pending_seconds += seconds
+            rollup.pending_count += 1
+
+    RoomDailyOccupancy.objects.bulk_create(rows.values(), batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reservations', '0006_reservation_confirmed_at'),
+        ('rooms', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RoomDailyOccupancy',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('confirmed_seconds', models.PositiveIntegerField(default=0)),
+                ('pending_seconds', models.PositiveIntegerField(default=0)),
+                ('confirmed_count', models.PositiveIntegerField(default=0)),
+                ('pending_count', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('room', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_occupancy', to='rooms.room')),
+            ],
+            options={
+                'ordering': ['date', 'room'],
+                'indexes': [models.Index(fields=['date'], name='reservation_date_de49dd_idx')],
+                'constraints': [models.UniqueConstraint(fields=('room', 'date'), name='unique_room_daily_occupancy')],
+            },
+        ),
+        migrations.RunPython(backfill_daily_occupancy, migrations.RunPython.noop),
+    ]
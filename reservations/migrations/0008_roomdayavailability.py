@@ -0,0 +1,59 @@
+# Generated by Django 6.0.2 on 2026-03-14 18:32
+
+import django.db.models.deletion
+from django.db import migrations, models
+from reservations.slots import slot_span, span_mask
+
+
+def backfill_availability(apps, schema_editor):
+    Reservation = apps.get_model("reservations", "Reservation")
+    RoomDayAvailability = apps.get_model("reservations", "RoomDayAvailability")
+
+    rows = {}
+    reservations = Reservation.objects.filter(
+        status__in=["CONFIRMED", "PENDING"]
+    ).values_list("room_id", "date", "status", "start_time", "end_time", "expires_at")
+
+    for room_id, day, status, start, end, expires_at in reservations.iterator():
+        index = rows.setdefault(
+            (room_id, day), RoomDayAvailability(room_id=room_id, date=day)
+        )
+        span = slot_span(start, end)
+        if span is None or (status == "PENDING" and expires_at is None):
+            index.exact = False
+        elif status == "CONFIRMED":
+            index.confirmed_mask |= span_mask(*span)
+        else:
+            index.pending_mask |= span_mask(*span)
+            if index.next_expiry is None or expires_at < index.next_expiry:
+                index.next_expiry = expires_at
+
+    RoomDayAvailability.objects.bulk_create(rows.values(), batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reservations', '0007_roomdailyoccupancy'),
+        ('rooms', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RoomDayAvailability',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('confirmed_mask', models.BigIntegerField(default=0)),
+                ('pending_mask', models.BigIntegerField(default=0)),
+                ('next_expiry', models.DateTimeField(blank=True, null=True)),
+                ('exact', models.BooleanField(default=True)),
+                ('room', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='availability', to='rooms.room')),
+            ],
+            options={
+                'ordering': ['date', 'room'],
+                'constraints': [models.UniqueConstraint(fields=('room', 'date'), name='unique_room_day_availability')],
+            },
+        ),
+        migrations.RunPython(backfill_availability, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 6.0.2 on 2026-03-21 11:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+from reservations.slots import ledger_slots
+
+
+def backfill_ledger(apps, schema_editor):
+    Reservation = apps.get_model("reservations", "Reservation")
+    ReservationSlot = apps.get_model("reservations", "ReservationSlot")
+
+    reservations = (
+        Reservation.objects.filter(status__in=["CONFIRMED", "PENDING"])
+        .order_by("id")
+        .values_list("id", "room_id", "date", "start_time", "end_time")
+    )
+    slots = [
+        ReservationSlot(
+            reservation_id=reservation_id,
+            room_id=room_id,
+            date=day,
+            slot_index=slot_index,
+        )
+        for reservation_id, room_id, day, start, end in reservations.iterator()
+        for slot_index in ledger_slots(start, end)
+    ]
+    # Overlapping legacy rows keep only the first claim
+    ReservationSlot.objects.bulk_create(slots, batch_size=500, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reservations', '0009_reservationseries'),
+        ('rooms', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReservationSlot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('slot_index', models.PositiveSmallIntegerField()),
+                ('reservation', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='slots', to='reservations.reservation')),
+                ('room', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reserved_slots', to='rooms.room')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('room', 'date', 'slot_index'), name='unique_reserved_slot')],
+            },
+        ),
+        migrations.RunPython(backfill_ledger, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 6.0.2 on 2026-03-22 09:40
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reservations', '0011_reservation_status_expires_at_idx'),
+        ('rooms', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='reservation',
+            index=models.Index(fields=['room', 'date', 'status', 'expires_at'], name='reservation_room_id_dab398_idx'),
+        ),
+    ]
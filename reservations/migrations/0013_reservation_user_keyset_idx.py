@@ -0,0 +1,20 @@
+# Generated by Django 6.0.2 on 2026-03-23 17:15
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reservations', '0012_reservation_effectively_active_idx'),
+        ('rooms', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='reservation',
+            index=models.Index(fields=['user', 'date', 'start_time', 'id'], name='reservation_user_id_a2a4b2_idx'),
+        ),
+    ]
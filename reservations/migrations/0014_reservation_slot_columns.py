@@ -0,0 +1,66 @@
+# Generated by Django 6.0.2 on 2026-03-24 10:20
+
+from django.conf import settings
+from django.db import migrations, models
+from reservations.slots import slot_columns
+
+
+def backfill_slot_columns(apps, schema_editor):
+    Reservation = apps.get_model("reservations", "Reservation")
+
+    batch = []
+    for reservation in (
+        Reservation.objects.order_by("id")
+        .only("id", "start_time", "end_time")
+        .iterator(chunk_size=500)
+    ):
+        (
+            reservation.start_slot,
+            reservation.end_slot,
+            reservation.duration_minutes,
+        ) = slot_columns(reservation.start_time, reservation.end_time)
+        batch.append(reservation)
+        if len(batch) == 500:
+            Reservation.objects.bulk_update(
+                batch, ["start_slot", "end_slot", "duration_minutes"]
+            )
+            batch = []
+    Reservation.objects.bulk_update(
+        batch, ["start_slot", "end_slot", "duration_minutes"]
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reservations', '0013_reservation_user_keyset_idx'),
+        ('rooms', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='reservation',
+            name='duration_minutes',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='reservation',
+            name='end_slot',
+            field=models.PositiveSmallIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='reservation',
+            name='start_slot',
+            field=models.PositiveSmallIntegerField(default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='reservation',
+            index=models.Index(fields=['room', 'date', 'start_slot', 'end_slot'], name='reservation_room_id_cbb902_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='reservation',
+            index=models.Index(fields=['date', 'status', 'room', 'duration_minutes'], name='reservation_date_304d99_idx'),
+        ),
+        migrations.RunPython(backfill_slot_columns, migrations.RunPython.noop),
+    ]
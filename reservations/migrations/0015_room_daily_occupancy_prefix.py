@@ -0,0 +1,38 @@
+# Generated by Django 6.0.2 on 2026-03-25 11:05
+
+from django.db import migrations, models
+
+
+def backfill_prefix_sums(apps, schema_editor):
+    RoomDailyOccupancy = apps.get_model("reservations", "RoomDailyOccupancy")
+
+    running = {}
+    batch = []
+    for rollup in (
+        RoomDailyOccupancy.objects.order_by("room_id", "date")
+        .only("id", "room_id", "confirmed_seconds")
+        .iterator(chunk_size=500)
+    ):
+        running[rollup.room_id] = running.get(rollup.room_id, 0) + rollup.confirmed_seconds
+        rollup.confirmed_seconds_to_date = running[rollup.room_id]
+        batch.append(rollup)
+        if len(batch) == 500:
+            RoomDailyOccupancy.objects.bulk_update(batch, ["confirmed_seconds_to_date"])
+            batch = []
+    RoomDailyOccupancy.objects.bulk_update(batch, ["confirmed_seconds_to_date"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reservations', '0014_reservation_slot_columns'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='roomdailyoccupancy',
+            name='confirmed_seconds_to_date',
+            field=models.PositiveBigIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_prefix_sums, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 6.0.2 on 2026-03-27 10:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reservations', '0016_updated_at_validators'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='reservation',
+            index=models.Index(fields=['date', 'updated_at'], name='reservation_date_4195fc_idx'),
+        ),
+    ]
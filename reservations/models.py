@@ -1,6 +1,8 @@
 from django.db import models
+from django.db.models import Q
 from django.conf import settings
 import uuid
+from reservations.slots import slot_columns
 
 
 # Create your models here.
@@ -43,21 +45,50 @@ class Reservation(models.Model):
     
     created_at = models.DateTimeField(auto_now_add=True)
     confirmed_at = models.DateTimeField(null=True, blank=True)
+    # Queryset .update() calls set it themselves
+    updated_at = models.DateTimeField(auto_now=True)
 
+    series = models.ForeignKey(
+        "reservations.ReservationSeries",
+        on_delete=models.SET_NULL,
+        related_name="reservations",
+        null=True,
+        blank=True,
+    )
+
+    # Denormalized from start_time/end_time by set_slot_columns():
+    # slots counted from midnight (reservations.slots.ledger_slots)
+    start_slot = models.PositiveSmallIntegerField(default=0, editable=False)
+    end_slot = models.PositiveSmallIntegerField(default=0, editable=False)
+    duration_minutes = models.PositiveIntegerField(default=0, editable=False)
+
+    def set_slot_columns(self):
+        # Instances built with string times only get parsed values once reloaded
+        to_time = self._meta.get_field("start_time").to_python
+        self.start_slot, self.end_slot, self.duration_minutes = slot_columns(
+            to_time(self.start_time), to_time(self.end_time)
+        )
 
-    @staticmethod
-    def overlapping_exists(room, date, start_time, end_time):
-        return Reservation.objects.filter(
-            room=room,
-            date=date,
-            status__in=ACTIVE_STATUSES,
-            start_time__lt=end_time,
-            end_time__gt=start_time,
-        ).exists()
+    def save(self, *args, **kwargs):
+        self.set_slot_columns()
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None:
+            update_fields = {*update_fields, "updated_at"}
+            if {"start_time", "end_time"} & update_fields:
+                update_fields |= {"start_slot", "end_slot", "duration_minutes"}
+            kwargs["update_fields"] = update_fields
+        super().save(*args, **kwargs)
 
     class Meta:
         indexes = [
             models.Index(fields=["room", "date", "start_time", "end_time"]),
+            models.Index(fields=["status", "expires_at"]),
+            models.Index(fields=["room", "date", "status", "expires_at"]),
+            models.Index(fields=["user", "date", "start_time", "id"]),
+            models.Index(fields=["room", "date", "start_slot", "end_slot"]),
+            models.Index(fields=["date", "status", "room", "duration_minutes"]),
+            models.Index(fields=["user", "updated_at"]),
+            models.Index(fields=["date", "updated_at"]),
         ]
         ordering = ["date", "start_time"]
 
@@ -69,3 +100,177 @@ ACTIVE_STATUSES = [
     Reservation.Status.PENDING,
     Reservation.Status.CONFIRMED,
 ]
+
+
+def effectively_active_q(now):
+    """
+    Reservations holding their slot at `now`: confirmed ones and pending
+    holds that have not lapsed yet, whether or not the sweep has run.
+    """
+
+    return Q(status=Reservation.Status.CONFIRMED) | (
+        Q(status=Reservation.Status.PENDING)
+        & (Q(expires_at__isnull=True) | Q(expires_at__gt=now))
+    )
+
+
+def lapsed_hold_q(now):
+    """
+    Pending holds already over at `now` that the sweep has not expired yet.
+    """
+
+    return Q(status=Reservation.Status.PENDING, expires_at__lte=now)
+
+
+class ReservationSeries(models.Model):
+    class Frequency(models.TextChoices):
+        WEEKLY = "WEEKLY", "Weekly"
+        BIWEEKLY = "BIWEEKLY", "Biweekly"
+        MONTHLY = "MONTHLY", "Monthly"
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="reservation_series",
+        null=True,
+        blank=True,
+    )
+    room = models.ForeignKey(
+        "rooms.Room",
+        on_delete=models.PROTECT,
+        related_name="reservation_series",
+    )
+
+    frequency = models.CharField(max_length=20, choices=Frequency.choices)
+    start_date = models.DateField()
+    start_time = models.TimeField()
+    end_time = models.TimeField()
+
+    # A series ends either on a date or after a number of occurrences
+    until = models.DateField(null=True, blank=True)
+    count = models.PositiveIntegerField(null=True, blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["start_date", "start_time"]
+
+    def __str__(self):
+        return f"{self.room} | {self.get_frequency_display()} from {self.start_date} {self.start_time}-{self.end_time}"
+
+
+class ReservationSlot(models.Model):
+    """
+    Ledger of the slots held by active reservations. The unique constraint
+    makes the database itself reject two reservations on the same slot.
+    """
+
+    reservation = models.ForeignKey(
+        Reservation,
+        on_delete=models.CASCADE,
+        related_name="slots",
+    )
+    room = models.ForeignKey(
+        "rooms.Room",
+        on_delete=models.CASCADE,
+        related_name="reserved_slots",
+    )
+    date = models.DateField()
+    slot_index = models.PositiveSmallIntegerField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["room", "date", "slot_index"], name="unique_reserved_slot"
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.room} | {self.date} slot {self.slot_index}"
+
+
+class RoomDailyOccupancy(models.Model):
+    """
+    Rollup of the confirmed and pending reservations of a room on one day.
+    Kept up to date by reservations.services.rollups on every state change.
+    """
+
+    room = models.ForeignKey(
+        "rooms.Room",
+        on_delete=models.CASCADE,
+        related_name="daily_occupancy",
+    )
+    date = models.DateField()
+
+    confirmed_seconds = models.PositiveIntegerField(default=0)
+    pending_seconds = models.PositiveIntegerField(default=0)
+    confirmed_count = models.PositiveIntegerField(default=0)
+    pending_count = models.PositiveIntegerField(default=0)
+
+    # Prefix sum: confirmed seconds of the room on every day up to this one
+    confirmed_seconds_to_date = models.PositiveBigIntegerField(default=0)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["room", "date"], name="unique_room_daily_occupancy"
+            ),
+        ]
+        indexes = [
+            models.Index(fields=["date"]),
+        ]
+        ordering = ["date", "room"]
+
+    def __str__(self):
+        return f"{self.room} | {self.date} {self.confirmed_seconds}s"
+
+
+class RoomDayAvailability(models.Model):
+    """
+    Slot bitmaps of a room on one day, one bit per slot of reservations.slots.
+    Rows only exist for days with active reservations; `exact` is False when
+    some reservation does not fit the slot grid and the bitmaps cannot be trusted.
+    """
+
+    room = models.ForeignKey(
+        "rooms.Room",
+        on_delete=models.CASCADE,
+        related_name="availability",
+    )
+    date = models.DateField()
+
+    confirmed_mask = models.BigIntegerField(default=0)
+    pending_mask = models.BigIntegerField(default=0)
+    next_expiry = models.DateTimeField(null=True, blank=True)
+    exact = models.BooleanField(default=True)
+
+    # Rewritten on every refresh, so it versions the cached availability
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["room", "date"], name="unique_room_day_availability"
+            ),
+        ]
+        ordering = ["date", "room"]
+
+    def busy_mask(self):
+        return self.confirmed_mask | self.pending_mask
+
+    def busy_mask_at(self, now):
+        """
+        Busy mask once lapsed holds stop counting, or None when the bitmaps
+        cannot tell (inexact day, or some hold in pending_mask has lapsed).
+        """
+
+        if not self.exact:
+            return None
+        if self.next_expiry is not None and self.next_expiry <= now:
+            return None
+        return self.busy_mask()
+
+    def __str__(self):
+        return f"{self.room} | {self.date} {self.busy_mask():b}"
@@ -0,0 +1,185 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Max, Q
+from django.utils import timezone
+
+from reservations.models import Reservation
+
+
+def _day_key(day, version):
+    return f"analytics:day:{day}:{version}"
+
+
+def _day_versions(first_day, last_day):
+    """
+    Version of every day of a range from one query: the count and latest
+    updated_at of its reservations. Any write moves one of them, and it is
+    read from the database, so every process sees the change.
+    """
+
+    versions = {}
+    rows = (
+        Reservation.objects.filter(date__range=(first_day, last_day))
+        .order_by()
+        .values("date")
+        .annotate(count=Count("id"), changed_at=Max("updated_at"))
+    )
+    for row in rows:
+        changed_at = int(row["changed_at"].timestamp() * 1_000_000)
+        versions[row["date"]] = f"{row['count']}-{changed_at}"
+    return versions
+
+
+def _empty_day():
+    return {
+        "total": 0,
+        "confirmed": 0,
+        "pending": 0,
+        "cancelled": 0,
+        "expired": 0,
+        # Confirmed reservations only
+        "room_seconds": {},
+        "start_hours": {},
+        "confirmation_seconds": 0.0,
+        "confirmation_count": 0,
+        # Every reservation with a creation time
+        "lead_time_seconds": 0.0,
+        "lead_time_count": 0,
+    }
+
+
+def _add_reservation(partial, row, now):
+    room_id, reservation_date, start, minutes, status, expires_at, created_at, confirmed_at = row
+
+    partial["total"] += 1
+    if status == Reservation.Status.PENDING and expires_at and expires_at <= now:
+        # Lapsed hold the sweep has not expired yet
+        status = Reservation.Status.EXPIRED
+    partial[status.lower()] += 1
+
+    if created_at:
+        partial["lead_time_seconds"] += (
+            reservation_date - created_at.date()
+        ).total_seconds()
+        partial["lead_time_count"] += 1
+
+    if status != Reservation.Status.CONFIRMED:
+        return
+
+    room_seconds = partial["room_seconds"]
+    room_seconds[room_id] = room_seconds.get(room_id, 0) + minutes * 60
+    start_hours = partial["start_hours"]
+    start_hours[start.hour] = start_hours.get(start.hour, 0) + 1
+    if created_at and confirmed_at:
+        partial["confirmation_seconds"] += (confirmed_at - created_at).total_seconds()
+        partial["confirmation_count"] += 1
+
+
+def _compute_days(days_q, now):
+    """
+    Partials of every day matched by `days_q`, from one query.
+    Also returns the days holding a pending hold that has not lapsed yet.
+    """
+
+    rows = (
+        Reservation.objects.filter(days_q)
+        .order_by("date", "start_time")
+        .values_list(
+            "room_id",
+            "date",
+            "start_time",
+            "duration_minutes",
+            "status",
+            "expires_at",
+            "created_at",
+            "confirmed_at",
+        )
+    )
+
+    partials = {}
+    unsettled = set()
+    for row in rows:
+        partial = partials.setdefault(row[1], _empty_day())
+        _add_reservation(partial, row, now)
+        if row[4] == Reservation.Status.PENDING and row[5] and row[5] > now:
+            unsettled.add(row[1])
+
+    return partials, unsettled
+
+
+def day_partials(start_date, end_date):
+    """
+    Per-day aggregates of a date range, in date order: status counters,
+    confirmed seconds per room, confirmed start hours and the sums behind
+    the lifecycle averages.
+
+    Closed days (before today) are read from the cache, keyed by their
+    version, and computed once per version. Today, future days and past
+    days with a hold still running are always computed live. Missing and
+    live days come from a single query.
+    """
+
+    now = timezone.now()
+    today = timezone.localdate(now)
+    days = [
+        start_date + timedelta(days=offset)
+        for offset in range((end_date - start_date).days + 1)
+    ]
+    closed = [day for day in days if day < today]
+
+    # Read before computing, so a write committed meanwhile is stored
+    # under the old version and never served
+    versions = _day_versions(closed[0], closed[-1]) if closed else {}
+    keys = {day: _day_key(day, versions.get(day, 0)) for day in closed}
+    cached = cache.get_many(list(keys.values()))
+    missing = [day for day in closed if keys[day] not in cached]
+
+    days_q = Q(date__in=missing) if missing else Q(pk__in=[])
+    if end_date >= today:
+        days_q |= Q(date__range=(max(start_date, today), end_date))
+
+    computed = {}
+    if missing or end_date >= today:
+        computed, unsettled = _compute_days(days_q, now)
+        cache.set_many(
+            {
+                keys[day]: computed.get(day, _empty_day())
+                for day in missing
+                if day not in unsettled
+            },
+            settings.ANALYTICS_DAY_CACHE_TTL,
+        )
+
+    return [
+        (day, cached.get(keys.get(day)) or computed.get(day) or _empty_day())
+        for day in days
+    ]
+
+
+def combine_days(partials):
+    """
+    Adds up day partials into the aggregates of the whole range. Start
+    hours also keep the first day each hour was used, to break ties.
+    """
+
+    combined = _empty_day()
+    combined["heatmap_hours"] = []
+    combined["first_used"] = {}
+
+    for day, partial in partials:
+        for key, value in partial.items():
+            if isinstance(value, dict):
+                continue
+            combined[key] += value
+        for room_id, seconds in partial["room_seconds"].items():
+            combined["room_seconds"][room_id] = (
+                combined["room_seconds"].get(room_id, 0) + seconds
+            )
+        for hour, count in partial["start_hours"].items():
+            combined["start_hours"][hour] = combined["start_hours"].get(hour, 0) + count
+            combined["first_used"].setdefault(hour, day)
+            combined["heatmap_hours"].append((day.weekday(), hour, count))
+
+    return combined
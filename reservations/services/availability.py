@@ -0,0 +1,137 @@
+from django.db import IntegrityError, transaction
+
+from reservations.models import Reservation, RoomDayAvailability
+from reservations.slots import slot_span, span_mask
+
+
+def _build_index(room_id, day, reservations):
+    """
+    Folds (status, start_time, end_time, expires_at) rows of one room/day
+    into an unsaved RoomDayAvailability.
+    """
+
+    index = RoomDayAvailability(room_id=room_id, date=day)
+
+    for status, start, end, expires_at in reservations:
+        span = slot_span(start, end)
+        if span is None:
+            index.exact = False
+            continue
+
+        if status == Reservation.Status.CONFIRMED:
+            index.confirmed_mask |= span_mask(*span)
+            continue
+
+        # Pending holds without an expiry never lapse
+        index.pending_mask |= span_mask(*span)
+        if expires_at is not None and (
+            index.next_expiry is None or expires_at < index.next_expiry
+        ):
+            index.next_expiry = expires_at
+
+    return index
+
+
+def lock_room_day(room_id, day):
+    """
+    Locks the availability row of a room/day, inserting an empty one when
+    the day has none, so two transactions syncing the same day run one
+    after the other. refresh_availability then rewrites or deletes it.
+    """
+
+    while True:
+        locked = (
+            RoomDayAvailability.objects.select_for_update()
+            .filter(room_id=room_id, date=day)
+            .values_list("pk", flat=True)
+            .first()
+        )
+        if locked is not None:
+            return
+        try:
+            with transaction.atomic():
+                RoomDayAvailability.objects.create(room_id=room_id, date=day)
+            return
+        except IntegrityError:
+            # Inserted by another transaction meanwhile, lock that one
+            continue
+
+
+def refresh_availability(room_id, day):
+    """
+    Recomputes the slot bitmaps of one room and day from its reservations.
+    """
+
+    reservations = Reservation.objects.filter(
+        room_id=room_id,
+        date=day,
+        status__in=[Reservation.Status.CONFIRMED, Reservation.Status.PENDING],
+    ).values_list("status", "start_time", "end_time", "expires_at")
+
+    index = _build_index(room_id, day, reservations)
+
+    if index.busy_mask() == 0 and index.exact:
+        RoomDayAvailability.objects.filter(room_id=room_id, date=day).delete()
+        return None
+
+    RoomDayAvailability.objects.update_or_create(
+        room_id=room_id,
+        date=day,
+        defaults={
+            "confirmed_mask": index.confirmed_mask,
+            "pending_mask": index.pending_mask,
+            "next_expiry": index.next_expiry,
+            "exact": index.exact,
+        },
+    )
+    return index
+
+
+@transaction.atomic
+def rebuild_availability_index(start_date=None, end_date=None):
+    """
+    Rebuilds the availability index (or a date range of it) from scratch.
+    Returns the number of rows written.
+    """
+
+    indexes = RoomDayAvailability.objects.all()
+    reservations = Reservation.objects.filter(
+        status__in=[Reservation.Status.CONFIRMED, Reservation.Status.PENDING]
+    )
+
+    if start_date:
+        indexes = indexes.filter(date__gte=start_date)
+        reservations = reservations.filter(date__gte=start_date)
+    if end_date:
+        indexes = indexes.filter(date__lte=end_date)
+        reservations = reservations.filter(date__lte=end_date)
+
+    indexes.delete()
+
+    days = {}
+    for room_id, day, *row in reservations.values_list(
+        "room_id", "date", "status", "start_time", "end_time", "expires_at"
+    ).iterator():
+        days.setdefault((room_id, day), []).append(row)
+
+    RoomDayAvailability.objects.bulk_create(
+        [_build_index(room_id, day, rows) for (room_id, day), rows in days.items()],
+        batch_size=500,
+    )
+
+    return len(days)
+
+
+def availability_busy_mask(room, day, now):
+    """
+    Busy mask of a room/day as seen by the availability listing at `now`,
+    where lapsed pending holds no longer count. Returns None when the
+    index cannot answer and the reservations must be walked instead.
+    """
+
+    index = RoomDayAvailability.objects.filter(room=room, date=day).first()
+
+    if index is None:
+        return 0
+
+    return index.busy_mask_at(now)
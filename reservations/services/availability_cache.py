@@ -0,0 +1,87 @@
+from django.core.cache import cache
+
+from reservations.models import RoomDayAvailability
+
+HITS_KEY = "availability:stats:hits"
+MISSES_KEY = "availability:stats:misses"
+
+
+def room_day_version(room_id, day):
+    """
+    Current change version of a room/day, read from its availability row so
+    every process (web workers, cron, the expiry daemon) agrees on it.
+    The row is rewritten on every sync; a day without one has no active
+    reservations and gets version 0.
+    """
+
+    updated_at = (
+        RoomDayAvailability.objects.filter(room_id=room_id, date=day)
+        .values_list("updated_at", flat=True)
+        .first()
+    )
+    if updated_at is None:
+        return 0
+    return int(updated_at.timestamp() * 1_000_000)
+
+
+def count_hit():
+    _count(HITS_KEY)
+
+
+def count_miss():
+    _count(MISSES_KEY)
+
+
+def slots_entry_key(room_id, day, slot_minutes, minimum_minutes, version):
+    return f"availability:slots:{room_id}:{day}:{slot_minutes}:{minimum_minutes}:{version}"
+
+
+def is_fresh(entry, now):
+    return entry is not None and (
+        entry["valid_until"] is None or now < entry["valid_until"]
+    )
+
+
+def slots_etag(room_id, day, slot_minutes, minimum_minutes, version):
+    return f"{room_id}-{day}-{slot_minutes}-{minimum_minutes}-{version}"
+
+
+def availability_etag(room_id, day, now, *, slot_minutes=30, minimum_minutes=60):
+    """
+    ETag of the cached availability of a room/day, built from its version
+    row and a cache read, without touching the reservations. Returns None
+    when no fresh entry vouches for the current state.
+    """
+
+    version = room_day_version(room_id, day)
+    entry = cache.get(
+        slots_entry_key(room_id, day, slot_minutes, minimum_minutes, version)
+    )
+    if not is_fresh(entry, now):
+        return None
+    return slots_etag(room_id, day, slot_minutes, minimum_minutes, version)
+
+
+def _count(key):
+    cache.add(key, 0, None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        # Evicted, or a backend that keeps nothing: a statistic is not
+        # worth failing the request for
+        pass
+
+
+def availability_cache_stats():
+    hits = cache.get(HITS_KEY, 0)
+    misses = cache.get(MISSES_KEY, 0)
+    total = hits + misses
+    return {
+        "hits": hits,
+        "misses": misses,
+        "hit_rate": round(hits / total, 4) if total else 0,
+    }
+
+
+def reset_availability_cache_stats():
+    cache.delete_many([HITS_KEY, MISSES_KEY])
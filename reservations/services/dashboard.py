@@ -1,25 +1,65 @@
-from reservations.services.lifecycle import (
-    average_booking_duration,
-    average_booking_lead_time,
-    average_time_to_confirmation,
-    conversion_rate,
-    expiration_rate,
-    global_utilization,
-    total_reservations,
+import asyncio
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import connections
+
+from reservations.services.analytics_cache import combine_days, day_partials
+from reservations.services.lifecycle import global_utilization
+from reservations.services.occupancy import (
+    WEEKDAYS,
+    most_used_time_slot,
+    peak_day,
+    room_heatmap,
 )
-from reservations.services.occupancy import most_used_time_slot, peak_day, room_heatmap
 from reservations.services.ranking import (
+    best_performing_room,
+    rooms_with_seconds,
     top_3_rooms,
     total_hours_per_room,
     utilization_percentage_per_room,
-    best_performing_room,
 )
 
+logger = logging.getLogger(__name__)
+
 
 def dashboard_metrics(start_date, end_date):
+    """
+    Builds the whole dashboard from a fixed number of queries:
+    rooms, the reservation rows of the days not cached yet
+    and the daily occupancy of the month used by peak_day.
+    Every section is computed from the combined day partials; the ranking
+    ones go through the ranking functions with the partials' room seconds.
+    """
 
-    top_rooms = top_3_rooms(start_date, end_date)
-    best_room = best_performing_room(start_date, end_date)
+    totals = combine_days(day_partials(start_date, end_date))
+    usage = rooms_with_seconds(totals["room_seconds"])
+
+    return _dashboard_payload(
+        start_date,
+        end_date,
+        peak_day=peak_day(start_date.year, start_date.month, len(usage)),
+        lifecycle=_lifecycle_section(totals),
+        heatmap=_heatmap_sections(totals),
+        ranking=_ranking_sections(start_date, end_date, usage),
+    )
+
+
+def _dashboard_payload(start_date, end_date, *, peak_day, lifecycle, heatmap, ranking):
+    """
+    Lays out the metric groups in the dashboard response. A group that
+    could not be computed is passed as None and its metrics come out null.
+    """
+
+    heatmap = heatmap or {"most_used_time_slot": None, "room_heatmap": None}
+    ranking = ranking or {
+        "global_utilization_percentage": None,
+        "top_3_rooms": None,
+        "rooms": None,
+    }
 
     return {
         "period": {
@@ -29,36 +69,218 @@ def dashboard_metrics(start_date, end_date):
         },
         "metrics": {
             "occupancy": {
-                "global_utilization_percentage": global_utilization(
-                    start_date, end_date
-                ),
-                "peak_day": peak_day(start_date.year, start_date.month),
-                "most_used_time_slot": most_used_time_slot(start_date, end_date),
-                "room_heatmap": room_heatmap(start_date, end_date),
-                "top_3_rooms": [
-                    {"id": room.id, "name": room.name} for room in top_rooms
-                ],
-            },
-            "lifecycle": {
-                "total_reservations": total_reservations(start_date, end_date),
-                "conversion_rate": conversion_rate(start_date, end_date),
-                "expiration_rate": expiration_rate(start_date, end_date),
-                "avg_time_to_confirmation_seconds": average_time_to_confirmation(
-                    start_date, end_date
-                ),
-                "avg_booking_duration_seconds": average_booking_duration(
-                    start_date, end_date
-                ),
-                "avg_booking_lead_time_seconds": average_booking_lead_time(
-                    start_date, end_date
-                ),
-            },
-            "rooms": {
-                "total_hours_per_room": total_hours_per_room(start_date, end_date),
-                "utilization_per_room": utilization_percentage_per_room(
-                    start_date, end_date
-                ),
-                "best_performing_room": ({"id": best_room.id, "name": best_room.name} if best_room else None)
+                "global_utilization_percentage": ranking["global_utilization_percentage"],
+                "peak_day": peak_day,
+                "most_used_time_slot": heatmap["most_used_time_slot"],
+                "room_heatmap": heatmap["room_heatmap"],
+                "top_3_rooms": ranking["top_3_rooms"],
             },
+            "lifecycle": lifecycle,
+            "rooms": ranking["rooms"],
+        },
+    }
+
+
+def _lifecycle_section(totals):
+    total = totals["total"]
+    return {
+        "total_reservations": (
+            totals["confirmed"] + totals["pending"] + totals["cancelled"]
+        ),
+        "conversion_rate": totals["confirmed"] / total if total else 0,
+        "expiration_rate": totals["expired"] / total if total else 0,
+        "avg_time_to_confirmation_seconds": _average(
+            totals["confirmation_seconds"], totals["confirmation_count"]
+        ),
+        "avg_booking_duration_seconds": _average(
+            sum(totals["room_seconds"].values()), totals["confirmed"]
+        ),
+        "avg_booking_lead_time_seconds": _average(
+            totals["lead_time_seconds"], totals["lead_time_count"]
+        ),
+    }
+
+
+def _heatmap_sections(totals):
+    return {
+        "most_used_time_slot": _most_used_time_slot(totals),
+        "room_heatmap": _room_heatmap(totals),
+    }
+
+
+def _ranking_sections(start_date, end_date, usage):
+    best_room = best_performing_room(start_date, end_date, usage)
+
+    return {
+        "global_utilization_percentage": global_utilization(
+            start_date, end_date, usage
+        ),
+        "top_3_rooms": [
+            {"id": room.id, "name": room.name}
+            for room in top_3_rooms(start_date, end_date, usage)
+        ],
+        "rooms": {
+            "total_hours_per_room": total_hours_per_room(start_date, end_date, usage),
+            "utilization_per_room": utilization_percentage_per_room(
+                start_date, end_date, usage
+            ),
+            "best_performing_room": (
+                {"id": best_room.id, "name": best_room.name} if best_room else None
+            ),
         },
     }
+
+
+#####################
+# Concurrent groups #
+#####################
+
+# Each group runs its own queries so the groups can be evaluated at the
+# same time by dashboard_metrics_concurrent.
+
+
+def lifecycle_group(start_date, end_date):
+    return _lifecycle_section(combine_days(day_partials(start_date, end_date)))
+
+
+def ranking_group(start_date, end_date):
+    totals = combine_days(day_partials(start_date, end_date))
+    return _ranking_sections(
+        start_date, end_date, rooms_with_seconds(totals["room_seconds"])
+    )
+
+
+def heatmap_group(start_date, end_date):
+    # Grouped in SQL: only the counters come back, whatever the row count
+    return {
+        "most_used_time_slot": most_used_time_slot(start_date, end_date),
+        "room_heatmap": room_heatmap(start_date, end_date),
+    }
+
+
+def peak_day_group(start_date, end_date):
+    return peak_day(start_date.year, start_date.month)
+
+
+DASHBOARD_GROUPS = {
+    "lifecycle": lifecycle_group,
+    "ranking": ranking_group,
+    "heatmap": heatmap_group,
+    "peak_day": peak_day_group,
+}
+
+_executor = None
+
+
+def _dashboard_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.DASHBOARD_MAX_WORKERS,
+            thread_name_prefix="dashboard",
+        )
+    return _executor
+
+
+def _limit_query_time(seconds):
+    """
+    Makes the queries of this thread's connection give up after `seconds`.
+    wait_for only stops waiting for a group; without this a stuck query
+    would keep its pool thread, and a few of them would fill the pool.
+    """
+
+    connection = connections["default"]
+    connection.ensure_connection()
+    if connection.vendor == "postgresql":
+        with connection.cursor() as cursor:
+            cursor.execute("SET statement_timeout = %s", [int(seconds * 1000)])
+    elif connection.vendor == "mysql":
+        with connection.cursor() as cursor:
+            cursor.execute("SET SESSION max_execution_time = %s", [int(seconds * 1000)])
+    elif connection.vendor == "sqlite":
+        # Whole group deadline, checked every few thousand VM steps
+        deadline = time.monotonic() + seconds
+        connection.connection.set_progress_handler(
+            lambda: time.monotonic() > deadline, 10000
+        )
+
+
+def _run_group(group, start_date, end_date, timeout):
+    # Pool threads are not request threads, so nothing else closes
+    # the connection they open (and the limit goes with it)
+    try:
+        _limit_query_time(timeout)
+        return group(start_date, end_date)
+    finally:
+        connections.close_all()
+
+
+async def _evaluate_group(name, start_date, end_date, timeout):
+    call = sync_to_async(
+        _run_group, thread_sensitive=False, executor=_dashboard_executor()
+    )
+    try:
+        return name, await asyncio.wait_for(
+            call(DASHBOARD_GROUPS[name], start_date, end_date, timeout), timeout
+        ), None
+    except asyncio.TimeoutError:
+        return name, None, "timeout"
+    except Exception:
+        logger.exception("Dashboard metric group %s failed", name)
+        return name, None, "error"
+
+
+async def dashboard_metrics_concurrent(start_date, end_date, timeout=None):
+    """
+    Same payload as dashboard_metrics, with the metric groups evaluated at
+    the same time on a bounded thread pool. A group that fails or takes
+    longer than `timeout` seconds comes out null and is listed in "errors".
+    """
+
+    if timeout is None:
+        timeout = settings.DASHBOARD_METRIC_TIMEOUT
+
+    results = await asyncio.gather(
+        *[
+            _evaluate_group(name, start_date, end_date, timeout)
+            for name in DASHBOARD_GROUPS
+        ]
+    )
+
+    values = {name: value for name, value, _ in results}
+    errors = {name: error for name, _, error in results if error}
+
+    payload = _dashboard_payload(start_date, end_date, **values)
+    payload["partial"] = bool(errors)
+    payload["errors"] = errors
+    return payload
+
+
+def _average(total, count):
+    if count == 0:
+        return 0
+    return total / count
+
+
+def _most_used_time_slot(totals):
+    start_hours = totals["start_hours"]
+
+    if not start_hours:
+        return None
+
+    # Ties go to the hour used first, as when counting the rows in order
+    hour = min(
+        start_hours,
+        key=lambda hour: (-start_hours[hour], totals["first_used"][hour], hour),
+    )
+
+    return {"hour": hour, "reservations": start_hours[hour]}
+
+
+def _room_heatmap(totals):
+    heatmap = {day: {hour: 0 for hour in range(24)} for day in WEEKDAYS}
+
+    for weekday, hour, count in totals["heatmap_hours"]:
+        heatmap[WEEKDAYS[weekday]][hour] += count
+
+    return heatmap
@@ -0,0 +1,108 @@
+import heapq
+import time
+
+from django.db import transaction
+from django.utils import timezone
+
+from reservations.models import Reservation, lapsed_hold_q
+from reservations.services.sync import sync_room_days
+
+
+@transaction.atomic
+def expire_lapsed_holds(now=None, **filters):
+    """
+    Marks as EXPIRED the pending holds matching `filters` that are over at
+    `now` and frees what they held. Reads already ignore lapsed holds; this
+    settles them for the slot ledger and the derived tables.
+    """
+
+    now = now or timezone.now()
+    lapsed = Reservation.objects.filter(lapsed_hold_q(now), **filters)
+    # .update() skips the post_save signal, so sync the touched days here
+    rows = set(lapsed.values_list("room_id", "date"))
+    if not rows:
+        return 0
+    count = lapsed.update(status=Reservation.Status.EXPIRED, updated_at=timezone.now())
+    sync_room_days(rows)
+    return count
+
+
+def expire_due_reservations(ids, now):
+    """
+    Expires the given pending reservations whose hold is over at `now`.
+    Rows already confirmed, cancelled or extended are left untouched.
+    """
+
+    return expire_lapsed_holds(now, id__in=ids)
+
+
+class ExpiryScheduler:
+    """
+    Keeps a min-heap of (expires_at, id) for pending reservations and
+    expires them in small batches when they are due.
+
+    New pending rows are picked up incrementally by id; a full reload
+    every `resync_seconds` catches rows that went back to pending or
+    had their hold changed. Stale heap entries are harmless: the batch
+    update only touches rows that are still pending and due.
+    """
+
+    def __init__(self, *, batch_size=100, poll_interval=5, resync_seconds=300):
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.resync_seconds = resync_seconds
+        self.heap = []
+        self.last_id = 0
+        self.last_resync = None
+
+    def refresh(self, now):
+        if self.last_resync is None or (
+            (now - self.last_resync).total_seconds() >= self.resync_seconds
+        ):
+            self.heap = []
+            self.last_id = 0
+            self.last_resync = now
+
+        rows = Reservation.objects.filter(
+            status=Reservation.Status.PENDING,
+            expires_at__isnull=False,
+            id__gt=self.last_id,
+        ).values_list("expires_at", "id")
+        for expires_at, reservation_id in rows:
+            heapq.heappush(self.heap, (expires_at, reservation_id))
+            self.last_id = max(self.last_id, reservation_id)
+
+    def tick(self, now=None):
+        """
+        Refreshes the heap and expires every due reservation, one batch
+        (one transaction) at a time. Returns how many rows were expired.
+        """
+
+        now = now or timezone.now()
+        self.refresh(now)
+
+        expired = 0
+        while self.heap and self.heap[0][0] <= now:
+            batch = []
+            while (
+                self.heap
+                and self.heap[0][0] <= now
+                and len(batch) < self.batch_size
+            ):
+                batch.append(heapq.heappop(self.heap)[1])
+            expired += expire_due_reservations(batch, now)
+        return expired
+
+    def seconds_until_next(self, now=None):
+        now = now or timezone.now()
+        if not self.heap:
+            return self.poll_interval
+        wait = (self.heap[0][0] - now).total_seconds()
+        return max(0, min(wait, self.poll_interval))
+
+    def run(self, on_expired=None, should_stop=lambda: False):
+        while not should_stop():
+            count = self.tick()
+            if count and on_expired:
+                on_expired(count)
+            time.sleep(self.seconds_until_next())
@@ -0,0 +1,16 @@
+from django.db.models import Count, Max
+
+from reservations.models import Reservation
+
+
+def user_reservations_state(user_id):
+    """
+    (count, last change) of a user's reservations, read from the database
+    so every process agrees on it. Deleting a row changes the count, any
+    other write moves updated_at. Last change is None without reservations.
+    """
+
+    state = Reservation.objects.filter(user_id=user_id).aggregate(
+        count=Count("id"), changed_at=Max("updated_at")
+    )
+    return state["count"], state["changed_at"]
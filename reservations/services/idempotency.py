@@ -0,0 +1,57 @@
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+
+class IdempotencyInProgressError(Exception):
+    pass
+
+
+def _cache_key(scope, key):
+    return f"idempotency:{scope}:{key}"
+
+
+def run_idempotent(*, scope, key, compute):
+    """
+    Runs compute() once per (scope, key) and replays its result afterwards.
+
+    compute returns (payload, status_code). Successful (2xx) results are
+    kept in the cache for IDEMPOTENCY_CACHE_TTL seconds; failures are not
+    stored, so a retry runs again. While a call holds the key, concurrent
+    calls wait up to IDEMPOTENCY_WAIT_SECONDS for its result and then raise
+    IdempotencyInProgressError.
+
+    Output: (payload, status_code, replayed)
+    """
+
+    cache_key = _cache_key(scope, key)
+    lock_key = f"{cache_key}:lock"
+
+    cached = cache.get(cache_key)
+    if cached is not None:
+        return cached["payload"], cached["status"], True
+
+    if not cache.add(lock_key, 1, settings.IDEMPOTENCY_LOCK_TIMEOUT):
+        deadline = time.monotonic() + settings.IDEMPOTENCY_WAIT_SECONDS
+        while time.monotonic() < deadline:
+            time.sleep(0.05)
+            cached = cache.get(cache_key)
+            if cached is not None:
+                return cached["payload"], cached["status"], True
+        raise IdempotencyInProgressError(
+            "A request with this Idempotency-Key is already in progress"
+        )
+
+    try:
+        payload, status = compute()
+        if 200 <= status < 300:
+            cache.set(
+                cache_key,
+                {"payload": payload, "status": status},
+                settings.IDEMPOTENCY_CACHE_TTL,
+            )
+    finally:
+        cache.delete(lock_key)
+
+    return payload, status, False
@@ -0,0 +1,39 @@
+from reservations.models import ACTIVE_STATUSES, Reservation, ReservationSlot
+from reservations.slots import ledger_slots
+
+
+def _reservation_slots(reservation):
+    # Instances created with string times only get parsed values once reloaded
+    to_time = Reservation._meta.get_field("start_time").to_python
+    return ledger_slots(to_time(reservation.start_time), to_time(reservation.end_time))
+
+
+def claim_slots(reservations):
+    """
+    Writes the ledger rows of active reservations in one insert.
+    Raises IntegrityError when another reservation already holds a slot.
+    """
+
+    ReservationSlot.objects.bulk_create(
+        [
+            ReservationSlot(
+                reservation_id=reservation.id,
+                room_id=reservation.room_id,
+                date=reservation.date,
+                slot_index=slot_index,
+            )
+            for reservation in reservations
+            if reservation.status in ACTIVE_STATUSES
+            for slot_index in _reservation_slots(reservation)
+        ]
+    )
+
+
+def release_inactive_slots(room_id, day):
+    """
+    Frees the slots of reservations of a room/day that are no longer active.
+    """
+
+    ReservationSlot.objects.filter(room_id=room_id, date=day).exclude(
+        reservation__status__in=ACTIVE_STATUSES
+    ).delete()
@@ -1,26 +1,59 @@
-from reservations.models import Reservation
+from datetime import timezone as dt_timezone
+from reservations.models import Reservation, lapsed_hold_q
+from django.utils import timezone
 from django.db.models import F, ExpressionWrapper, DurationField, Avg
-from rooms.models import Room
+from django.db.models import Count, FloatField, Func, Max, Min, StdDev
+from django.db.models.functions import Round, TruncDate
+from reservations.services.ranking import room_usage
 from datetime import datetime, time
 from django.conf import settings
-from django.db.models import Sum
-from django.db.models.functions import Coalesce
-from django.db.models import Value
-from datetime import timedelta, date
+from django.db.models import Q
+
+
+def lifecycle_summary(start_date, end_date):
+    """
+    Every status counter of a date range and the rates derived from them,
+    from a single conditional aggregation. Lapsed pending holds count as
+    expired, not pending.
+
+    Output:
+    {
+        "total": all reservations,
+        "total_reservations": confirmed + pending + cancelled,
+        "confirmed", "pending", "cancelled", "expired": counts,
+        "conversion_rate": confirmed / total,
+        "expiration_rate": expired / total,
+    }
+    """
+
+    lapsed = lapsed_hold_q(timezone.now())
+
+    summary = Reservation.objects.filter(
+        date__range=(start_date, end_date)
+    ).aggregate(
+        total=Count("id"),
+        confirmed=Count("id", filter=Q(status=Reservation.Status.CONFIRMED)),
+        pending=Count("id", filter=Q(status=Reservation.Status.PENDING) & ~lapsed),
+        cancelled=Count("id", filter=Q(status=Reservation.Status.CANCELLED)),
+        expired=Count("id", filter=Q(status=Reservation.Status.EXPIRED) | lapsed),
+    )
+
+    summary["total_reservations"] = (
+        summary["confirmed"] + summary["pending"] + summary["cancelled"]
+    )
+    total = summary["total"]
+    summary["conversion_rate"] = summary["confirmed"] / total if total else 0
+    summary["expiration_rate"] = summary["expired"] / total if total else 0
+
+    return summary
 
 
 def total_reservations(start_date, end_date):
     """
     Returns the total number of reservations in a date range.
+    Lapsed pending holds count as expired, so they are left out.
     """
-    return Reservation.objects.filter(
-        date__range=(start_date, end_date),
-        status__in=[
-            Reservation.Status.CONFIRMED,
-            Reservation.Status.PENDING,
-            Reservation.Status.CANCELLED,
-        ],
-    ).count()
+    return lifecycle_summary(start_date, end_date)["total_reservations"]
 
 
 def confirmed_count(start_date, end_date):
@@ -28,32 +61,23 @@ def confirmed_count(start_date, end_date):
     Returns the number of confirmed reservations
     within the given date range.
     """
-    return Reservation.objects.filter(
-        date__range=(start_date, end_date),
-        status=Reservation.Status.CONFIRMED,
-    ).count()
+    return lifecycle_summary(start_date, end_date)["confirmed"]
 
 
 def expired_count(start_date, end_date):
     """
     Returns the number of expired reservations
-    within the given date range.
+    within the given date range, lapsed holds included.
     """
-    return Reservation.objects.filter(
-        date__range=(start_date, end_date),
-        status=Reservation.Status.EXPIRED,
-    ).count()
+    return lifecycle_summary(start_date, end_date)["expired"]
 
 
 def pending_count(start_date, end_date):
     """
     Returns the number of pending reservations
-    within the given date range.
+    within the given date range whose hold has not lapsed.
     """
-    return Reservation.objects.filter(
-        date__range=(start_date, end_date),
-        status=Reservation.Status.PENDING,
-    ).count()
+    return lifecycle_summary(start_date, end_date)["pending"]
 
 
 def conversion_rate(start_date, end_date):
@@ -61,16 +85,7 @@ def conversion_rate(start_date, end_date):
     Percentage of reservations that end up confirmed.
     """
 
-    total = Reservation.objects.filter(date__range=(start_date, end_date)).count()
-
-    if total == 0:
-        return 0
-
-    confirmed = Reservation.objects.filter(
-        date__range=(start_date, end_date), status=Reservation.Status.CONFIRMED
-    ).count()
-
-    return confirmed / total
+    return lifecycle_summary(start_date, end_date)["conversion_rate"]
 
 
 def expiration_rate(start_date, end_date):
@@ -78,48 +93,40 @@ def expiration_rate(start_date, end_date):
     Percentage of reservations that expire.
     """
 
-    total = Reservation.objects.filter(date__range=(start_date, end_date)).count()
+    return lifecycle_summary(start_date, end_date)["expiration_rate"]
 
-    if total == 0:
-        return 0
 
-    expired = Reservation.objects.filter(
-        date__range=(start_date, end_date), status=Reservation.Status.EXPIRED
-    ).count()
+def average_time_to_confirmation(start_date, end_date):
+    """
+    Avg time in seconds from created to confirmed reservations
+    """
 
-    return expired / total
+    return time_to_confirmation_stats(start_date, end_date)["avg"]
 
 
-def average_time_to_confirmation(start_date, end_date):
+def time_to_confirmation_stats(start_date, end_date):
     """
-    Avg time in seconds from created to confirmed reservations
+    Seconds from creation to confirmation of confirmed reservations
     """
 
-    confirmed_reservations = Reservation.objects.filter(
+    reservations = Reservation.objects.filter(
         date__range=(start_date, end_date),
         status=Reservation.Status.CONFIRMED,
         confirmed_at__isnull=False,
         created_at__isnull=False,
-    ).values_list("created_at", "confirmed_at")
-
-    total_seconds = 0
-    count = 0
-
-    for created, confirmed in confirmed_reservations:
-        delta = confirmed - created
-        total_seconds += delta.total_seconds()
-        count += 1
-
-    if count == 0:
-        return 0
-
-    return total_seconds / count
+    )
+    return duration_stats(
+        reservations,
+        DurationSeconds(_duration(F("confirmed_at") - F("created_at"))),
+        bucket_seconds=60,
+    )
 
 
-def global_utilization(start_date, end_date):
+def global_utilization(start_date, end_date, usage=None):
     """
     Returns global utilization percentage across all rooms
-    in a given date range.
+    in a given date range, from the prefix sums of the rollup
+    (or from `usage`, see ranking.rooms_with_seconds).
     """
 
     OPENING_HOUR = time(settings.COWORKING_OPENING_HOUR)
@@ -131,28 +138,14 @@ def global_utilization(start_date, end_date):
     ).total_seconds()
 
     number_of_days = (end_date - start_date).days + 1
-    total_rooms = Room.objects.count()
+    rooms = room_usage(start_date, end_date) if usage is None else usage
 
-    total_available_seconds = daily_available_seconds * number_of_days * total_rooms
+    total_available_seconds = daily_available_seconds * number_of_days * len(rooms)
 
     if total_available_seconds == 0:
         return 0
 
-    total_duration = Reservation.objects.filter(
-        date__range=(start_date, end_date), status=Reservation.Status.CONFIRMED
-    ).aggregate(
-        total=Coalesce(
-            Sum(
-                ExpressionWrapper(
-                    F("end_time") - F("start_time"),
-                    output_field=DurationField(),
-                )
-            ),
-            Value(timedelta(0), output_field=DurationField()),
-        )
-    )["total"]
-
-    occupied_seconds = total_duration.total_seconds() if total_duration else 0
+    occupied_seconds = sum(room.confirmed_seconds for room in rooms)
 
     return round((occupied_seconds / total_available_seconds) * 100, 2)
 
@@ -162,47 +155,119 @@ def average_booking_duration(start_date, end_date):
     Average duration of reservations in seconds
     """
 
+    return booking_duration_stats(start_date, end_date)["avg"]
+
+
+def booking_duration_stats(start_date, end_date):
+    """
+    Duration in seconds of confirmed reservations
+    """
+
     reservations = Reservation.objects.filter(
         date__range=(start_date, end_date),
         status=Reservation.Status.CONFIRMED,
-    ).values_list("start_time", "end_time")
+    )
+    return duration_stats(
+        reservations,
+        ExpressionWrapper(F("duration_minutes") * 60.0, output_field=FloatField()),
+        bucket_seconds=60,
+    )
 
-    total_seconds = 0
-    count = 0
 
-    for start, end in reservations:
-        if start and end:
-            start_dt = datetime.combine(date.today(), start)
-            end_dt = datetime.combine(date.today(), end)
-            total_seconds += (end_dt - start_dt).total_seconds()
-            count += 1
-
-    if count == 0:
-        return 0
+def average_booking_lead_time(start_date, end_date):
+    """
+    Average time between reservation creation and reservation date
+    """
 
-    return total_seconds / count
+    return booking_lead_time_stats(start_date, end_date)["avg"]
 
 
-def average_booking_lead_time(start_date, end_date):
+def booking_lead_time_stats(start_date, end_date):
     """
-    Average time between reservation creation and reservation date
+    Seconds between the creation day and the reservation day
     """
 
     reservations = Reservation.objects.filter(
         date__range=(start_date, end_date),
         created_at__isnull=False,
-    ).values_list("created_at", "date")
+    )
+    created_day = TruncDate("created_at", tzinfo=dt_timezone.utc)
+    return duration_stats(
+        reservations,
+        DurationSeconds(_duration(F("date") - created_day)),
+        bucket_seconds=86400,
+    )
 
-    total_seconds = 0
-    count = 0
 
-    for created, reservation_date in reservations:
-        if created and reservation_date:
-            delta = reservation_date - created.date()
-            total_seconds += delta.total_seconds()
-            count += 1
+##############
+# Statistics #
+##############
 
-    if count == 0:
-        return 0
 
-    return total_seconds / count
+class DurationSeconds(Func):
+    """
+    Seconds (float) of a DurationField expression. PostgreSQL durations are
+    intervals; SQLite and MySQL store them as microseconds.
+    """
+
+    output_field = FloatField()
+    template = "(%(expressions)s) / 1000000.0"
+
+    def as_postgresql(self, compiler, connection, **extra_context):
+        return self.as_sql(
+            compiler,
+            connection,
+            template="EXTRACT(EPOCH FROM %(expressions)s)",
+            **extra_context,
+        )
+
+
+def _duration(expression):
+    return ExpressionWrapper(expression, output_field=DurationField())
+
+
+PERCENTILES = {"p50": 0.5, "p90": 0.9, "p99": 0.99}
+
+
+def duration_stats(queryset, seconds, bucket_seconds):
+    """
+    count, avg, min, max, stddev and approximate p50/p90/p99 of a seconds
+    expression over a queryset, computed by the database: one aggregate
+    plus one histogram grouped in buckets of bucket_seconds, so memory does
+    not depend on the number of rows. Percentiles are exact to one bucket.
+
+    Empty sets give 0 everywhere, like the average_* functions always did.
+    """
+
+    queryset = queryset.order_by()
+    stats = queryset.aggregate(
+        count=Count("id"),
+        avg=Avg(seconds),
+        min=Min(seconds),
+        max=Max(seconds),
+        stddev=StdDev(seconds),
+    )
+
+    if stats["count"] == 0:
+        return {key: 0 for key in [*stats, *PERCENTILES]}
+
+    histogram = (
+        queryset.annotate(bucket=Round(seconds / bucket_seconds))
+        .values("bucket")
+        .annotate(count=Count("id"))
+        .order_by("bucket")
+        .values_list("bucket", "count")
+    )
+
+    targets = sorted(PERCENTILES.items(), key=lambda item: item[1])
+    seen = 0
+    for bucket, count in histogram:
+        seen += count
+        while targets and seen >= targets[0][1] * stats["count"]:
+            stats[targets.pop(0)[0]] = bucket * bucket_seconds
+
+    # Bucket rounding must not push a percentile outside the real range
+    for name in PERCENTILES:
+        stats[name] = min(max(stats[name], stats["min"]), stats["max"])
+
+    return stats
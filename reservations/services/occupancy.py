@@ -1,12 +1,12 @@
 import calendar
 from coworking_reservations import settings
-from reservations.models import Reservation
+from reservations.models import Reservation, RoomDailyOccupancy
+from reservations.services.occupancy_cube import OccupancyCube, cube_backend_enabled
 from datetime import datetime
 from datetime import date, timedelta, time
-from django.db.models import F, ExpressionWrapper, DurationField, Sum
+from django.db.models import Count, Min, Q, Sum
+from django.db.models.functions import Coalesce, ExtractHour, ExtractIsoWeekDay
 from rooms.models import Room
-from collections import Counter
-from collections import defaultdict
 
 
 ###################
@@ -14,6 +14,10 @@ from collections import defaultdict
 ###################
 
 
+def _cube_seconds(start_date, end_date, room_ids):
+    return sum(OccupancyCube.load(start_date, end_date, room_ids).room_seconds().values())
+
+
 def occupancy_rate(room, date):
     """
     Returns percentage of room that was occupied on a given date
@@ -26,19 +30,15 @@ def occupancy_rate(room, date):
         datetime.combine(date, CLOSING_HOUR) - datetime.combine(date, OPENING_HOUR)
     ).total_seconds()
 
-    reservations = Reservation.objects.filter(
-        room=room,
-        date=date,
-        status=Reservation.Status.CONFIRMED,
-    )
-
-    occupied_seconds = 0
-
-    for r in reservations:
-        delta = (
-            datetime.combine(date, r.end_time) - datetime.combine(date, r.start_time)
-        ).total_seconds()
-        occupied_seconds += delta
+    if cube_backend_enabled():
+        occupied_seconds = _cube_seconds(date, date, [getattr(room, "pk", room)])
+    else:
+        occupied_seconds = (
+            RoomDailyOccupancy.objects.filter(room=room, date=date)
+            .values_list("confirmed_seconds", flat=True)
+            .first()
+            or 0
+        )
 
     if total_available_seconds == 0:
         return 0
@@ -70,23 +70,13 @@ def monthly_occupancy_rate(room_id, year, month):
 
     total_available_seconds = working_days * daily_seconds
 
-    reservations = (
-        Reservation.objects.filter(
+    if cube_backend_enabled():
+        occupied_seconds = _cube_seconds(start_date, end_date, [room_id])
+    else:
+        occupied_seconds = RoomDailyOccupancy.objects.filter(
             room=room_id,
             date__range=(start_date, end_date),
-            status=Reservation.Status.CONFIRMED,
-        )
-        .annotate(
-            duration=ExpressionWrapper(
-                F("end_time") - F("start_time"),
-                output_field=DurationField(),
-            )
-        )
-        .aggregate(total=Sum("duration"))
-    )
-    occupied_seconds = (
-        reservations["total"].total_seconds() if reservations["total"] else 0
-    )
+        ).aggregate(total=Coalesce(Sum("confirmed_seconds"), 0))["total"]
     if total_available_seconds == 0:
         return 0
     return round(occupied_seconds / total_available_seconds, 3)
@@ -101,7 +91,8 @@ def global_monthly_occupancy(year, month):
     last_day = calendar.monthrange(year, month)[1]
     end_date = date(year, month, last_day)
 
-    total_rooms = Room.objects.count()
+    room_ids = list(Room.objects.values_list("id", flat=True))
+    total_rooms = len(room_ids)
 
     daily_seconds = (
         datetime.combine(start_date, time(CLOSING_HOUR))
@@ -111,23 +102,12 @@ def global_monthly_occupancy(year, month):
     total_days = (end_date - start_date).days + 1
     total_available_seconds = total_days * daily_seconds * total_rooms
 
-    reservations = (
-        Reservation.objects.filter(
+    if cube_backend_enabled():
+        occupied_seconds = _cube_seconds(start_date, end_date, room_ids)
+    else:
+        occupied_seconds = RoomDailyOccupancy.objects.filter(
             date__range=(start_date, end_date),
-            status=Reservation.Status.CONFIRMED,
-        )
-        .annotate(
-            duration=ExpressionWrapper(
-                F("end_time") - F("start_time"),
-                output_field=DurationField(),
-            )
-        )
-        .aggregate(total=Sum("duration"))
-    )
-
-    occupied_seconds = (
-        reservations["total"].total_seconds() if reservations["total"] else 0
-    )
+        ).aggregate(total=Coalesce(Sum("confirmed_seconds"), 0))["total"]
 
     if total_available_seconds == 0:
         return 0
@@ -135,43 +115,65 @@ def global_monthly_occupancy(year, month):
     return round(occupied_seconds / total_available_seconds, 3)
 
 
-def global_daily_occupancy(date):
+def daily_occupancy_series(start_date, end_date, total_rooms=None):
     """
-    Returns the global occupancy rate (0..1) for all rooms
-    in the coworking on a given date.
+    Global occupancy rate (0..1) of every day in the range, from one grouped
+    aggregate over the daily occupancy rollup (plus a room count when
+    total_rooms is not given). Days without reservations are included at 0.
+    With OCCUPANCY_BACKEND = "cube" the seconds come from an OccupancyCube.
+
+    Output: [{"date": date, "occupancy_rate": float}, ...] in date order
     """
 
     OPENING_HOUR = time(settings.COWORKING_OPENING_HOUR)
     CLOSING_HOUR = time(settings.COWORKING_CLOSING_HOUR)
 
-    rooms = Room.objects.all()
-    available_seconds = 0
-    occupied_seconds = 0
+    if total_rooms is None:
+        total_rooms = Room.objects.count()
 
-    for room in rooms:
-        room_available_seconds = (
-            datetime.combine(date, CLOSING_HOUR) - datetime.combine(date, OPENING_HOUR)
-        ).total_seconds()
-        available_seconds += room_available_seconds
+    available_seconds = (
+        datetime.combine(start_date, CLOSING_HOUR)
+        - datetime.combine(start_date, OPENING_HOUR)
+    ).total_seconds() * total_rooms
+
+    if cube_backend_enabled():
+        room_ids = list(Room.objects.values_list("id", flat=True))
+        occupied = OccupancyCube.load(start_date, end_date, room_ids).day_seconds()
+    else:
+        occupied = dict(
+            RoomDailyOccupancy.objects.filter(date__range=(start_date, end_date))
+            .order_by()
+            .values("date")
+            .annotate(total=Sum("confirmed_seconds"))
+            .values_list("date", "total")
+        )
 
-        reservations = Reservation.objects.filter(
-            room=room, date=date, status=Reservation.Status.CONFIRMED
+    return [
+        {
+            "date": current_date,
+            "occupancy_rate": (
+                occupied.get(current_date, 0) / available_seconds
+                if available_seconds > 0
+                else 0.0
+            ),
+        }
+        for current_date in (
+            start_date + timedelta(days=offset)
+            for offset in range((end_date - start_date).days + 1)
         )
+    ]
 
-        for reservation in reservations:
-            reservation_seconds = (
-                datetime.combine(date, reservation.end_time)
-                - datetime.combine(date, reservation.start_time)
-            ).total_seconds()
-            occupied_seconds += reservation_seconds
 
-    if available_seconds == 0:
-        return 0.0
+def global_daily_occupancy(date):
+    """
+    Returns the global occupancy rate (0..1) for all rooms
+    in the coworking on a given date.
+    """
 
-    return occupied_seconds / available_seconds
+    return daily_occupancy_series(date, date)[0]["occupancy_rate"]
 
 
-def peak_day(year, month):
+def peak_day(year, month, total_rooms=None):
     """
     Returns the day with the highest global occupancy rate
     for the given year and month.
@@ -186,17 +188,17 @@ def peak_day(year, month):
     """
     _, num_days = calendar.monthrange(year, month)
 
+    series = daily_occupancy_series(
+        date(year, month, 1), date(year, month, num_days), total_rooms
+    )
+
     peak = None
     max_rate = -1
 
-    for day in range(1, num_days + 1):
-        current_date = date(year, month, day)
-
-        rate = global_daily_occupancy(current_date)
-
-        if rate > max_rate:
-            max_rate = rate
-            peak = current_date
+    for day in series:
+        if day["occupancy_rate"] > max_rate:
+            max_rate = day["occupancy_rate"]
+            peak = day["date"]
 
     if peak is None:
         return None
@@ -207,51 +209,160 @@ def peak_day(year, month):
     }
 
 
-def most_used_time_slot(start_date, end_date):
+WEEKDAYS = [
+    "monday",
+    "tuesday",
+    "wednesday",
+    "thursday",
+    "friday",
+    "saturday",
+    "sunday",
+]
+
 
-    reservations = Reservation.objects.filter(
+def _confirmed_in_range(start_date, end_date):
+    return Reservation.objects.filter(
         date__range=(start_date, end_date),
         status=Reservation.Status.CONFIRMED,
-    ).values_list("start_time")
+    ).order_by()
 
-    counter = Counter()
 
-    for start in reservations:
-        if start:
-            counter[start[0].hour] += 1
+def _occupied_hour_counts():
+    """
+    One conditional counter per hour of the day: reservations that
+    overlap [h:00, h+1:00), so a 9:00-11:30 booking counts at 9, 10 and 11.
+    """
 
-    if not counter:
+    return {
+        f"h{hour}": Count(
+            "id",
+            filter=Q(
+                start_time__lt=time(hour + 1) if hour < 23 else time.max,
+                end_time__gt=time(hour),
+            ),
+        )
+        for hour in range(24)
+    }
+
+
+def most_used_time_slot(start_date, end_date, *, occupied=False):
+    """
+    Hour with the most confirmed reservations starting in it (or occupying
+    it with occupied=True), counted by the database.
+    Ties go to the hour that appears first in date order.
+    """
+
+    reservations = _confirmed_in_range(start_date, end_date)
+
+    if occupied:
+        counts = reservations.aggregate(**_occupied_hour_counts())
+        hour = max(range(24), key=lambda hour: (counts[f"h{hour}"], -hour))
+        if counts[f"h{hour}"] == 0:
+            return None
+        return {"hour": hour, "reservations": counts[f"h{hour}"]}
+
+    top = (
+        reservations.annotate(hour=ExtractHour("start_time"))
+        .values("hour")
+        .annotate(reservations=Count("id"), first_date=Min("date"))
+        .order_by("-reservations", "first_date", "hour")
+        .first()
+    )
+
+    if top is None:
         return None
 
-    hour, count = counter.most_common(1)[0]
+    return {"hour": top["hour"], "reservations": top["reservations"]}
 
-    return {"hour": hour, "reservations": count}
 
+def _empty_heatmap():
+    return {day: {hour: 0 for hour in range(24)} for day in WEEKDAYS}
 
-def room_heatmap(start_date, end_date):
 
-    reservations = Reservation.objects.filter(
-        date__range=(start_date, end_date),
-        status=Reservation.Status.CONFIRMED,
-    ).values_list("date", "start_time")
-
-    heatmap = {
-        day: {hour: 0 for hour in range(24)}
-        for day in [
-            "monday",
-            "tuesday",
-            "wednesday",
-            "thursday",
-            "friday",
-            "saturday",
-            "sunday",
-        ]
+def room_heatmap(start_date, end_date, *, by_room=False, occupied=False):
+    """
+    Confirmed reservations per weekday and hour, grouped in SQL so at most
+    7 x 24 counters (per room with by_room=True) come back.
+
+    By default a reservation counts at its start hour; with occupied=True
+    it counts at every hour it occupies.
+
+    Output: {weekday: {hour: count}}, or {room_id: {weekday: {hour: count}}}
+    for rooms with reservations when by_room=True.
+    """
+
+    group_by = ["weekday", "room_id"] if by_room else ["weekday"]
+    reservations = _confirmed_in_range(start_date, end_date).annotate(
+        weekday=ExtractIsoWeekDay("date")
+    )
+
+    if occupied:
+        rows = (
+            reservations.values(*group_by)
+            .annotate(**_occupied_hour_counts())
+            .values_list(*group_by, *[f"h{hour}" for hour in range(24)])
+        )
+        cells = (
+            (row[:len(group_by)], hour, count)
+            for row in rows
+            for hour, count in enumerate(row[len(group_by):])
+        )
+    else:
+        rows = (
+            reservations.annotate(hour=ExtractHour("start_time"))
+            .values(*group_by, "hour")
+            .annotate(count=Count("id"))
+            .values_list(*group_by, "hour", "count")
+        )
+        cells = ((row[:-2], row[-2], row[-1]) for row in rows)
+
+    if not by_room:
+        heatmap = _empty_heatmap()
+        for (weekday,), hour, count in cells:
+            heatmap[WEEKDAYS[weekday - 1]][hour] += count
+        return heatmap
+
+    heatmaps = {}
+    for (weekday, room_id), hour, count in cells:
+        if count:
+            heatmaps.setdefault(room_id, _empty_heatmap())[WEEKDAYS[weekday - 1]][hour] += count
+    return heatmaps
+
+
+def capacity_report(start_date, end_date):
+    """
+    Capacity planning figures of every room over the range, from one
+    OccupancyCube (needs numpy). Rates are 0..1 over opening hours.
+
+    Output:
+    {
+        "per_room": [{"room_id", "room_name", "utilization"}, ...],
+        "per_weekday": {"monday": float, ...},
+        "per_slot": {"08:00": float, ...},
+        "peak_concurrency": {"rooms", "date", "start_time"} | None,
+        "longest_free_block": [{"room_id", "room_name", "block"}, ...],
     }
+    """
+
+    rooms = list(Room.objects.order_by("name").values_list("id", "name"))
+    cube = OccupancyCube.load(start_date, end_date, [room_id for room_id, _ in rooms])
 
-    for reservation_date, start_time in reservations:
-        if reservation_date and start_time:
-            weekday = reservation_date.strftime("%A").lower()
-            hour = start_time.hour
-            heatmap[weekday][hour] += 1
+    utilization = cube.room_utilization()
+    free_blocks = cube.longest_free_block()
 
-    return heatmap
+    return {
+        "per_room": [
+            {"room_id": room_id, "room_name": name, "utilization": utilization[room_id]}
+            for room_id, name in rooms
+        ],
+        "per_weekday": {
+            WEEKDAYS[weekday]: rate
+            for weekday, rate in cube.weekday_utilization().items()
+        },
+        "per_slot": cube.slot_utilization(),
+        "peak_concurrency": cube.peak_concurrency(),
+        "longest_free_block": [
+            {"room_id": room_id, "room_name": name, "block": free_blocks[room_id]}
+            for room_id, name in rooms
+        ],
+    }
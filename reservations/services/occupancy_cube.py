@@ -0,0 +1,211 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+from reservations.models import Reservation
+from reservations.slots import SLOT_MINUTES, slot_time
+
+try:
+    import numpy as np
+except ImportError:  # Optional, only needed by this module
+    np = None
+
+SLOTS_PER_DAY = 24 * 60 // SLOT_MINUTES
+
+
+def cube_backend_enabled():
+    return settings.OCCUPANCY_BACKEND == "cube"
+
+
+class OccupancyCube:
+    """
+    Confirmed occupancy of a date range as a rooms x days x slots array of
+    uint8 counts (slots of SLOT_MINUTES counted from midnight, like the
+    slot ledger). Loaded with one query and filled with array operations,
+    without Python loops over reservations; the reductions below work on
+    the whole array.
+
+    `occupied` is the bool view used for utilization; `counts` can go
+    above 1 only for overlapping rows written around the ledger.
+    """
+
+    def __init__(self, start_date, end_date, room_ids, counts):
+        self.start_date = start_date
+        self.end_date = end_date
+        self.room_ids = list(room_ids)
+        self.counts = counts
+        self.occupied = counts > 0
+        self.dates = [
+            start_date + timedelta(days=offset) for offset in range(counts.shape[1])
+        ]
+
+    @classmethod
+    def load(cls, start_date, end_date, room_ids):
+        """
+        Builds the cube of the given rooms (in that order) from the
+        confirmed reservations of the range.
+        """
+
+        if np is None:
+            raise ImproperlyConfigured("The occupancy cube needs numpy installed")
+
+        room_ids = np.array(list(room_ids), dtype=np.int64)
+        days = (end_date - start_date).days + 1
+        rows = list(
+            Reservation.objects.filter(
+                room_id__in=room_ids.tolist(),
+                date__range=(start_date, end_date),
+                status=Reservation.Status.CONFIRMED,
+            ).values_list("room_id", "date", "start_slot", "end_slot")
+        )
+
+        # One extra slot so end_slot == SLOTS_PER_DAY has somewhere to go
+        diff = np.zeros((len(room_ids), days, SLOTS_PER_DAY + 1), dtype=np.int16)
+        if rows:
+            room_col, date_col, start_col, end_col = zip(*rows)
+            # Position of each row's room in room_ids, through a sorted copy
+            order = np.argsort(room_ids, kind="stable")
+            rooms = order[np.searchsorted(room_ids[order], np.array(room_col))]
+            day_offsets = (
+                np.array(date_col, dtype="datetime64[D]") - np.datetime64(start_date, "D")
+            ).astype(np.intp)
+            starts = np.array(start_col, dtype=np.intp)
+            ends = np.minimum(np.array(end_col, dtype=np.intp), SLOTS_PER_DAY)
+
+            # +1 where each reservation starts and -1 where it ends; the
+            # running sum along the slot axis is then the count per slot
+            np.add.at(diff, (rooms, day_offsets, starts), 1)
+            np.add.at(diff, (rooms, day_offsets, ends), -1)
+
+        counts = np.cumsum(diff[:, :, :SLOTS_PER_DAY], axis=2).astype(np.uint8)
+        return cls(start_date, end_date, room_ids.tolist(), counts)
+
+    def opening_hours(self):
+        """
+        The occupied cube restricted to the slots inside opening hours.
+        """
+
+        first = settings.COWORKING_OPENING_HOUR * 60 // SLOT_MINUTES
+        last = settings.COWORKING_CLOSING_HOUR * 60 // SLOT_MINUTES
+        return self.occupied[:, :, first:last]
+
+    def room_seconds(self):
+        """
+        Occupied seconds of every room over the whole range (all day long,
+        as the daily occupancy rollup counts them).
+        """
+
+        seconds = self.occupied.sum(axis=(1, 2)) * SLOT_MINUTES * 60
+        return dict(zip(self.room_ids, seconds.tolist()))
+
+    def day_seconds(self):
+        """
+        Occupied seconds of all rooms together on every day of the range.
+        """
+
+        seconds = self.occupied.sum(axis=(0, 2)) * SLOT_MINUTES * 60
+        return dict(zip(self.dates, seconds.tolist()))
+
+    def room_utilization(self):
+        """
+        Share (0..1) of the opening-hours slots of the range each room was occupied.
+        """
+
+        cube = self.opening_hours()
+        if cube.size == 0:
+            return {room_id: 0.0 for room_id in self.room_ids}
+        return dict(zip(self.room_ids, cube.mean(axis=(1, 2)).tolist()))
+
+    def weekday_utilization(self):
+        """
+        Share (0..1) of opening-hours slots occupied on each weekday
+        (0 is Monday, as date.weekday()), over every room. Weekdays not
+        in the range are left out.
+        """
+
+        cube = self.opening_hours()
+        weekdays = np.array([day.weekday() for day in self.dates], dtype=np.intp)
+        occupied = np.bincount(weekdays, weights=cube.sum(axis=(0, 2)), minlength=7)
+        available = np.bincount(weekdays, minlength=7) * cube.shape[0] * cube.shape[2]
+
+        return {
+            weekday: float(occupied[weekday] / available[weekday])
+            for weekday in range(7)
+            if available[weekday]
+        }
+
+    def slot_utilization(self):
+        """
+        Share (0..1) of room-days occupied at each opening-hours slot,
+        keyed by the slot start time ("HH:MM").
+        """
+
+        cube = self.opening_hours()
+        if cube.shape[0] == 0 or cube.shape[1] == 0:
+            rates = np.zeros(cube.shape[2])
+        else:
+            rates = cube.mean(axis=(0, 1))
+        return {
+            slot_time(index).strftime("%H:%M"): float(rate)
+            for index, rate in enumerate(rates)
+        }
+
+    def peak_concurrency(self):
+        """
+        Highest number of rooms occupied in the same slot, and the first
+        date and time it happened. None when nothing is occupied.
+        """
+
+        concurrent = self.occupied.sum(axis=0)
+        if concurrent.size == 0 or concurrent.max() == 0:
+            return None
+
+        day, slot = np.unravel_index(np.argmax(concurrent), concurrent.shape)
+        minutes = int(slot) * SLOT_MINUTES
+        return {
+            "rooms": int(concurrent[day, slot]),
+            "date": self.dates[day],
+            "start_time": f"{minutes // 60:02d}:{minutes % 60:02d}",
+        }
+
+    def longest_free_block(self):
+        """
+        Longest run of free opening-hours slots of each room within one day,
+        the earliest one when several are as long.
+
+        Output: {room_id: {"date", "start_time", "end_time", "minutes"} | None}
+        """
+
+        cube = self.opening_hours()
+        rooms, days, slots = cube.shape
+        result = {room_id: None for room_id in self.room_ids}
+        if not rooms or not days or not slots:
+            return result
+
+        # Pad every room-day with a busy slot on both sides, so each free
+        # run shows up as a +1 step where it starts and a -1 step where it ends
+        free = np.zeros((rooms * days, slots + 2), dtype=np.int8)
+        free[:, 1:-1] = ~cube.reshape(rooms * days, slots)
+        steps = np.diff(free, axis=1)
+        run_rows, run_starts = np.nonzero(steps == 1)
+        _, run_ends = np.nonzero(steps == -1)
+        if not len(run_rows):
+            return result
+
+        lengths = run_ends - run_starts
+        run_rooms = run_rows // days
+        # Per room: longest first, then earliest day and slot
+        order = np.lexsort((run_starts, run_rows, -lengths, run_rooms))
+        _, firsts = np.unique(run_rooms[order], return_index=True)
+
+        for run in order[firsts]:
+            start = slot_time(int(run_starts[run]))
+            end = slot_time(int(run_ends[run]))
+            result[self.room_ids[run_rooms[run]]] = {
+                "date": self.dates[run_rows[run] % days],
+                "start_time": start.strftime("%H:%M"),
+                "end_time": end.strftime("%H:%M"),
+                "minutes": int(lengths[run]) * SLOT_MINUTES,
+            }
+        return result
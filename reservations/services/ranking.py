@@ -1,180 +1,196 @@
 import calendar
-from reservations.models import Reservation
+from contextlib import contextmanager
+from contextvars import ContextVar
+from reservations.models import RoomDailyOccupancy
+from reservations.services.occupancy_cube import OccupancyCube, cube_backend_enabled
 from rooms.models import Room
-from datetime import datetime, time, timedelta, date
+from datetime import date, timedelta
 from coworking_reservations import settings
-from django.db.models import F, ExpressionWrapper, DurationField, Sum
+from django.db.models import BigIntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
 
 
-def rooms_monthly_ranking(year, month):
-    OPENING_HOUR = settings.COWORKING_OPENING_HOUR
-    CLOSING_HOUR = settings.COWORKING_CLOSING_HOUR
+_memo = ContextVar("ranking_memo", default=None)
 
-    start_date = date(year, month, 1)
-    last_day = calendar.monthrange(year, month)[1]
-    end_date = date(year, month, last_day)
 
-    daily_seconds = (CLOSING_HOUR - OPENING_HOUR) * 3600
-    total_days = (end_date - start_date).days + 1
-    available_per_room = daily_seconds * total_days
-
-    ranking = []
-
-    for room in Room.objects.all():
-        reservations = Reservation.objects.filter(
-            room=room,
-            date__range=(start_date, end_date),
-            status=Reservation.Status.CONFIRMED,
-            start_time__isnull=False,
-            end_time__isnull=False,
-        ).values_list("start_time", "end_time")
-
-        total_seconds = sum(
-            (
-                datetime.combine(date.today(), end)
-                - datetime.combine(date.today(), start)
-            ).total_seconds()
-            for start, end in reservations
-            if start and end
-        )
-        occupancy = total_seconds / available_per_room if available_per_room > 0 else 0
-
-        ranking.append({"room_id": room.id, "room_name":room.name, "occupancy": round(occupancy, 3)})
-
-    ranking.sort(key=lambda x: x["occupancy"], reverse=True)
-    return ranking
-
-
-def best_performing_room(start_date, end_date):
-    rooms_data = []
-
-    for room in Room.objects.all():
-        reservations = Reservation.objects.filter(
-            room=room,
-            date__range=(start_date, end_date),
-            status=Reservation.Status.CONFIRMED,
-            start_time__isnull=False,
-            end_time__isnull=False,
-        ).values_list("start_time", "end_time")
-
-        total_seconds = sum(
-            (
-                datetime.combine(date.today(), end)
-                - datetime.combine(date.today(), start)
-            ).total_seconds()
-            for start, end in reservations
-            if start and end
-        )
-        rooms_data.append((room, total_seconds))
-
-    if not rooms_data:
-        return None
-
-    rooms_data.sort(key=lambda x: x[1], reverse=True)
-    return rooms_data[0][0]
-
-
-def top_3_rooms(start_date, end_date):
-    rooms_data = []
-
-    for room in Room.objects.all():
-        reservations = Reservation.objects.filter(
-            room=room,
-            date__range=(start_date, end_date),
-            status=Reservation.Status.CONFIRMED,
-            start_time__isnull=False,
-            end_time__isnull=False,
-        ).values_list("start_time", "end_time")
-
-        total_seconds = sum(
-            (
-                datetime.combine(date.today(), end)
-                - datetime.combine(date.today(), start)
-            ).total_seconds()
-            for start, end in reservations
-            if start and end
-        )
-        rooms_data.append((room, total_seconds))
-
-    rooms_data.sort(key=lambda x: x[1], reverse=True)
-    return [r[0] for r in rooms_data[:3]]
-
-
-def utilization_percentage_per_room(start_date, end_date):
+@contextmanager
+def ranking_memo():
+    """
+    Within this block, room_usage is computed once per date range and
+    shared by every ranking function. RankingMemoMiddleware opens one
+    per GET request.
+    """
+
+    token = _memo.set({})
+    try:
+        yield
+    finally:
+        _memo.reset(token)
+
+
+def _seconds_through(day):
+    return Coalesce(
+        Subquery(
+            RoomDailyOccupancy.objects.filter(room=OuterRef("pk"), date__lte=day)
+            .order_by("-date")
+            .values("confirmed_seconds_to_date")[:1]
+        ),
+        0,
+        output_field=BigIntegerField(),
+    )
+
+
+def _rooms_with_confirmed_seconds(start_date, end_date):
+    """
+    Every room annotated with its confirmed seconds in the range, in a
+    single query: the difference of two prefix sum lookups per room,
+    so the cost does not depend on the length of the range.
+    With OCCUPANCY_BACKEND = "cube" the seconds come from an OccupancyCube.
+    """
+    if cube_backend_enabled():
+        return _rooms_with_cube_seconds(start_date, end_date)
+
+    return Room.objects.annotate(
+        confirmed_seconds=_seconds_through(end_date)
+        - _seconds_through(start_date - timedelta(days=1))
+    ).order_by("name")
+
+
+def _rooms_with_cube_seconds(start_date, end_date):
+    rooms = list(Room.objects.order_by("name"))
+    seconds = OccupancyCube.load(
+        start_date, end_date, [room.id for room in rooms]
+    ).room_seconds()
+    for room in rooms:
+        room.confirmed_seconds = seconds[room.id]
+    return rooms
+
+
+def room_usage(start_date, end_date):
+    """
+    Ranking engine: every room, unused ones included, with its confirmed
+    seconds in the range (room.confirmed_seconds), ordered by name.
+    One query with two prefix sum lookups per room (or one cube load),
+    memoized per range inside ranking_memo().
+    """
+
+    memo = _memo.get()
+    if memo is None:
+        return list(_rooms_with_confirmed_seconds(start_date, end_date))
+
+    key = (start_date, end_date)
+    if key not in memo:
+        memo[key] = list(_rooms_with_confirmed_seconds(start_date, end_date))
+    return memo[key]
+
+
+def rooms_with_seconds(room_seconds):
+    """
+    Every room ordered by name, like room_usage, with its confirmed seconds
+    taken from a {room_id: seconds} map (0 for rooms not in it).
+    The functions below accept it as `usage` instead of reading room_usage,
+    so callers that already summed the seconds (the dashboard, from its
+    day partials) share the same ranking.
+    """
+
+    rooms = list(Room.objects.order_by("name"))
+    for room in rooms:
+        room.confirmed_seconds = room_seconds.get(room.id, 0)
+    return rooms
+
+
+def _usage(start_date, end_date, usage):
+    return room_usage(start_date, end_date) if usage is None else usage
+
+
+def ranked_rooms(start_date, end_date, usage=None):
+    """
+    room_usage sorted by confirmed seconds, busiest first; ties keep name order.
+    """
+
+    return sorted(
+        _usage(start_date, end_date, usage),
+        key=lambda room: room.confirmed_seconds,
+        reverse=True,
+    )
+
+
+def top_rooms(start_date, end_date, k, usage=None):
+    return ranked_rooms(start_date, end_date, usage)[:k]
+
+
+def _available_seconds(start_date, end_date):
     OPENING_HOUR = settings.COWORKING_OPENING_HOUR
     CLOSING_HOUR = settings.COWORKING_CLOSING_HOUR
 
     daily_seconds = (CLOSING_HOUR - OPENING_HOUR) * 3600
     total_days = (end_date - start_date).days + 1
-    total_available_seconds = daily_seconds * total_days
-
-    result = []
-
-    for room in Room.objects.all():
-        reservations = Reservation.objects.filter(
-            room=room,
-            date__range=(start_date, end_date),
-            status=Reservation.Status.CONFIRMED,
-            start_time__isnull=False,
-            end_time__isnull=False,
-        ).values_list("start_time", "end_time")
-
-        total_seconds = sum(
-            (
-                datetime.combine(date.today(), end)
-                - datetime.combine(date.today(), start)
-            ).total_seconds()
-            for start, end in reservations
-            if start and end
-        )
-        utilization = (
-            total_seconds / total_available_seconds
-            if total_available_seconds > 0
-            else 0
-        )
-
-        result.append(
-            {
-                "room_id": room.id,
-                "room_name": room.name,
-                "utilization_percentage": round(utilization * 100, 2),
-            }
-        )
-
-    return result
-
-
-def total_hours_per_room(start_date, end_date):
-
-    reservations = (
-        Reservation.objects.filter(
-            date__range=(start_date, end_date),
-            status=Reservation.Status.CONFIRMED,
-            start_time__isnull=False,
-            end_time__isnull=False,
-        )
-        .annotate(
-            duration=ExpressionWrapper(
-                F("end_time") - F("start_time"),
-                output_field=DurationField(),
-            )
-        )
-        .values("room__id", "room__name")
-        .annotate(total_duration=Sum("duration"))
-        .order_by("-total_duration")
-    )
-
-    result = []
+    return daily_seconds * total_days
 
-    for r in reservations:
-        hours = round(r["total_duration"].total_seconds() / 3600, 2)
 
-        result.append(
-            {
-                "room_id": r["room__id"],
-                "room_name": r["room__name"],
-                "total_hours": hours,
-            }
-        )
+def rooms_monthly_ranking(year, month):
+    start_date = date(year, month, 1)
+    last_day = calendar.monthrange(year, month)[1]
+    end_date = date(year, month, last_day)
 
-    return result
+    available_per_room = _available_seconds(start_date, end_date)
+
+    return [
+        {
+            "room_id": room.id,
+            "room_name": room.name,
+            "occupancy": round(
+                room.confirmed_seconds / available_per_room
+                if available_per_room > 0
+                else 0,
+                3,
+            ),
+        }
+        for room in ranked_rooms(start_date, end_date)
+    ]
+
+
+def best_performing_room(start_date, end_date, usage=None):
+    top = top_rooms(start_date, end_date, 1, usage)
+    return top[0] if top else None
+
+
+def top_3_rooms(start_date, end_date, usage=None):
+    return top_rooms(start_date, end_date, 3, usage)
+
+
+def utilization_percentage_per_room(start_date, end_date, usage=None):
+    total_available_seconds = _available_seconds(start_date, end_date)
+
+    return [
+        {
+            "room_id": room.id,
+            "room_name": room.name,
+            "utilization_percentage": round(
+                (
+                    room.confirmed_seconds / total_available_seconds
+                    if total_available_seconds > 0
+                    else 0
+                )
+                * 100,
+                2,
+            ),
+        }
+        for room in _usage(start_date, end_date, usage)
+    ]
+
+
+def total_hours_per_room(start_date, end_date, usage=None):
+    """
+    Hours per room for rooms used in the range, busiest first.
+    """
+
+    return [
+        {
+            "room_id": room.id,
+            "room_name": room.name,
+            "total_hours": round(room.confirmed_seconds / 3600, 2),
+        }
+        for room in ranked_rooms(start_date, end_date, usage)
+        if room.confirmed_seconds > 0
+    ]
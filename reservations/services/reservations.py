@@ -1,11 +1,29 @@
+import base64
+import uuid
+from collections import defaultdict
+from django.core.cache import cache
 from django.db import transaction
 from coworking_reservations import settings
-from reservations.models import Reservation
+from reservations.models import Reservation, effectively_active_q
+from rooms.models import Room
 from django.utils import timezone
-from datetime import timedelta, datetime, time
-from django.db.models import Q
+from datetime import timedelta, datetime, time, date as date_type
+from django.db.models import Exists, Min, OuterRef, Q
 from django.core.exceptions import PermissionDenied
 from django.db import IntegrityError
+from reservations.services.availability import availability_busy_mask
+from reservations.services.availability_cache import (
+    count_hit,
+    count_miss,
+    is_fresh,
+    room_day_version,
+    slots_entry_key,
+    slots_etag,
+)
+from reservations.services.expiry import expire_lapsed_holds
+from reservations.services.ledger import claim_slots
+from reservations.services.sync import sync_room_days
+from reservations.slots import SLOT_MINUTES, free_ranges as slot_free_ranges, slot_columns
 # PermissionDenied throws 403
 
 
@@ -28,61 +46,335 @@ def create_reservation_service(
 
     existing = Reservation.objects.filter(idempotency_key=idempotency_key).first()
     if existing:
-        return existing
+        return _own_replay(existing, user)
 
-    if Reservation.overlapping_exists(room, date, start_time, end_time):
+    # No overlap pre-check: saving claims the slots in the ReservationSlot
+    # ledger and its unique constraint rejects a slot that is already taken.
+    # Lapsed holds of the day give their slots back first.
+    expire_lapsed_holds(room=room, date=date)
+    try:
+        with transaction.atomic():
+            reservation = Reservation.objects.create(
+                idempotency_key=idempotency_key,
+                room=room,
+                date=date,
+                start_time=start_time,
+                end_time=end_time,
+                status=Reservation.Status.PENDING,
+                user=user,
+                expires_at=timezone.now() + timedelta(minutes=10),
+            )
+    except IntegrityError:
+        existing = Reservation.objects.filter(idempotency_key=idempotency_key).first()
+        if existing:
+            return _own_replay(existing, user)
         raise ReservationOverlapError("Time slot already booked")
+    return reservation
+
+
+def _own_replay(existing, user):
+    # Keys are scoped per user, as in the bulk path: another user's key
+    # must not hand out their reservation
+    if existing.user_id != user.pk:
+        raise ValueError("idempotency_key already used")
+    return existing
 
+
+class BulkItemStatus:
+    CREATED = "created"
+    DUPLICATE = "duplicate"
+    CONFLICT = "conflict"
+    INVALID = "invalid"
+    ABORTED = "aborted"
+
+
+def _bulk_room_id(item):
     try:
-        reservation = Reservation.objects.create(
-            idempotency_key=idempotency_key,
-            room=room,
-            date=date,
-            start_time=start_time,
-            end_time=end_time,
+        return int(item["room_id"])
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+def _parse_bulk_item(item, rooms):
+    """
+    Validates one bulk request item and returns its normalized fields.
+    Raises ValueError with the reason when the item is invalid.
+    """
+
+    if not isinstance(item, dict):
+        raise ValueError("Item must be an object")
+    required_fields = {"idempotency_key", "room_id", "date", "start_time", "end_time"}
+    if not required_fields.issubset(item):
+        raise ValueError("Missing required fields")
+    try:
+        idempotency_key = uuid.UUID(str(item["idempotency_key"]))
+    except ValueError:
+        raise ValueError("Invalid idempotency_key")
+    try:
+        date = date_type.fromisoformat(item["date"])
+        start_time = time.fromisoformat(item["start_time"])
+        end_time = time.fromisoformat(item["end_time"])
+    except (TypeError, ValueError):
+        raise ValueError("Invalid date or time format")
+    if start_time >= end_time:
+        raise ValueError("start_time must be before end_time")
+    if date < timezone.localdate():
+        raise ValueError("Cannot reserve in the past")
+    validate_duration(date, start_time, end_time)
+    room = rooms.get(_bulk_room_id(item))
+    if room is None:
+        raise ValueError("Room not found")
+
+    return {
+        "idempotency_key": idempotency_key,
+        "room": room,
+        "date": date,
+        "start_time": start_time,
+        "end_time": end_time,
+    }
+
+
+@transaction.atomic
+def create_reservations_bulk(*, items, user, all_or_nothing=True):
+    """
+    Creates many reservations at once. Idempotency keys, rooms and
+    overlaps (against the database and inside the batch) are each
+    resolved with a single query, and the new rows go through one
+    bulk_create.
+
+    Returns one result per item, in order:
+    {"index": int, "status": BulkItemStatus, "reservation": Reservation | None,
+     "error": str | None}
+    """
+
+    room_ids = {_bulk_room_id(item) for item in items if isinstance(item, dict)}
+    rooms = Room.objects.in_bulk([room_id for room_id in room_ids if room_id])
+
+    results = []
+    parsed = {}
+
+    for index, item in enumerate(items):
+        result = {"index": index, "status": None, "reservation": None, "error": None}
+        results.append(result)
+        try:
+            parsed[index] = _parse_bulk_item(item, rooms)
+        except ValueError as e:
+            result["status"] = BulkItemStatus.INVALID
+            result["error"] = str(e)
+
+    existing = Reservation.objects.in_bulk(
+        [fields["idempotency_key"] for fields in parsed.values()],
+        field_name="idempotency_key",
+    )
+    # Keys are unique across users: another user's key is never replayed
+    # and cannot be created either
+    foreign_keys = {
+        key for key, reservation in existing.items() if reservation.user_id != user.pk
+    }
+
+    room_ids = {fields["room"].id for fields in parsed.values()}
+    dates = {fields["date"] for fields in parsed.values()}
+    now = timezone.now()
+    if parsed:
+        expire_lapsed_holds(now, room_id__in=room_ids, date__in=dates)
+
+    busy = defaultdict(list)
+    for room_id, day, start_slot, end_slot in Reservation.objects.filter(
+        effectively_active_q(now),
+        room_id__in=room_ids,
+        date__in=dates,
+    ).values_list("room_id", "date", "start_slot", "end_slot"):
+        busy[(room_id, day)].append((start_slot, end_slot))
+
+    seen_keys = {}
+    batch_duplicates = []
+    to_create = []
+    expires_at = now + timedelta(minutes=10)
+
+    for index, fields in parsed.items():
+        result = results[index]
+        key = fields["idempotency_key"]
+
+        if key in foreign_keys:
+            result["status"] = BulkItemStatus.INVALID
+            result["error"] = "idempotency_key already used"
+            continue
+        if key in existing:
+            result["status"] = BulkItemStatus.DUPLICATE
+            result["reservation"] = existing[key]
+            continue
+        if key in seen_keys:
+            result["status"] = BulkItemStatus.DUPLICATE
+            result["reservation"] = seen_keys[key]
+            batch_duplicates.append(result)
+            continue
+
+        reservation = Reservation(
+            **fields,
             status=Reservation.Status.PENDING,
             user=user,
-            expires_at=timezone.now() + timedelta(minutes=10),
+            expires_at=expires_at,
         )
+        # bulk_create skips save(), so fill the slot columns here
+        reservation.set_slot_columns()
+
+        room_day = busy[(fields["room"].id, fields["date"])]
+        if any(
+            start < reservation.end_slot and end > reservation.start_slot
+            for start, end in room_day
+        ):
+            result["status"] = BulkItemStatus.CONFLICT
+            result["error"] = "Time slot already booked"
+            continue
+
+        room_day.append((reservation.start_slot, reservation.end_slot))
+        seen_keys[key] = reservation
+        to_create.append((result, reservation))
+
+    failed = any(
+        result["status"] in (BulkItemStatus.INVALID, BulkItemStatus.CONFLICT)
+        for result in results
+    )
+
+    if all_or_nothing and failed:
+        for result in [result for result, _ in to_create] + batch_duplicates:
+            result["status"] = BulkItemStatus.ABORTED
+            result["reservation"] = None
+        return results
+
+    created = Reservation.objects.bulk_create(
+        [reservation for _, reservation in to_create]
+    )
+    # bulk_create skips the post_save signal, so claim the slots and sync
+    # the touched days here.
+    try:
+        claim_slots(created)
     except IntegrityError:
-        reservation = Reservation.objects.get(idempotency_key=idempotency_key)
-    return reservation
+        # Another transaction booked one of the slots after our check
+        raise ReservationOverlapError("Time slot already booked")
+    sync_room_days((reservation.room_id, reservation.date) for reservation in created)
+
+    for result, reservation in to_create:
+        result["status"] = BulkItemStatus.CREATED
+        result["reservation"] = reservation
+
+    return results
 
 
 def get_available_slots(*, room, date, slot_minutes=30, minimum_minutes=60):
 
-    OPENING_HOUR = time(settings.COWORKING_OPENING_HOUR)
-    CLOSING_HOUR = time(settings.COWORKING_CLOSING_HOUR)
+    now = timezone.now()
+
+    busy_mask = availability_busy_mask(room, date, now)
+
+    if busy_mask is not None:
+        free_ranges = slot_free_ranges(busy_mask)
+    else:
+        free_ranges = _walk_free_ranges(room, date, now)
+
+    return split_free_ranges(date, free_ranges, slot_minutes, minimum_minutes)
+
+
+def _next_hold_expiry(room, date, now):
+    return Reservation.objects.filter(
+        room=room,
+        date=date,
+        status=Reservation.Status.PENDING,
+        expires_at__gt=now,
+    ).aggregate(next_expiry=Min("expires_at"))["next_expiry"]
+
+
+def cached_available_slots(*, room, date, slot_minutes=30, minimum_minutes=60):
+    """
+    get_available_slots served from the cache while the room/date version
+    is unchanged. Entries also stop being valid when the first pending hold
+    of the day lapses, since that frees slots without any write.
+    """
+
+    slots, _ = cached_available_slots_and_etag(
+        room=room, date=date, slot_minutes=slot_minutes, minimum_minutes=minimum_minutes
+    )
+    return slots
+
+
+def cached_available_slots_and_etag(*, room, date, slot_minutes=30, minimum_minutes=60):
+    """
+    cached_available_slots and the ETag of the version those slots belong
+    to, or None when a write committed while they were being computed.
+    """
 
     now = timezone.now()
+    version = room_day_version(room.id, date)
+    key = slots_entry_key(room.id, date, slot_minutes, minimum_minutes, version)
+    etag = slots_etag(room.id, date, slot_minutes, minimum_minutes, version)
+
+    entry = cache.get(key)
+    if is_fresh(entry, now):
+        count_hit()
+        return entry["slots"], etag
+
+    count_miss()
+    valid_until = _next_hold_expiry(room, date, now)
+    slots = get_available_slots(
+        room=room,
+        date=date,
+        slot_minutes=slot_minutes,
+        minimum_minutes=minimum_minutes,
+    )
+    if room_day_version(room.id, date) != version:
+        # The slots may already include the newer write: neither cache
+        # them under the old version nor tag them with it
+        return slots, None
+    cache.set(key, {"slots": slots, "valid_until": valid_until})
+    return slots, etag
+
+
+def _walk_free_ranges(room, date, now):
+    """
+    Free ranges computed from the reservation rows, used when the
+    availability index cannot answer for this room and day.
+    """
 
     reservations = (
         Reservation.objects.filter(
             room=room,
             date=date,
         )
-        .filter(
-            Q(status=Reservation.Status.CONFIRMED)
-            | Q(
-                status=Reservation.Status.PENDING,
-                expires_at__gt=now,
-            )
-        )
+        .filter(effectively_active_q(now))
         .order_by("start_time")
     )
 
+    return merge_free_ranges(
+        (reservation.start_time, reservation.end_time) for reservation in reservations
+    )
+
+
+def merge_free_ranges(busy_ranges):
+    """
+    Free ranges of opening hours left by (start_time, end_time) busy ranges
+    sorted by start_time.
+    """
+
+    OPENING_HOUR = time(settings.COWORKING_OPENING_HOUR)
+    CLOSING_HOUR = time(settings.COWORKING_CLOSING_HOUR)
+
     # Calculate big ranges
     free_ranges = []
     current_start = OPENING_HOUR
 
-    for reservation in reservations:
-        if reservation.start_time > current_start:
-            free_ranges.append((current_start, reservation.start_time))
-        current_start = max(current_start, reservation.end_time)
+    for start_time, end_time in busy_ranges:
+        if start_time > current_start:
+            free_ranges.append((current_start, start_time))
+        current_start = max(current_start, end_time)
 
     if current_start < CLOSING_HOUR:
         free_ranges.append((current_start, CLOSING_HOUR))
 
+    return free_ranges
+
+
+def split_free_ranges(date, free_ranges, slot_minutes=30, minimum_minutes=60):
+
     # Divide in slots
     slots = []
 
@@ -108,6 +400,78 @@ def get_available_slots(*, room, date, slot_minutes=30, minimum_minutes=60):
     return slots
 
 
+def get_availability_grid(
+    *, rooms, start_date, end_date, slot_minutes=30, minimum_minutes=60
+):
+    """
+    Available slots for every (room, day) of the range, from one ordered
+    query over the reservations of all requested rooms.
+
+    Output:
+    {
+        room_id: {date: [(start_time, end_time), ...], ...},
+    }
+    """
+
+    now = timezone.now()
+    room_ids = [room.id for room in rooms]
+
+    reservations = (
+        Reservation.objects.filter(
+            room_id__in=room_ids,
+            date__range=(start_date, end_date),
+        )
+        .filter(effectively_active_q(now))
+        .order_by("room_id", "date", "start_time")
+        .values_list("room_id", "date", "start_time", "end_time")
+    )
+
+    busy = defaultdict(list)
+    for room_id, day, start_time, end_time in reservations:
+        busy[(room_id, day)].append((start_time, end_time))
+
+    days = [
+        start_date + timedelta(days=offset)
+        for offset in range((end_date - start_date).days + 1)
+    ]
+
+    return {
+        room_id: {
+            day: split_free_ranges(
+                day,
+                merge_free_ranges(busy.get((room_id, day), [])),
+                slot_minutes,
+                minimum_minutes,
+            )
+            for day in days
+        }
+        for room_id in room_ids
+    }
+
+
+def find_free_rooms(*, date, start_time, end_time, min_capacity=None):
+    """
+    Active rooms with no active reservation overlapping the given window,
+    resolved with one query whatever the number of rooms.
+    """
+
+    start_slot, end_slot, _ = slot_columns(start_time, end_time)
+    overlapping = Reservation.objects.filter(
+        effectively_active_q(timezone.now()),
+        room=OuterRef("pk"),
+        date=date,
+        start_slot__lt=end_slot,
+        end_slot__gt=start_slot,
+    )
+
+    rooms = Room.objects.filter(is_active=True).filter(~Exists(overlapping))
+
+    if min_capacity is not None:
+        rooms = rooms.filter(max_capacity__gte=min_capacity)
+
+    return rooms.order_by("name")
+
+
 def validate_duration(date, start_time, end_time):
 
     start_dt = datetime.combine(date, start_time)
@@ -121,6 +485,9 @@ def validate_duration(date, start_time, end_time):
     if duration_minutes % 30 != 0:
         raise ValueError("Reservation must be in 30-minute increments")
 
+    if start_time.minute % SLOT_MINUTES or start_time.second or start_time.microsecond:
+        raise ValueError("Reservation must start on the hour or half hour")
+
 
 def confirm_reservation(*, reservation, user):
 
@@ -133,15 +500,18 @@ def confirm_reservation(*, reservation, user):
     if reservation.date < timezone.localdate():
         raise ReservationConfirmationError("Cannot confirm past reservation")
 
-    # change status to expired if is expired
+    # change status to expired if is expired. Committed in its own
+    # transaction, so raising the error afterwards does not roll it back
     if reservation.expires_at and reservation.expires_at <= timezone.now():
         reservation.status = Reservation.Status.EXPIRED
-        reservation.save()
+        with transaction.atomic():
+            reservation.save()
         raise ReservationConfirmationError("Reservation has expired")
 
-    reservation.status = Reservation.Status.CONFIRMED
-    reservation.expires_at = None
-    reservation.save()
+    with transaction.atomic():
+        reservation.status = Reservation.Status.CONFIRMED
+        reservation.expires_at = None
+        reservation.save()
 
     return reservation
 
@@ -154,6 +524,87 @@ def get_user_reservations(user):
     )
 
 
+# Public field name -> column, for the fields= parameter of my-reservations
+RESERVATION_LIST_FIELDS = {
+    "id": "id",
+    "room": "room__name",
+    "room_id": "room_id",
+    "date": "date",
+    "start_time": "start_time",
+    "end_time": "end_time",
+    "status": "status",
+}
+
+
+def encode_reservation_cursor(row):
+    raw = f"{row['date'].isoformat()}|{row['start_time'].isoformat()}|{row['id']}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_reservation_cursor(cursor):
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+        date_str, time_str, id_str = raw.split("|")
+        return (
+            date_type.fromisoformat(date_str),
+            time.fromisoformat(time_str),
+            int(id_str),
+        )
+    except (ValueError, UnicodeError):
+        raise ValueError("Invalid cursor")
+
+
+def get_user_reservations_page(
+    user,
+    *,
+    limit,
+    cursor=None,
+    fields=None,
+    statuses=None,
+    date_from=None,
+    date_to=None,
+):
+    """
+    One page of a user's reservations in (date, start_time, id) order.
+    The cursor is a seek on that key, served by the (user, date, start_time,
+    id) index, so every page costs the same however deep it is.
+
+    Output: (rows, next_cursor); rows are dicts keyed by the public field
+    names, next_cursor is None on the last page.
+    """
+
+    fields = fields or list(RESERVATION_LIST_FIELDS)
+    columns = {RESERVATION_LIST_FIELDS[field] for field in fields}
+    columns |= {"id", "date", "start_time"}
+
+    reservations = Reservation.objects.filter(user=user)
+    if statuses:
+        reservations = reservations.filter(status__in=statuses)
+    if date_from:
+        reservations = reservations.filter(date__gte=date_from)
+    if date_to:
+        reservations = reservations.filter(date__lte=date_to)
+    if cursor:
+        after_date, after_time, after_id = decode_reservation_cursor(cursor)
+        reservations = reservations.filter(
+            Q(date__gt=after_date)
+            | Q(date=after_date, start_time__gt=after_time)
+            | Q(date=after_date, start_time=after_time, id__gt=after_id)
+        )
+
+    rows = list(
+        reservations.order_by("date", "start_time", "id").values(*columns)[
+            : limit + 1
+        ]
+    )
+    next_cursor = encode_reservation_cursor(rows[limit - 1]) if len(rows) > limit else None
+
+    return [
+        {field: row[RESERVATION_LIST_FIELDS[field]] for field in fields}
+        for row in rows[:limit]
+    ], next_cursor
+
+
 def get_user_reservation(user, reservation_id):
     return Reservation.objects.select_related("room").get(id=reservation_id, user=user)
 
@@ -164,13 +615,4 @@ def get_user_reservation(user, reservation_id):
 
 
 def expire_pending_reservations():
-    now = timezone.now()
-
-    expired = Reservation.objects.filter(
-        status=Reservation.Status.PENDING,
-        expires_at__lte=now,
-    )
-
-    count = expired.update(status=Reservation.Status.EXPIRED)
-
-    return count
+    return expire_lapsed_holds()
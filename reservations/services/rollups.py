@@ -0,0 +1,225 @@
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum
+
+from reservations.models import Reservation, RoomDailyOccupancy
+from rooms.models import Room
+
+
+def confirmed_seconds_through(room_id, day):
+    """
+    Confirmed seconds of a room on every day up to `day` (included),
+    read from the prefix sum of the last rollup row on or before it.
+    """
+
+    return (
+        RoomDailyOccupancy.objects.filter(room_id=room_id, date__lte=day)
+        .order_by("-date")
+        .values_list("confirmed_seconds_to_date", flat=True)
+        .first()
+        or 0
+    )
+
+
+def lock_rooms(room_ids):
+    # In id order, so concurrent transactions take the locks in the same order
+    list(
+        Room.objects.select_for_update()
+        .filter(pk__in=set(room_ids))
+        .order_by("pk")
+        .values_list("pk")
+    )
+
+
+def rooms_moving_prefix_sums(room_days):
+    """
+    Rooms whose prefix sums a refresh of these (room_id, date) pairs will
+    move: a day whose confirmed seconds differ from its rollup row, or a
+    day with reservations and no row yet. Read without locks, so that
+    sync_room_days can lock those rooms before the days.
+    """
+
+    pairs = Q(pk__in=[])
+    for room_id, day in room_days:
+        pairs |= Q(room_id=room_id, date=day)
+
+    live = {}
+    grouped = (
+        Reservation.objects.filter(
+            pairs,
+            status__in=[Reservation.Status.CONFIRMED, Reservation.Status.PENDING],
+        )
+        .order_by()
+        .values("room_id", "date", "status")
+        .annotate(minutes=Sum("duration_minutes"))
+    )
+    for group in grouped:
+        key = (group["room_id"], group["date"])
+        live.setdefault(key, 0)
+        if group["status"] == Reservation.Status.CONFIRMED:
+            live[key] += (group["minutes"] or 0) * 60
+
+    stored = {
+        (room_id, day): seconds
+        for room_id, day, seconds in RoomDailyOccupancy.objects.filter(pairs)
+        .order_by()
+        .values_list("room_id", "date", "confirmed_seconds")
+    }
+
+    return {
+        key[0]
+        for key in room_days
+        if (key in live and key not in stored) or live.get(key, 0) != stored.get(key, 0)
+    }
+
+
+@transaction.atomic
+def refresh_daily_occupancy(room_id, day):
+    """
+    Recomputes the rollup row of one room and day from its reservations.
+    Days without confirmed or pending reservations keep no row.
+    The prefix sums of the later rows of the room move by the change
+    in confirmed seconds. The caller (sync_room_days) holds the lock of
+    the day; the room is locked too when its prefix sums move.
+    """
+
+    grouped = (
+        Reservation.objects.filter(
+            room_id=room_id,
+            date=day,
+            status__in=[Reservation.Status.CONFIRMED, Reservation.Status.PENDING],
+        )
+        .order_by()
+        .values("status")
+        .annotate(minutes=Sum("duration_minutes"), count=Count("id"))
+    )
+
+    totals = {
+        Reservation.Status.CONFIRMED: [0, 0],
+        Reservation.Status.PENDING: [0, 0],
+    }
+
+    for group in grouped:
+        totals[group["status"]] = [(group["minutes"] or 0) * 60, group["count"]]
+
+    confirmed_seconds, confirmed_count = totals[Reservation.Status.CONFIRMED]
+    pending_seconds, pending_count = totals[Reservation.Status.PENDING]
+
+    existing = (
+        RoomDailyOccupancy.objects.filter(room_id=room_id, date=day)
+        .values_list("confirmed_seconds", flat=True)
+        .first()
+    )
+    previous_seconds = existing or 0
+    empty = confirmed_count == 0 and pending_count == 0
+    moves_prefix = confirmed_seconds != previous_seconds
+    if moves_prefix or (existing is None and not empty):
+        # Shifting the later rows or adding a row to the chain is serialized
+        # per room. Usually already locked by sync_room_days; then a no-op.
+        lock_rooms([room_id])
+    if moves_prefix:
+        RoomDailyOccupancy.objects.filter(room_id=room_id, date__gt=day).update(
+            confirmed_seconds_to_date=F("confirmed_seconds_to_date")
+            + (confirmed_seconds - previous_seconds)
+        )
+
+    if empty:
+        RoomDailyOccupancy.objects.filter(room_id=room_id, date=day).delete()
+        return None
+
+    defaults = {
+        "confirmed_seconds": confirmed_seconds,
+        "pending_seconds": pending_seconds,
+        "confirmed_count": confirmed_count,
+        "pending_count": pending_count,
+    }
+    if moves_prefix or existing is None:
+        # Otherwise the stored prefix sum is still right
+        defaults["confirmed_seconds_to_date"] = (
+            confirmed_seconds_through(room_id, day - timedelta(days=1))
+            + confirmed_seconds
+        )
+    rollup, _ = RoomDailyOccupancy.objects.update_or_create(
+        room_id=room_id, date=day, defaults=defaults
+    )
+    return rollup
+
+
+@transaction.atomic
+def rebuild_daily_occupancy(start_date=None, end_date=None):
+    """
+    Rebuilds the rollup table (or a date range of it) from scratch
+    with one grouped aggregate. Returns the number of rows written.
+    """
+
+    rollups = RoomDailyOccupancy.objects.all()
+    reservations = Reservation.objects.filter(
+        status__in=[Reservation.Status.CONFIRMED, Reservation.Status.PENDING]
+    )
+
+    if start_date:
+        rollups = rollups.filter(date__gte=start_date)
+        reservations = reservations.filter(date__gte=start_date)
+    if end_date:
+        rollups = rollups.filter(date__lte=end_date)
+        reservations = reservations.filter(date__lte=end_date)
+
+    rollups.delete()
+
+    grouped = (
+        reservations.order_by()
+        .values("room_id", "date", "status")
+        .annotate(minutes=Sum("duration_minutes"), count=Count("id"))
+    )
+
+    rows = {}
+
+    for group in grouped:
+        rollup = rows.setdefault(
+            (group["room_id"], group["date"]),
+            RoomDailyOccupancy(room_id=group["room_id"], date=group["date"]),
+        )
+        seconds = (group["minutes"] or 0) * 60
+
+        if group["status"] == Reservation.Status.CONFIRMED:
+            rollup.confirmed_seconds = seconds
+            rollup.confirmed_count = group["count"]
+        else:
+            rollup.pending_seconds = seconds
+            rollup.pending_count = group["count"]
+
+    RoomDailyOccupancy.objects.bulk_create(rows.values(), batch_size=500)
+    # Rows after the range carry the sums of the rebuilt days too
+    rebuild_occupancy_prefix()
+
+    return len(rows)
+
+
+@transaction.atomic
+def rebuild_occupancy_prefix():
+    """
+    Recomputes confirmed_seconds_to_date of every rollup row with one
+    ordered pass per room. Returns the number of rows that changed.
+    """
+
+    running = {}
+    changed = []
+    count = 0
+
+    rows = RoomDailyOccupancy.objects.order_by("room_id", "date").only(
+        "id", "room_id", "confirmed_seconds", "confirmed_seconds_to_date"
+    )
+    for rollup in rows.iterator(chunk_size=2000):
+        total = running.get(rollup.room_id, 0) + rollup.confirmed_seconds
+        running[rollup.room_id] = total
+        if rollup.confirmed_seconds_to_date != total:
+            rollup.confirmed_seconds_to_date = total
+            changed.append(rollup)
+        if len(changed) >= 500:
+            RoomDailyOccupancy.objects.bulk_update(changed, ["confirmed_seconds_to_date"])
+            count += len(changed)
+            changed = []
+
+    RoomDailyOccupancy.objects.bulk_update(changed, ["confirmed_seconds_to_date"])
+    return count + len(changed)
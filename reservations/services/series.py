@@ -0,0 +1,201 @@
+import calendar
+from datetime import timedelta
+
+from django.core.exceptions import PermissionDenied
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from reservations.models import Reservation, ReservationSeries, effectively_active_q
+from reservations.services.reservations import (
+    ReservationOverlapError,
+    validate_duration,
+)
+from reservations.services.expiry import expire_lapsed_holds
+from reservations.services.ledger import claim_slots
+from reservations.services.sync import sync_room_days
+from reservations.slots import slot_columns
+
+SERIES_MAX_OCCURRENCES = 104
+
+
+def expand_occurrences(*, frequency, start_date, until=None, count=None):
+    """
+    Dates of a series, in order. Monthly series repeat on the same day
+    of the month and skip the months that do not have it.
+    """
+
+    if (until is None) == (count is None):
+        raise ValueError("A series needs either until or count")
+    if count is not None and count < 1:
+        raise ValueError("count must be at least 1")
+
+    dates = []
+    step = 0
+
+    while True:
+        if frequency == ReservationSeries.Frequency.MONTHLY:
+            month_index = start_date.month - 1 + step
+            year = start_date.year + month_index // 12
+            month = month_index % 12 + 1
+            step += 1
+            if start_date.day > calendar.monthrange(year, month)[1]:
+                continue
+            current = start_date.replace(year=year, month=month)
+        elif frequency == ReservationSeries.Frequency.BIWEEKLY:
+            current = start_date + timedelta(weeks=2 * step)
+            step += 1
+        elif frequency == ReservationSeries.Frequency.WEEKLY:
+            current = start_date + timedelta(weeks=step)
+            step += 1
+        else:
+            raise ValueError("Invalid frequency")
+
+        if until is not None and current > until:
+            break
+        # Same limit whether the series ends by count or by date
+        if len(dates) == SERIES_MAX_OCCURRENCES:
+            raise ValueError(
+                f"A series is limited to {SERIES_MAX_OCCURRENCES} occurrences"
+            )
+        dates.append(current)
+        if count is not None and len(dates) == count:
+            break
+
+    return dates
+
+
+def _conflicting_dates(room, dates, start_time, end_time, now):
+    """
+    Sweeps the active reservations of the whole series range, fetched with
+    one ordered query, against the occurrence dates.
+    """
+
+    start_slot, end_slot, _ = slot_columns(start_time, end_time)
+    existing = list(
+        Reservation.objects.filter(
+            effectively_active_q(now),
+            room=room,
+            date__range=(dates[0], dates[-1]),
+        )
+        .order_by("date", "start_slot")
+        .values_list("date", "start_slot", "end_slot")
+    )
+
+    conflicts = set()
+    position = 0
+
+    for current in dates:
+        while position < len(existing) and existing[position][0] < current:
+            position += 1
+
+        cursor = position
+        while cursor < len(existing) and existing[cursor][0] == current:
+            _, start, end = existing[cursor]
+            if start < end_slot and end > start_slot:
+                conflicts.add(current)
+                break
+            cursor += 1
+
+    return conflicts
+
+
+@transaction.atomic
+def create_reservation_series(
+    *, user, room, frequency, start_date, start_time, end_time, until=None, count=None
+):
+    """
+    Creates a recurring series and every occurrence that does not collide
+    with an active reservation, with one conflict query and one bulk insert.
+
+    Output: (series, created reservations, conflicting dates)
+    """
+
+    if start_date < timezone.localdate():
+        raise ValueError("Cannot reserve in the past")
+    validate_duration(start_date, start_time, end_time)
+
+    dates = expand_occurrences(
+        frequency=frequency, start_date=start_date, until=until, count=count
+    )
+    if not dates:
+        raise ValueError("The series has no occurrences")
+
+    now = timezone.now()
+    # Lapsed holds of the range give their ledger slots back first
+    expire_lapsed_holds(now, room=room, date__range=(dates[0], dates[-1]))
+    conflicts = _conflicting_dates(room, dates, start_time, end_time, now)
+    free_dates = [current for current in dates if current not in conflicts]
+
+    if not free_dates:
+        raise ReservationOverlapError("Every occurrence is already booked")
+
+    series = ReservationSeries.objects.create(
+        user=user,
+        room=room,
+        frequency=frequency,
+        start_date=start_date,
+        start_time=start_time,
+        end_time=end_time,
+        until=until,
+        count=count,
+    )
+
+    expires_at = now + timedelta(minutes=10)
+    reservations = [
+        Reservation(
+            series=series,
+            room=room,
+            date=current,
+            start_time=start_time,
+            end_time=end_time,
+            status=Reservation.Status.PENDING,
+            user=user,
+            expires_at=expires_at,
+        )
+        for current in free_dates
+    ]
+    # bulk_create skips save(), so fill the slot columns here
+    for reservation in reservations:
+        reservation.set_slot_columns()
+    created = Reservation.objects.bulk_create(reservations)
+    # bulk_create skips the post_save signal, so claim the slots and sync
+    # the touched days here.
+    try:
+        claim_slots(created)
+    except IntegrityError:
+        # Another transaction booked one of the slots after our check
+        raise ReservationOverlapError("Time slot already booked")
+    sync_room_days((room.id, current) for current in free_dates)
+
+    return series, created, sorted(conflicts)
+
+
+@transaction.atomic
+def confirm_series(*, series, user):
+    """
+    Confirms every pending, still valid occurrence of a series with one update.
+    Returns the number of confirmed reservations.
+    """
+
+    if series.user != user:
+        raise PermissionDenied("You cannot confirm this series")
+
+    now = timezone.now()
+    pending = Reservation.objects.filter(
+        series=series,
+        status=Reservation.Status.PENDING,
+        date__gte=timezone.localdate(),
+        expires_at__gt=now,
+    )
+
+    # .update() skips the post_save signal, so sync the touched days here
+    room_days = set(pending.values_list("room_id", "date"))
+    count = pending.update(
+        status=Reservation.Status.CONFIRMED,
+        confirmed_at=now,
+        expires_at=None,
+        updated_at=now,
+    )
+    sync_room_days(room_days)
+
+    return count
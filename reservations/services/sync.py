@@ -0,0 +1,34 @@
+from django.db import transaction
+
+from reservations.services.availability import lock_room_day, refresh_availability
+from reservations.services.ledger import release_inactive_slots
+from reservations.services.rollups import (
+    lock_rooms,
+    refresh_daily_occupancy,
+    rooms_moving_prefix_sums,
+)
+
+
+@transaction.atomic
+def sync_room_days(room_days):
+    """
+    Refreshes everything derived from the reservations of the given
+    (room_id, date) pairs. Call it inside the transaction that changed them.
+
+    Every room/day is locked before anything is read from it, so two
+    transactions syncing the same day run one after the other and the
+    second one sees what the first one committed. The whole room is only
+    locked when its prefix sums move (confirmed seconds change, or a day
+    gets its first rollup row); pending holds on a busy day do not wait
+    for other days of the room. Rooms are locked before days, both in a
+    fixed order, so concurrent syncs cannot deadlock.
+    """
+
+    room_days = sorted(set(room_days))
+    lock_rooms(rooms_moving_prefix_sums(room_days))
+    for room_id, day in room_days:
+        lock_room_day(room_id, day)
+    for room_id, day in room_days:
+        release_inactive_slots(room_id, day)
+        refresh_daily_occupancy(room_id, day)
+        refresh_availability(room_id, day)
@@ -0,0 +1,55 @@
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+
+from reservations.models import ACTIVE_STATUSES, Reservation, ReservationSlot
+from reservations.services.ledger import claim_slots
+from reservations.services.sync import sync_room_days
+
+# Keep the derived tables in sync with every reservation saved through the ORM.
+# Queryset .update() and bulk_create() skip these signals, so those paths
+# call claim_slots() and sync_room_days() themselves.
+
+
+def _claim_key(instance):
+    return (
+        instance.room_id,
+        instance.date,
+        instance.start_time,
+        instance.end_time,
+        instance.status in ACTIVE_STATUSES,
+    )
+
+
+TRACKED_FIELDS = {"room_id", "date", "start_time", "end_time", "status"}
+
+
+@receiver(post_init, sender=Reservation)
+def remember_synced_state(sender, instance, **kwargs):
+    # Reading a deferred field would cost one query per loaded instance
+    if TRACKED_FIELDS & instance.get_deferred_fields():
+        instance._synced_room_day = (None, None)
+        instance._claimed = None
+        return
+    instance._synced_room_day = (instance.room_id, instance.date)
+    instance._claimed = _claim_key(instance) if instance.pk else None
+
+
+@receiver(post_save, sender=Reservation)
+def sync_saved_reservation(sender, instance, created, **kwargs):
+    claim = _claim_key(instance)
+    if claim[-1] and claim != instance._claimed:
+        # Raises IntegrityError when the slots are already taken
+        ReservationSlot.objects.filter(reservation=instance).delete()
+        claim_slots([instance])
+    instance._claimed = claim
+
+    room_days = {(instance.room_id, instance.date)}
+    if instance._synced_room_day[0] is not None:
+        room_days.add(instance._synced_room_day)
+    sync_room_days(room_days)
+    instance._synced_room_day = (instance.room_id, instance.date)
+
+
+@receiver(post_delete, sender=Reservation)
+def sync_deleted_reservation(sender, instance, **kwargs):
+    sync_room_days({(instance.room_id, instance.date)})
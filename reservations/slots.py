@@ -0,0 +1,98 @@
+from datetime import time
+
+from django.conf import settings
+
+# Reservations are booked on a grid of 30-minute slots. The availability
+# index counts slots from COWORKING_OPENING_HOUR and represents a day of a
+# room as an integer where bit N is set when slot N is taken.
+
+SLOT_MINUTES = 30
+
+
+def day_slot_count():
+    return (
+        (settings.COWORKING_CLOSING_HOUR - settings.COWORKING_OPENING_HOUR)
+        * 60
+        // SLOT_MINUTES
+    )
+
+
+def slot_span(start_time, end_time):
+    """
+    Returns (first_slot, end_slot) for a time range that sits exactly on
+    the slot grid inside opening hours, or None when it does not.
+    """
+
+    if start_time.second or start_time.microsecond:
+        return None
+    if end_time.second or end_time.microsecond:
+        return None
+
+    opening = settings.COWORKING_OPENING_HOUR * 60
+    start = start_time.hour * 60 + start_time.minute - opening
+    end = end_time.hour * 60 + end_time.minute - opening
+
+    if start < 0 or end > day_slot_count() * SLOT_MINUTES or start >= end:
+        return None
+    if start % SLOT_MINUTES or end % SLOT_MINUTES:
+        return None
+
+    return start // SLOT_MINUTES, end // SLOT_MINUTES
+
+
+def span_mask(first_slot, end_slot):
+    return ((1 << (end_slot - first_slot)) - 1) << first_slot
+
+
+def slot_time(index):
+    minutes = settings.COWORKING_OPENING_HOUR * 60 + index * SLOT_MINUTES
+    return time(minutes // 60, minutes % 60)
+
+
+def free_ranges(mask):
+    """
+    Splits a busy mask into the (start_time, end_time) ranges left free.
+    """
+
+    ranges = []
+    start = None
+
+    for index in range(day_slot_count()):
+        busy = mask >> index & 1
+        if not busy and start is None:
+            start = index
+        elif busy and start is not None:
+            ranges.append((slot_time(start), slot_time(index)))
+            start = None
+
+    if start is not None:
+        ranges.append((slot_time(start), slot_time(day_slot_count())))
+
+    return ranges
+
+
+def ledger_slots(start_time, end_time):
+    """
+    Slot numbers counted from midnight that a time range touches. Ranges
+    off the grid take every slot they overlap, even partially.
+    """
+
+    start = start_time.hour * 60 + start_time.minute
+    end = end_time.hour * 60 + end_time.minute
+    if end_time.second or end_time.microsecond:
+        end += 1
+
+    return range(start // SLOT_MINUTES, -(-end // SLOT_MINUTES))
+
+
+def slot_columns(start_time, end_time):
+    """
+    (start_slot, end_slot, duration_minutes) stored on a reservation, so
+    interval math runs on integers. The slots are the ledger_slots range.
+    """
+
+    slots = ledger_slots(start_time, end_time)
+    duration = (end_time.hour * 60 + end_time.minute) - (
+        start_time.hour * 60 + start_time.minute
+    )
+    return slots.start, slots.stop, duration
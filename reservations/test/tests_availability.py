@@ -0,0 +1,335 @@
+import uuid
+from datetime import time, timedelta
+from reservations.services.availability_cache import (
+    availability_cache_stats,
+    reset_availability_cache_stats,
+)
+from reservations.services.reservations import (
+    cached_available_slots,
+    create_reservation_service,
+    expire_pending_reservations,
+    find_free_rooms,
+    get_available_slots,
+)
+from django.core.cache import cache
+from reservations.models import Reservation, RoomDayAvailability
+from django.test import TestCase, override_settings
+from rooms.models import Room
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+from unittest import mock
+
+User = get_user_model()
+
+
+class AvailabilityIndexTest(TestCase):
+    def setUp(self):
+        self.room = Room.objects.create(
+            name="Sala Pong",
+            max_capacity=10,
+        )
+        self.user = User.objects.create_user(
+            username="test",
+            password="1234",
+        )
+        self.date = timezone.localdate() + timedelta(days=1)
+
+    def create(self, start, end):
+        return create_reservation_service(
+            idempotency_key=uuid.uuid4(),
+            room=self.room,
+            date=self.date,
+            start_time=start,
+            end_time=end,
+            user=self.user,
+        )
+
+    def test_index_tracks_reservations(self):
+        self.create(time(9, 0), time(10, 0))
+        Reservation.objects.create(
+            room=self.room,
+            date=self.date,
+            start_time=time(13, 0),
+            end_time=time(14, 30),
+            status=Reservation.Status.CONFIRMED,
+        )
+
+        index = RoomDayAvailability.objects.get(room=self.room, date=self.date)
+        # slots are counted from 08:00 in 30 minute steps
+        self.assertEqual(index.pending_mask, 0b1100)
+        self.assertEqual(index.confirmed_mask, 0b111 << 10)
+        self.assertTrue(index.exact)
+
+    def test_available_slots_from_index(self):
+        self.create(time(9, 0), time(10, 0))
+
+        with self.assertNumQueries(1):
+            slots = get_available_slots(room=self.room, date=self.date)
+
+        self.assertNotIn((time(9, 0), time(9, 30)), slots)
+        self.assertNotIn((time(9, 30), time(10, 0)), slots)
+        self.assertIn((time(8, 0), time(8, 30)), slots)
+        self.assertIn((time(10, 0), time(10, 30)), slots)
+        self.assertEqual(slots[-1], (time(17, 0), time(17, 30)))
+
+    def test_off_grid_reservation_falls_back_to_reservations(self):
+        Reservation.objects.create(
+            room=self.room,
+            date=self.date,
+            start_time=time(9, 15),
+            end_time=time(10, 15),
+            status=Reservation.Status.CONFIRMED,
+        )
+
+        self.assertFalse(
+            RoomDayAvailability.objects.get(room=self.room, date=self.date).exact
+        )
+        self.assertNotIn(
+            self.room,
+            find_free_rooms(date=self.date, start_time=time(10, 0), end_time=time(11, 0)),
+        )
+        slots = get_available_slots(room=self.room, date=self.date)
+        self.assertIn((time(10, 15), time(10, 45)), slots)
+
+    def test_lapsed_hold_is_free_in_listing(self):
+        reservation = self.create(time(9, 0), time(10, 0))
+        Reservation.objects.filter(id=reservation.id).update(
+            expires_at=timezone.now() - timedelta(minutes=1)
+        )
+        RoomDayAvailability.objects.filter(room=self.room).update(
+            next_expiry=timezone.now() - timedelta(minutes=1)
+        )
+
+        slots = get_available_slots(room=self.room, date=self.date)
+
+        self.assertIn((time(9, 0), time(9, 30)), slots)
+
+    def test_cancel_clears_index(self):
+        reservation = self.create(time(9, 0), time(10, 0))
+
+        self.client.login(username="test", password="1234")
+        self.client.delete(f"/api/reservations/{reservation.id}/")
+
+        self.assertFalse(RoomDayAvailability.objects.exists())
+
+
+class FreeRoomsAPITest(TestCase):
+    def setUp(self):
+        self.pong = Room.objects.create(name="Sala Pong", max_capacity=10)
+        self.pacman = Room.objects.create(name="Sala Pac-Man", max_capacity=4)
+        self.mario = Room.objects.create(name="Sala Super Mario", max_capacity=12)
+        self.closed = Room.objects.create(
+            name="Sala Tetris", max_capacity=20, is_active=False
+        )
+        self.url = "/api/availability/rooms/"
+        self.user = User.objects.create_user(
+            username="test",
+            password="1234",
+        )
+        self.date = timezone.localdate() + timedelta(days=1)
+
+        Reservation.objects.create(
+            room=self.pong,
+            date=self.date,
+            start_time=time(11, 0),
+            end_time=time(12, 0),
+            status=Reservation.Status.CONFIRMED,
+        )
+        Reservation.objects.create(
+            room=self.mario,
+            date=self.date,
+            start_time=time(9, 0),
+            end_time=time(10, 0),
+            status=Reservation.Status.CANCELLED,
+        )
+
+    def get(self, **params):
+        params.setdefault("date", str(self.date))
+        params.setdefault("start_time", "10:00")
+        params.setdefault("end_time", "12:00")
+        return self.client.get(self.url, params)
+
+    def test_unauthenticated_returns_401(self):
+        self.assertEqual(self.get().status_code, 401)
+
+    def test_returns_active_free_rooms(self):
+        self.client.login(username="test", password="1234")
+
+        with self.assertNumQueries(3):  # session, user, rooms
+            response = self.get()
+
+        self.assertEqual(response.status_code, 200)
+        names = [room["name"] for room in response.json()["rooms"]]
+        self.assertEqual(names, ["Sala Pac-Man", "Sala Super Mario"])
+
+    def test_min_capacity_filter(self):
+        self.client.login(username="test", password="1234")
+
+        response = self.get(min_capacity="8")
+
+        names = [room["name"] for room in response.json()["rooms"]]
+        self.assertEqual(names, ["Sala Super Mario"])
+
+    def test_invalid_window_returns_400(self):
+        self.client.login(username="test", password="1234")
+
+        self.assertEqual(self.get(start_time="12:00").status_code, 400)
+        self.assertEqual(self.get(min_capacity="many").status_code, 400)
+
+
+class AvailabilityGridAPITest(TestCase):
+    def setUp(self):
+        self.pong = Room.objects.create(name="Sala Pong", max_capacity=10)
+        self.pacman = Room.objects.create(name="Sala Pac-Man", max_capacity=4)
+        self.url = "/api/availability/grid/"
+        self.user = User.objects.create_user(
+            username="test",
+            password="1234",
+        )
+        self.date = timezone.localdate() + timedelta(days=1)
+
+        Reservation.objects.create(
+            room=self.pong,
+            date=self.date,
+            start_time=time(9, 0),
+            end_time=time(10, 0),
+            status=Reservation.Status.CONFIRMED,
+        )
+
+    def test_grid_matches_single_day_availability(self):
+        self.client.login(username="test", password="1234")
+        end = self.date + timedelta(days=6)
+
+        response = self.client.get(
+            self.url, {"start": str(self.date), "end": str(end)}
+        )
+
+        self.assertEqual(response.status_code, 200)
+        rooms = {room["id"]: room for room in response.json()["rooms"]}
+        self.assertEqual(len(rooms[self.pong.id]["days"]), 7)
+        for room in (self.pong, self.pacman):
+            expected = [
+                [start.strftime("%H:%M"), end.strftime("%H:%M")]
+                for start, end in get_available_slots(room=room, date=self.date)
+            ]
+            self.assertEqual(rooms[room.id]["days"][str(self.date)], expected)
+
+    def test_grid_query_count_is_flat(self):
+        self.client.login(username="test", password="1234")
+
+        # session, user, rooms, reservations
+        with self.assertNumQueries(4):
+            self.client.get(
+                self.url,
+                {"start": str(self.date), "end": str(self.date + timedelta(days=30))},
+            )
+
+    def test_room_subset_and_limits(self):
+        self.client.login(username="test", password="1234")
+
+        response = self.client.get(
+            self.url,
+            {"start": str(self.date), "end": str(self.date), "room_ids": str(self.pacman.id)},
+        )
+        self.assertEqual([r["id"] for r in response.json()["rooms"]], [self.pacman.id])
+
+        response = self.client.get(
+            self.url,
+            {"start": str(self.date), "end": str(self.date + timedelta(days=90))},
+        )
+        self.assertEqual(response.status_code, 400)
+
+
+class AvailabilityCacheTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.room = Room.objects.create(
+            name="Sala Pong",
+            max_capacity=10,
+        )
+        self.user = User.objects.create_user(
+            username="test",
+            password="1234",
+        )
+        self.date = timezone.localdate() + timedelta(days=1)
+
+    def slots(self):
+        return cached_available_slots(room=self.room, date=self.date)
+
+    def create(self, start, end):
+        return create_reservation_service(
+            idempotency_key=uuid.uuid4(),
+            room=self.room,
+            date=self.date,
+            start_time=start,
+            end_time=end,
+            user=self.user,
+        )
+
+    def test_second_read_is_a_hit_with_one_version_query(self):
+        first = self.slots()
+
+        with self.assertNumQueries(1):
+            self.assertEqual(self.slots(), first)
+
+        self.assertEqual(availability_cache_stats()["hits"], 1)
+        self.assertEqual(availability_cache_stats()["misses"], 1)
+
+    def test_every_write_invalidates(self):
+        self.slots()
+        reservation = self.create(time(9, 0), time(10, 0))
+        self.assertNotIn((time(9, 0), time(9, 30)), self.slots())
+
+        reservation.status = Reservation.Status.CANCELLED
+        reservation.save()
+        self.assertIn((time(9, 0), time(9, 30)), self.slots())
+
+        # Back to the empty day of the first read, whose entry is valid again
+        self.assertEqual(availability_cache_stats()["hits"], 1)
+        self.assertEqual(availability_cache_stats()["misses"], 2)
+        self.assertEqual(self.slots(), get_available_slots(room=self.room, date=self.date))
+
+    def test_expiry_sweep_invalidates(self):
+        reservation = self.create(time(9, 0), time(10, 0))
+        self.slots()
+        Reservation.objects.filter(pk=reservation.pk).update(
+            expires_at=timezone.now() - timedelta(minutes=1)
+        )
+
+        expire_pending_reservations()
+
+        self.assertIn((time(9, 0), time(9, 30)), self.slots())
+
+    def test_entry_lapses_with_the_first_hold(self):
+        self.create(time(9, 0), time(10, 0))
+        self.assertNotIn((time(9, 0), time(9, 30)), self.slots())
+
+        later = timezone.now() + timedelta(minutes=11)
+        with mock.patch("django.utils.timezone.now", return_value=later):
+            self.assertIn((time(9, 0), time(9, 30)), self.slots())
+
+    @override_settings(
+        CACHES={"default": {"BACKEND": "django.core.cache.backends.dummy.DummyCache"}}
+    )
+    def test_counters_never_break_a_request(self):
+        # The dummy cache keeps no counter, as after an eviction
+        self.client.login(username="test", password="1234")
+        response = self.client.get(
+            f"/api/availability/?room_id={self.room.id}&date={self.date.isoformat()}"
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(availability_cache_stats()["misses"], 0)
+
+    def test_stats_endpoint_is_staff_only(self):
+        reset_availability_cache_stats()
+        self.client.login(username="test", password="1234")
+        self.assertEqual(
+            self.client.get("/api/availability/cache-stats/").status_code, 403
+        )
+
+        self.user.is_staff = True
+        self.user.save()
+        response = self.client.get("/api/availability/cache-stats/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {"hits": 0, "misses": 0, "hit_rate": 0})
@@ -0,0 +1,159 @@
+import json
+import uuid
+from datetime import time, timedelta
+from reservations.models import Reservation, RoomDayAvailability
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rooms.models import Room
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+
+User = get_user_model()
+
+
+class BulkReservationAPITest(TestCase):
+    def setUp(self):
+        self.room = Room.objects.create(
+            name="Sala Pong",
+            max_capacity=10,
+        )
+        self.other_room = Room.objects.create(
+            name="Sala Pac-Man",
+            max_capacity=6,
+        )
+        self.url = "/api/reservations/bulk/"
+        self.user = User.objects.create_user(
+            username="test",
+            password="1234",
+        )
+        self.date = timezone.localdate() + timedelta(days=1)
+
+        Reservation.objects.create(
+            room=self.room,
+            date=self.date,
+            start_time=time(9, 0),
+            end_time=time(10, 0),
+            status=Reservation.Status.CONFIRMED,
+        )
+
+    def item(self, start, end, room=None, key=None):
+        return {
+            "idempotency_key": key or str(uuid.uuid4()),
+            "room_id": (room or self.room).id,
+            "date": str(self.date),
+            "start_time": start,
+            "end_time": end,
+        }
+
+    def post(self, items, mode=None):
+        payload = {"reservations": items}
+        if mode:
+            payload["mode"] = mode
+        return self.client.post(
+            self.url,
+            data=json.dumps(payload),
+            content_type="application/json",
+        )
+
+    def statuses(self, response):
+        return [result["status"] for result in response.json()["results"]]
+
+    def test_unauthenticated_returns_401(self):
+        response = self.post([self.item("10:00", "11:00")])
+        self.assertEqual(response.status_code, 401)
+
+    def test_best_effort_reports_each_item(self):
+        self.client.login(username="test", password="1234")
+        key = str(uuid.uuid4())
+
+        response = self.post(
+            [
+                self.item("10:00", "11:00", key=key),
+                self.item("09:30", "10:30"),  # conflicts with the database
+                self.item("10:30", "11:30"),  # conflicts with the first item
+                self.item("12:00", "12:30"),  # too short
+                self.item("10:00", "11:00", key=key),
+                self.item("10:00", "11:00", room=self.other_room),
+            ],
+            mode="best_effort",
+        )
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(
+            self.statuses(response),
+            ["created", "conflict", "conflict", "invalid", "duplicate", "created"],
+        )
+        self.assertEqual(Reservation.objects.count(), 3)
+        self.assertTrue(
+            RoomDayAvailability.objects.filter(room=self.other_room).exists()
+        )
+
+    def test_all_or_nothing_aborts_on_conflict(self):
+        self.client.login(username="test", password="1234")
+
+        response = self.post(
+            [self.item("10:00", "11:00"), self.item("09:00", "10:00")],
+        )
+
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(self.statuses(response), ["aborted", "conflict"])
+        self.assertEqual(Reservation.objects.count(), 1)
+
+    def test_replayed_batch_is_duplicate(self):
+        self.client.login(username="test", password="1234")
+        items = [self.item("10:00", "11:00"), self.item("11:00", "12:00")]
+
+        self.assertEqual(self.post(items).status_code, 201)
+        response = self.post(items)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.statuses(response), ["duplicate", "duplicate"])
+        self.assertEqual(Reservation.objects.count(), 3)
+
+    def test_another_users_key_is_invalid(self):
+        other = User.objects.create_user(username="other", password="1234")
+        foreign = Reservation.objects.create(
+            room=self.other_room,
+            user=other,
+            date=self.date,
+            start_time=time(15, 0),
+            end_time=time(16, 0),
+            status=Reservation.Status.CONFIRMED,
+        )
+        self.client.login(username="test", password="1234")
+
+        response = self.post(
+            [
+                self.item("10:00", "11:00", key=str(foreign.idempotency_key)),
+                self.item("11:00", "12:00"),
+            ],
+            mode="best_effort",
+        )
+
+        self.assertEqual(response.status_code, 201)
+        first = response.json()["results"][0]
+        self.assertEqual(first["status"], "invalid")
+        self.assertEqual(first["error"], "idempotency_key already used")
+        self.assertIsNone(first["reservation"])
+        self.assertEqual(Reservation.objects.filter(user=self.user).count(), 1)
+
+    def test_query_count_does_not_grow_with_batch_size(self):
+        self.client.login(username="test", password="1234")
+
+        def count_queries(hours):
+            items = [
+                self.item(f"{hour}:00", f"{hour + 1}:00", room=self.other_room)
+                for hour in hours
+            ]
+            with CaptureQueriesContext(connection) as queries:
+                response = self.post(items)
+            self.assertEqual(self.statuses(response), ["created"] * len(items))
+            return len(queries)
+
+        self.date += timedelta(days=1)
+        small = count_queries(range(10, 12))
+        self.date += timedelta(days=1)
+        large = count_queries(range(10, 17))
+
+        self.assertEqual(small, large)
@@ -0,0 +1,177 @@
+import uuid
+from unittest import mock
+from datetime import time, timedelta
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from reservations.services.availability_cache import slots_entry_key
+from reservations.services.expiry import expire_lapsed_holds
+from reservations.services.reservations import create_reservation_service
+from reservations.models import Reservation
+from rooms.models import Room
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+
+User = get_user_model()
+
+
+class ConditionalGetTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.room = Room.objects.create(
+            name="Sala Pong",
+            max_capacity=10,
+        )
+        self.user = User.objects.create_user(
+            username="test",
+            password="1234",
+        )
+        self.client.login(username="test", password="1234")
+        self.date = timezone.localdate() + timedelta(days=1)
+        self.availability_url = (
+            f"/api/availability/?room_id={self.room.id}&date={self.date.isoformat()}"
+        )
+
+    def create(self, start, end):
+        return create_reservation_service(
+            idempotency_key=uuid.uuid4(),
+            room=self.room,
+            date=self.date,
+            start_time=start,
+            end_time=end,
+            user=self.user,
+        )
+
+    def test_availability_answers_304_from_the_cache(self):
+        response = self.client.get(self.availability_url)
+        etag = response["ETag"]
+
+        with CaptureQueriesContext(connection) as queries:
+            revalidated = self.client.get(self.availability_url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(revalidated.status_code, 304)
+        self.assertEqual(revalidated["ETag"], etag)
+        self.assertFalse(
+            any("reservations_reservation" in q["sql"] for q in queries.captured_queries)
+        )
+
+    def test_availability_etag_changes_after_a_write(self):
+        etag = self.client.get(self.availability_url)["ETag"]
+        self.create(time(9, 0), time(10, 0))
+
+        response = self.client.get(self.availability_url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_availability_is_not_tagged_when_a_write_lands_meanwhile(self):
+        # The version moves between the read before and after computing
+        with mock.patch(
+            "reservations.services.reservations.room_day_version", side_effect=[1, 2]
+        ):
+            response = self.client.get(self.availability_url)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn("ETag", response)
+        # Nothing was cached under the old version either
+        self.assertIsNone(cache.get(slots_entry_key(self.room.id, self.date, 30, 60, 1)))
+
+    def test_my_reservations_if_modified_since(self):
+        self.create(time(9, 0), time(10, 0))
+        # Last-Modified is only sent once the change's second is over
+        Reservation.objects.update(updated_at=timezone.now() - timedelta(minutes=1))
+        response = self.client.get("/api/my-reservations/")
+        last_modified = response["Last-Modified"]
+
+        with CaptureQueriesContext(connection) as queries:
+            revalidated = self.client.get(
+                "/api/my-reservations/", HTTP_IF_MODIFIED_SINCE=last_modified
+            )
+        self.assertEqual(revalidated.status_code, 304)
+        # Only the aggregate behind the validators, no rows are loaded
+        reservation_queries = [
+            q["sql"] for q in queries.captured_queries
+            if "reservations_reservation" in q["sql"]
+        ]
+        self.assertEqual(len(reservation_queries), 1)
+        self.assertIn("COUNT(", reservation_queries[0])
+
+        reservation = Reservation.objects.get()
+        reservation.status = Reservation.Status.CANCELLED
+        reservation.save()
+
+        response = self.client.get(
+            "/api/my-reservations/", HTTP_IF_MODIFIED_SINCE=last_modified
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["reservations"][0]["status"], "CANCELLED")
+
+    def test_my_reservations_if_none_match(self):
+        etag = self.client.get("/api/my-reservations/")["ETag"]
+
+        self.assertEqual(
+            self.client.get("/api/my-reservations/", HTTP_IF_NONE_MATCH=etag).status_code,
+            304,
+        )
+        self.create(time(9, 0), time(10, 0))
+        self.assertEqual(
+            self.client.get("/api/my-reservations/", HTTP_IF_NONE_MATCH=etag).status_code,
+            200,
+        )
+
+    def test_my_reservations_leaves_out_last_modified_in_the_same_second(self):
+        self.create(time(9, 0), time(10, 0))
+
+        response = self.client.get("/api/my-reservations/")
+
+        self.assertIn("ETag", response)
+        self.assertNotIn("Last-Modified", response)
+
+
+class ConditionalGetAcrossProcessesTest(TestCase):
+    """
+    A cron or daemon process writing the database must invalidate the
+    validators of the web workers, which share no memory with it. The
+    expiry below runs against a dummy cache, so nothing it does reaches
+    the cache the requests read, as with a cache local to another process.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.room = Room.objects.create(name="Sala Pong", max_capacity=10)
+        self.user = User.objects.create_user(username="test", password="1234")
+        self.client.login(username="test", password="1234")
+        self.date = timezone.localdate() + timedelta(days=1)
+        create_reservation_service(
+            idempotency_key=uuid.uuid4(),
+            room=self.room,
+            date=self.date,
+            start_time=time(9, 0),
+            end_time=time(10, 0),
+            user=self.user,
+        )
+
+    def expire_in_another_process(self):
+        dummy = {"default": {"BACKEND": "django.core.cache.backends.dummy.DummyCache"}}
+        with override_settings(CACHES=dummy):
+            expire_lapsed_holds(now=timezone.now() + timedelta(hours=1))
+
+    def test_expiry_changes_the_my_reservations_etag(self):
+        etag = self.client.get("/api/my-reservations/")["ETag"]
+
+        self.expire_in_another_process()
+
+        response = self.client.get("/api/my-reservations/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["reservations"][0]["status"], "EXPIRED")
+
+    def test_expiry_changes_the_availability_etag(self):
+        url = f"/api/availability/?room_id={self.room.id}&date={self.date.isoformat()}"
+        etag = self.client.get(url)["ETag"]
+
+        self.expire_in_another_process()
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
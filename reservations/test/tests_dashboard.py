@@ -0,0 +1,316 @@
+import time as clock
+from datetime import date, time, timedelta
+from unittest import mock
+from asgiref.sync import async_to_sync
+from reservations.services import dashboard
+from reservations.services.dashboard import dashboard_metrics, dashboard_metrics_concurrent
+from reservations.services.lifecycle import (
+    average_booking_duration,
+    average_booking_lead_time,
+    average_time_to_confirmation,
+    conversion_rate,
+    expiration_rate,
+    global_utilization,
+    total_reservations,
+)
+from reservations.services.occupancy import most_used_time_slot, peak_day, room_heatmap
+from reservations.services.ranking import (
+    best_performing_room,
+    top_3_rooms,
+    total_hours_per_room,
+    utilization_percentage_per_room,
+)
+from reservations.models import Reservation
+from django.db import OperationalError, connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from rooms.models import Room
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.utils import timezone
+
+User = get_user_model()
+
+
+class DashboardMetricsTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username="test",
+            password="1234",
+        )
+        self.pong = Room.objects.create(name="Sala Pong", max_capacity=10)
+        self.pacman = Room.objects.create(name="Sala Pac-Man", max_capacity=6)
+        self.mario = Room.objects.create(name="Sala Super Mario", max_capacity=8)
+        self.start = date(2026, 3, 1)
+        self.end = date(2026, 3, 31)
+
+        Reservation.objects.create(
+            room=self.pong,
+            user=self.user,
+            date=date(2026, 3, 10),
+            start_time=time(9, 0),
+            end_time=time(12, 0),
+            status=Reservation.Status.CONFIRMED,
+            confirmed_at=timezone.now() + timedelta(minutes=5),
+        )
+        Reservation.objects.create(
+            room=self.pacman,
+            user=self.user,
+            date=date(2026, 3, 11),
+            start_time=time(9, 0),
+            end_time=time(10, 0),
+            status=Reservation.Status.CONFIRMED,
+        )
+        Reservation.objects.create(
+            room=self.pacman,
+            user=self.user,
+            date=date(2026, 3, 12),
+            start_time=time(14, 0),
+            end_time=time(15, 30),
+            status=Reservation.Status.CONFIRMED,
+        )
+        Reservation.objects.create(
+            room=self.mario,
+            user=self.user,
+            date=date(2026, 3, 12),
+            start_time=time(10, 0),
+            end_time=time(11, 0),
+            status=Reservation.Status.EXPIRED,
+        )
+        Reservation.objects.create(
+            room=self.mario,
+            user=self.user,
+            date=date(2026, 3, 13),
+            start_time=time(10, 0),
+            end_time=time(11, 0),
+            status=Reservation.Status.CANCELLED,
+        )
+
+    def legacy_metrics(self, start_date, end_date):
+        top_rooms = top_3_rooms(start_date, end_date)
+        best_room = best_performing_room(start_date, end_date)
+        return {
+            "global_utilization_percentage": global_utilization(start_date, end_date),
+            "peak_day": peak_day(start_date.year, start_date.month),
+            "most_used_time_slot": most_used_time_slot(start_date, end_date),
+            "room_heatmap": room_heatmap(start_date, end_date),
+            "top_3_rooms": [{"id": room.id, "name": room.name} for room in top_rooms],
+            "total_reservations": total_reservations(start_date, end_date),
+            "conversion_rate": conversion_rate(start_date, end_date),
+            "expiration_rate": expiration_rate(start_date, end_date),
+            "avg_time_to_confirmation_seconds": average_time_to_confirmation(
+                start_date, end_date
+            ),
+            "avg_booking_duration_seconds": average_booking_duration(
+                start_date, end_date
+            ),
+            "avg_booking_lead_time_seconds": average_booking_lead_time(
+                start_date, end_date
+            ),
+            "total_hours_per_room": total_hours_per_room(start_date, end_date),
+            "utilization_per_room": utilization_percentage_per_room(
+                start_date, end_date
+            ),
+            "best_performing_room": {"id": best_room.id, "name": best_room.name},
+        }
+
+    def test_dashboard_matches_individual_metrics(self):
+        data = dashboard_metrics(self.start, self.end)
+        metrics = data["metrics"]
+        flat = {
+            **metrics["occupancy"],
+            **metrics["lifecycle"],
+            "total_hours_per_room": metrics["rooms"]["total_hours_per_room"],
+            "utilization_per_room": metrics["rooms"]["utilization_per_room"],
+            "best_performing_room": metrics["rooms"]["best_performing_room"],
+        }
+
+        expected = self.legacy_metrics(self.start, self.end)
+
+        self.assertEqual(set(flat), set(expected))
+        for key, value in expected.items():
+            if isinstance(value, float):
+                self.assertAlmostEqual(flat[key], value, places=6, msg=key)
+            else:
+                self.assertEqual(flat[key], value, msg=key)
+
+    def test_dashboard_period(self):
+        data = dashboard_metrics(self.start, self.end)
+        self.assertEqual(
+            data["period"], {"start": "2026-03-01", "end": "2026-03-31", "days": 31}
+        )
+
+    def test_dashboard_query_count_does_not_grow_with_data(self):
+        with self.assertNumQueries(4):
+            dashboard_metrics(self.start, self.end)
+
+        for day in range(1, 28):
+            Reservation.objects.create(
+                room=self.mario,
+                user=self.user,
+                date=date(2026, 3, day),
+                start_time=time(16, 0),
+                end_time=time(17, 0),
+                status=Reservation.Status.CONFIRMED,
+            )
+
+        with self.assertNumQueries(4):
+            dashboard_metrics(self.start, self.end)
+
+    def test_closed_days_are_served_from_the_day_cache(self):
+        data = dashboard_metrics(self.start, self.end)
+
+        # Only the day versions, rooms and the peak_day rollup are read again
+        with self.assertNumQueries(3):
+            self.assertEqual(dashboard_metrics(self.start, self.end), data)
+
+        # A sliding range reuses the days it shares with the first one
+        with self.assertNumQueries(4):
+            dashboard_metrics(self.start + timedelta(days=5), self.end + timedelta(days=5))
+
+    def test_write_to_a_closed_day_drops_its_partial(self):
+        dashboard_metrics(self.start, self.end)
+
+        Reservation.objects.create(
+            room=self.mario,
+            user=self.user,
+            date=date(2026, 3, 20),
+            start_time=time(16, 0),
+            end_time=time(18, 0),
+            status=Reservation.Status.CONFIRMED,
+        )
+
+        lifecycle = dashboard_metrics(self.start, self.end)["metrics"]["lifecycle"]
+        self.assertEqual(lifecycle["total_reservations"], 5)
+        self.assertEqual(
+            lifecycle["total_reservations"], total_reservations(self.start, self.end)
+        )
+
+    def test_write_from_another_process_changes_the_day_version(self):
+        dashboard_metrics(self.start, self.end)
+
+        # Nothing reaches this process's cache, as from a cron job or
+        # another worker with its own cache
+        dummy = {"default": {"BACKEND": "django.core.cache.backends.dummy.DummyCache"}}
+        with override_settings(CACHES=dummy):
+            reservation = Reservation.objects.get(room=self.pong)
+            reservation.status = Reservation.Status.CANCELLED
+            reservation.save()
+
+        lifecycle = dashboard_metrics(self.start, self.end)["metrics"]["lifecycle"]
+        self.assertEqual(lifecycle["conversion_rate"], conversion_rate(self.start, self.end))
+
+    def test_today_is_computed_live(self):
+        today = timezone.localdate()
+        dashboard_metrics(today, today)
+
+        Reservation.objects.filter(room=self.mario).update(date=today)
+
+        data = dashboard_metrics(today, today)
+        self.assertEqual(data["metrics"]["lifecycle"]["total_reservations"], 1)
+        self.assertEqual(data["metrics"]["lifecycle"]["expiration_rate"], 0.5)
+
+    def test_dashboard_without_rooms(self):
+        Reservation.objects.all().delete()
+        Room.objects.all().delete()
+
+        data = dashboard_metrics(self.start, self.end)
+
+        self.assertEqual(data["metrics"]["occupancy"]["global_utilization_percentage"], 0)
+        self.assertEqual(data["metrics"]["occupancy"]["top_3_rooms"], [])
+        self.assertIsNone(data["metrics"]["rooms"]["best_performing_room"])
+        self.assertEqual(
+            data["metrics"]["occupancy"]["peak_day"],
+            {"date": self.start, "occupancy_rate": 0.0},
+        )
+
+
+class ConcurrentDashboardTest(TransactionTestCase):
+    # Groups run on pool threads with their own connections, so the data
+    # has to be committed for them to see it
+
+    def setUp(self):
+        cache.clear()
+        user = User.objects.create_user(
+            username="test",
+            password="1234",
+        )
+        self.pong = Room.objects.create(name="Sala Pong", max_capacity=10)
+        self.pacman = Room.objects.create(name="Sala Pac-Man", max_capacity=6)
+        self.start = date(2026, 3, 1)
+        self.end = date(2026, 3, 31)
+        for room, day, status in [
+            (self.pong, 10, Reservation.Status.CONFIRMED),
+            (self.pacman, 11, Reservation.Status.CONFIRMED),
+            (self.pacman, 12, Reservation.Status.EXPIRED),
+        ]:
+            Reservation.objects.create(
+                room=room,
+                user=user,
+                date=date(2026, 3, day),
+                start_time=time(9, 0),
+                end_time=time(11, 0),
+                status=status,
+            )
+
+    def test_concurrent_dashboard_matches_sequential(self):
+        data = async_to_sync(dashboard_metrics_concurrent)(self.start, self.end)
+
+        self.assertFalse(data.pop("partial"))
+        self.assertEqual(data.pop("errors"), {})
+        self.assertEqual(data, dashboard_metrics(self.start, self.end))
+
+    @override_settings(DASHBOARD_METRIC_TIMEOUT=0.5)
+    def test_slow_group_returns_partial_results(self):
+        def slow_peak_day(start_date, end_date):
+            clock.sleep(2)
+
+        groups = {**dashboard.DASHBOARD_GROUPS, "peak_day": slow_peak_day}
+        with mock.patch.dict(dashboard.DASHBOARD_GROUPS, groups):
+            started = clock.monotonic()
+            data = async_to_sync(dashboard_metrics_concurrent)(self.start, self.end)
+            elapsed = clock.monotonic() - started
+
+        self.assertLess(elapsed, 1.5)
+        self.assertTrue(data["partial"])
+        self.assertEqual(data["errors"], {"peak_day": "timeout"})
+        self.assertIsNone(data["metrics"]["occupancy"]["peak_day"])
+        self.assertEqual(data["metrics"]["lifecycle"]["total_reservations"], 2)
+
+    @override_settings(DASHBOARD_METRIC_TIMEOUT=0.5)
+    def test_timed_out_query_frees_its_pool_thread(self):
+        outcome = []
+
+        def stuck_peak_day(start_date, end_date):
+            try:
+                with connection.cursor() as cursor:
+                    cursor.execute(
+                        "WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n)"
+                        " SELECT count(*) FROM n"
+                    )
+            except Exception as error:
+                outcome.append(error)
+                raise
+
+        groups = {**dashboard.DASHBOARD_GROUPS, "peak_day": stuck_peak_day}
+        with mock.patch.dict(dashboard.DASHBOARD_GROUPS, groups):
+            data = async_to_sync(dashboard_metrics_concurrent)(self.start, self.end)
+
+            deadline = clock.monotonic() + 2
+            while not outcome and clock.monotonic() < deadline:
+                clock.sleep(0.05)
+
+        self.assertEqual(data["errors"], {"peak_day": "timeout"})
+        # The query itself was interrupted, not just abandoned
+        self.assertIsInstance(outcome[0], OperationalError)
+
+    def test_async_endpoint(self):
+        response = self.client.get(
+            "/api/dashboard/async/", {"start": "2026-03-01", "end": "2026-03-31"}
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.json()["partial"])
+        self.assertEqual(
+            response.json()["metrics"]["lifecycle"]["total_reservations"], 2
+        )
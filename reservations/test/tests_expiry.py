@@ -0,0 +1,142 @@
+import uuid
+from datetime import time, timedelta
+from reservations.services.expiry import ExpiryScheduler
+from reservations.services.lifecycle import expired_count, pending_count
+from reservations.services.reservations import (
+    create_reservation_service,
+    find_free_rooms,
+    get_available_slots,
+)
+from reservations.models import Reservation, ReservationSlot, RoomDayAvailability
+from django.test import TestCase
+from rooms.models import Room
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+
+User = get_user_model()
+
+
+class ExpirySchedulerTest(TestCase):
+    def setUp(self):
+        self.room = Room.objects.create(
+            name="Sala Pong",
+            max_capacity=10,
+        )
+        self.user = User.objects.create_user(
+            username="test",
+            password="1234",
+        )
+        self.date = timezone.localdate() + timedelta(days=1)
+        self.now = timezone.now()
+
+    def pending(self, hour, expires_in):
+        return Reservation.objects.create(
+            room=self.room,
+            user=self.user,
+            date=self.date,
+            start_time=time(hour, 0),
+            end_time=time(hour + 1, 0),
+            status=Reservation.Status.PENDING,
+            expires_at=self.now + expires_in,
+        )
+
+    def test_expires_only_due_holds(self):
+        due = self.pending(9, timedelta(minutes=-1))
+        later = self.pending(11, timedelta(minutes=10))
+        scheduler = ExpiryScheduler()
+
+        self.assertEqual(scheduler.tick(self.now), 1)
+
+        due.refresh_from_db()
+        later.refresh_from_db()
+        self.assertEqual(due.status, Reservation.Status.EXPIRED)
+        self.assertEqual(later.status, Reservation.Status.PENDING)
+        self.assertEqual(scheduler.seconds_until_next(self.now), scheduler.poll_interval)
+
+    def test_expiry_frees_the_slots(self):
+        self.pending(9, timedelta(minutes=-1))
+
+        ExpiryScheduler().tick(self.now)
+
+        self.assertFalse(ReservationSlot.objects.exists())
+        self.assertFalse(RoomDayAvailability.objects.exists())
+
+    def test_picks_up_new_rows_and_expires_in_batches(self):
+        scheduler = ExpiryScheduler(batch_size=2)
+        scheduler.tick(self.now)
+        for hour in (8, 10, 12, 14, 16):
+            self.pending(hour, timedelta(seconds=30))
+
+        self.assertEqual(scheduler.tick(self.now), 0)
+        self.assertEqual(len(scheduler.heap), 5)
+        self.assertEqual(scheduler.seconds_until_next(self.now), 5)
+
+        self.assertEqual(scheduler.tick(self.now + timedelta(minutes=1)), 5)
+        self.assertEqual(
+            Reservation.objects.filter(status=Reservation.Status.EXPIRED).count(), 5
+        )
+
+    def test_confirmed_rows_are_skipped(self):
+        reservation = self.pending(9, timedelta(seconds=30))
+        scheduler = ExpiryScheduler()
+        scheduler.tick(self.now)
+        reservation.status = Reservation.Status.CONFIRMED
+        reservation.save()
+
+        self.assertEqual(scheduler.tick(self.now + timedelta(minutes=1)), 0)
+        reservation.refresh_from_db()
+        self.assertEqual(reservation.status, Reservation.Status.CONFIRMED)
+
+
+class ReadTimeExpiryTest(TestCase):
+    def setUp(self):
+        self.room = Room.objects.create(
+            name="Sala Pong",
+            max_capacity=10,
+        )
+        self.user = User.objects.create_user(
+            username="test",
+            password="1234",
+        )
+        self.date = timezone.localdate() + timedelta(days=1)
+        # A hold the sweep has not reached yet
+        self.lapsed = Reservation.objects.create(
+            room=self.room,
+            user=self.user,
+            date=self.date,
+            start_time=time(9, 0),
+            end_time=time(10, 0),
+            status=Reservation.Status.PENDING,
+            expires_at=timezone.now() - timedelta(minutes=1),
+        )
+
+    def test_lapsed_hold_does_not_block_reads(self):
+        self.assertIn(
+            self.room,
+            find_free_rooms(date=self.date, start_time=time(9, 0), end_time=time(10, 0)),
+        )
+        self.assertIn(
+            (time(9, 0), time(9, 30)),
+            get_available_slots(room=self.room, date=self.date),
+        )
+
+    def test_booking_over_a_lapsed_hold_settles_it(self):
+        reservation = create_reservation_service(
+            idempotency_key=uuid.uuid4(),
+            room=self.room,
+            date=self.date,
+            start_time=time(9, 0),
+            end_time=time(10, 0),
+            user=self.user,
+        )
+
+        self.lapsed.refresh_from_db()
+        self.assertEqual(self.lapsed.status, Reservation.Status.EXPIRED)
+        self.assertEqual(
+            set(ReservationSlot.objects.values_list("reservation_id", flat=True)),
+            {reservation.id},
+        )
+
+    def test_analytics_count_lapsed_holds_as_expired(self):
+        self.assertEqual(expired_count(self.date, self.date), 1)
+        self.assertEqual(pending_count(self.date, self.date), 0)
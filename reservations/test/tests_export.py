@@ -0,0 +1,66 @@
+import csv
+import io
+import json
+from datetime import time, timedelta
+from django.core.management import call_command
+from django.test import TestCase
+from reservations.models import Reservation
+from rooms.models import Room
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+
+User = get_user_model()
+
+
+class ReservationExportTest(TestCase):
+    def setUp(self):
+        self.room = Room.objects.create(
+            name="Sala Pong",
+            max_capacity=10,
+        )
+        self.user = User.objects.create_user(
+            username="test",
+            password="1234",
+            is_staff=True,
+        )
+        self.client.login(username="test", password="1234")
+        self.url = "/api/export/reservations/"
+        self.date = timezone.localdate() + timedelta(days=1)
+        for day, hour in [(0, 9), (0, 11), (5, 9)]:
+            Reservation.objects.create(
+                room=self.room,
+                user=self.user,
+                date=self.date + timedelta(days=day),
+                start_time=time(hour, 0),
+                end_time=time(hour + 1, 0),
+                status=Reservation.Status.CONFIRMED,
+            )
+
+    def test_csv_export_streams_the_range(self):
+        response = self.client.get(
+            self.url, {"start": self.date.isoformat(), "end": self.date.isoformat()}
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        rows = list(csv.reader(io.StringIO(b"".join(response.streaming_content).decode())))
+        self.assertEqual(rows[0][:3], ["id", "room", "username"])
+        self.assertEqual(len(rows), 3)
+        self.assertEqual(rows[1][1:7], ["Sala Pong", "test", self.date.isoformat(), "09:00:00", "10:00:00", "CONFIRMED"])
+
+    def test_ndjson_export(self):
+        response = self.client.get(self.url, {"format": "ndjson"})
+
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        self.assertEqual(len(lines), 3)
+        self.assertEqual(json.loads(lines[0])["username"], "test")
+
+    def test_staff_only(self):
+        self.user.is_staff = False
+        self.user.save()
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+
+    def test_command_writes_to_stdout(self):
+        output = io.StringIO()
+        call_command("export_reservations", "--format", "ndjson", stdout=output)
+        self.assertEqual(len(output.getvalue().splitlines()), 3)
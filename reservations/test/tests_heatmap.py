@@ -0,0 +1,79 @@
+from datetime import date, time
+from reservations.services.occupancy import most_used_time_slot, room_heatmap
+from reservations.models import Reservation
+from django.test import TestCase
+from rooms.models import Room
+from django.contrib.auth import get_user_model
+
+User = get_user_model()
+
+
+class HeatmapTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="test",
+            password="1234",
+        )
+        self.pong = Room.objects.create(name="Sala Pong", max_capacity=10)
+        self.pacman = Room.objects.create(name="Sala Pac-Man", max_capacity=6)
+        self.start = date(2026, 3, 1)
+        self.end = date(2026, 3, 31)
+        # 2026-03-10 is a Tuesday, 2026-03-12 a Thursday
+        self.reserve(self.pong, date(2026, 3, 10), time(9, 0), time(11, 30))
+        self.reserve(self.pacman, date(2026, 3, 10), time(10, 0), time(11, 0))
+        self.reserve(self.pacman, date(2026, 3, 12), time(14, 0), time(15, 0))
+        self.reserve(
+            self.pong, date(2026, 3, 12), time(9, 0), time(10, 0), Reservation.Status.CANCELLED
+        )
+
+    def reserve(self, room, day, start, end, status=Reservation.Status.CONFIRMED):
+        Reservation.objects.create(
+            room=room,
+            user=self.user,
+            date=day,
+            start_time=start,
+            end_time=end,
+            status=status,
+        )
+
+    def test_heatmap_counts_start_hours(self):
+        heatmap = room_heatmap(self.start, self.end)
+
+        self.assertEqual(heatmap["tuesday"][9], 1)
+        self.assertEqual(heatmap["tuesday"][10], 1)
+        self.assertEqual(heatmap["thursday"][14], 1)
+        self.assertEqual(sum(sum(hours.values()) for hours in heatmap.values()), 3)
+
+    def test_heatmap_by_room_and_occupied_hours(self):
+        heatmap = room_heatmap(self.start, self.end, by_room=True, occupied=True)
+
+        self.assertEqual(set(heatmap), {self.pong.id, self.pacman.id})
+        pong = heatmap[self.pong.id]["tuesday"]
+        self.assertEqual([pong[9], pong[10], pong[11], pong[12]], [1, 1, 1, 0])
+        self.assertEqual(heatmap[self.pacman.id]["thursday"][14], 1)
+
+    def test_heatmap_is_a_single_query(self):
+        with self.assertNumQueries(1):
+            room_heatmap(self.start, self.end, by_room=True)
+
+    def test_most_used_time_slot(self):
+        # 9, 10 and 14 tie at one start each: the earliest date wins, then the hour
+        self.assertEqual(
+            most_used_time_slot(self.start, self.end), {"hour": 9, "reservations": 1}
+        )
+        self.assertEqual(
+            most_used_time_slot(self.start, self.end, occupied=True),
+            {"hour": 10, "reservations": 2},
+        )
+        self.assertIsNone(most_used_time_slot(date(2026, 4, 1), date(2026, 4, 30)))
+
+    def test_heatmap_endpoint(self):
+        response = self.client.get(
+            "/api/dashboard2/room-heatmap/",
+            {"start": "2026-03-01", "end": "2026-03-31", "by_room": "true"},
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.json()["heatmap"][str(self.pacman.id)]["thursday"]["14"], 1
+        )
@@ -0,0 +1,100 @@
+import json
+import uuid
+from datetime import timedelta
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from reservations.models import Reservation
+from rooms.models import Room
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+
+User = get_user_model()
+
+
+class IdempotencyFastPathTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.room = Room.objects.create(
+            name="Sala Pong",
+            max_capacity=10,
+        )
+        self.url = "/api/reservations/"
+        self.user = User.objects.create_user(
+            username="test",
+            password="1234",
+        )
+        self.client.login(username="test", password="1234")
+        self.date = timezone.localdate() + timedelta(days=1)
+
+    def post(self, key, start="09:00", end="10:00"):
+        return self.client.post(
+            self.url,
+            data=json.dumps(
+                {
+                    "room_id": self.room.id,
+                    "date": self.date.isoformat(),
+                    "start_time": start,
+                    "end_time": end,
+                }
+            ),
+            content_type="application/json",
+            HTTP_IDEMPOTENCY_KEY=key,
+        )
+
+    def test_replay_is_served_without_touching_reservations(self):
+        key = str(uuid.uuid4())
+        first = self.post(key)
+        self.assertEqual(first.status_code, 201)
+
+        with CaptureQueriesContext(connection) as queries:
+            replay = self.post(key)
+
+        self.assertEqual(replay.status_code, 201)
+        self.assertEqual(replay.json(), first.json())
+        self.assertEqual(replay["Idempotent-Replayed"], "true")
+        self.assertFalse(
+            any("reservations_reservation" in q["sql"] for q in queries.captured_queries)
+        )
+        self.assertEqual(Reservation.objects.count(), 1)
+
+    def test_missing_or_invalid_key_is_rejected(self):
+        response = self.client.post(
+            self.url, data="{}", content_type="application/json"
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.post("not-a-uuid").status_code, 400)
+
+    def test_failures_are_not_cached(self):
+        key = str(uuid.uuid4())
+        self.assertEqual(self.post(key, start="10:00", end="09:00").status_code, 400)
+        self.assertEqual(self.post(key).status_code, 201)
+
+    @override_settings(IDEMPOTENCY_WAIT_SECONDS=0)
+    def test_key_in_flight_returns_409(self):
+        key = str(uuid.UUID(str(uuid.uuid4())))
+        cache.add(f"idempotency:{self.user.pk}:{key}:lock", 1)
+
+        response = self.post(key)
+
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(Reservation.objects.count(), 0)
+
+    def test_requires_authentication(self):
+        self.client.logout()
+        self.assertEqual(self.post(str(uuid.uuid4())).status_code, 401)
+
+    def test_another_users_key_is_rejected(self):
+        key = str(uuid.uuid4())
+        self.assertEqual(self.post(key).status_code, 201)
+
+        User.objects.create_user(username="other", password="1234")
+        self.client.login(username="other", password="1234")
+        response = self.post(key, start="11:00", end="12:00")
+
+        self.assertEqual(response.status_code, 400)
+        self.assertNotIn("id", response.json())
+        # Not cached: the same key is still refused on a retry
+        self.assertEqual(self.post(key, start="11:00", end="12:00").status_code, 400)
+        self.assertEqual(Reservation.objects.count(), 1)
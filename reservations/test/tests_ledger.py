@@ -0,0 +1,218 @@
+import json
+import uuid
+from datetime import time, timedelta
+from io import StringIO
+from unittest import mock
+from django.core.management import call_command
+from reservations.services.reservations import (
+    ReservationOverlapError,
+    create_reservation_service,
+    create_reservations_bulk,
+    expire_pending_reservations,
+    find_free_rooms,
+)
+from reservations.services.series import create_reservation_series
+from reservations.models import Reservation, ReservationSeries, ReservationSlot
+from django.db import IntegrityError, transaction
+from django.test import TestCase
+from rooms.models import Room
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+
+User = get_user_model()
+
+
+class SlotLedgerTest(TestCase):
+    def setUp(self):
+        self.room = Room.objects.create(
+            name="Sala Pong",
+            max_capacity=10,
+        )
+        self.url = "/api/reservations/"
+        self.user = User.objects.create_user(
+            username="test",
+            password="1234",
+        )
+        self.date = timezone.localdate() + timedelta(days=1)
+
+    def create(self, start, end):
+        return create_reservation_service(
+            idempotency_key=uuid.uuid4(),
+            room=self.room,
+            date=self.date,
+            start_time=start,
+            end_time=end,
+            user=self.user,
+        )
+
+    def test_reservation_claims_its_slots(self):
+        reservation = self.create(time(9, 0), time(10, 30))
+
+        self.assertEqual(
+            list(reservation.slots.values_list("slot_index", flat=True).order_by("slot_index")),
+            [18, 19, 20],
+        )
+
+    def test_overlap_is_rejected_by_the_ledger(self):
+        self.create(time(9, 0), time(10, 0))
+
+        with self.assertRaises(ReservationOverlapError):
+            self.create(time(9, 30), time(10, 30))
+
+        self.assertEqual(Reservation.objects.count(), 1)
+        self.assertEqual(ReservationSlot.objects.count(), 2)
+
+    def test_overlap_through_api_returns_409(self):
+        self.create(time(9, 0), time(10, 0))
+        self.client.login(username="test", password="1234")
+
+        response = self.client.post(
+            self.url,
+            data=json.dumps(
+                {
+                    "room_id": self.room.id,
+                    "date": str(self.date),
+                    "start_time": "08:00",
+                    "end_time": "11:00",
+                }
+            ),
+            content_type="application/json",
+            HTTP_IDEMPOTENCY_KEY=str(uuid.uuid4()),
+        )
+
+        self.assertEqual(response.status_code, 409)
+        self.assertIn("booked", response.json()["error"])
+
+    def test_orm_insert_of_overlapping_reservation_fails(self):
+        self.create(time(9, 0), time(10, 0))
+
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Reservation.objects.create(
+                room=self.room,
+                date=self.date,
+                start_time=time(9, 0),
+                end_time=time(10, 0),
+                status=Reservation.Status.CONFIRMED,
+            )
+
+    def test_cancel_and_expire_release_slots(self):
+        cancelled = self.create(time(9, 0), time(10, 0))
+        expired = self.create(time(11, 0), time(12, 0))
+
+        self.client.login(username="test", password="1234")
+        self.client.delete(f"/api/reservations/{cancelled.id}/")
+        Reservation.objects.filter(id=expired.id).update(
+            expires_at=timezone.now() - timedelta(minutes=1)
+        )
+        expire_pending_reservations()
+
+        self.assertFalse(ReservationSlot.objects.exists())
+        self.create(time(9, 0), time(10, 0))
+        self.create(time(11, 0), time(12, 0))
+
+    def test_seed_data_skips_overlapping_rows(self):
+        # Every seeded row lands on the same room, day and hour
+        with mock.patch("core.management.commands.seed_data.random") as random:
+            random.choice.side_effect = lambda options: options[0]
+            random.randint.side_effect = lambda low, high: low
+            out = StringIO()
+            call_command("seed_data", stdout=out)
+
+        self.assertIn("1 reservations created", out.getvalue())
+        self.assertEqual(
+            Reservation.objects.filter(status=Reservation.Status.CONFIRMED).count(), 1
+        )
+
+    def test_start_must_be_on_the_grid(self):
+        with self.assertRaises(ValueError) as context:
+            self.create(time(9, 15), time(10, 15))
+
+        self.assertIn("half hour", str(context.exception))
+
+
+class SlotColumnsTest(TestCase):
+    def setUp(self):
+        self.room = Room.objects.create(name="Sala Pong", max_capacity=10)
+        self.user = User.objects.create_user(username="test", password="1234")
+        self.date = timezone.localdate() + timedelta(days=1)
+
+    def columns(self, reservation):
+        reservation.refresh_from_db()
+        return (
+            reservation.start_slot,
+            reservation.end_slot,
+            reservation.duration_minutes,
+        )
+
+    def test_save_fills_slot_columns(self):
+        reservation = create_reservation_service(
+            idempotency_key=uuid.uuid4(),
+            room=self.room,
+            date=self.date,
+            start_time=time(9, 0),
+            end_time=time(10, 30),
+            user=self.user,
+        )
+
+        self.assertEqual(self.columns(reservation), (18, 21, 90))
+
+    def test_changing_times_with_update_fields_refreshes_columns(self):
+        reservation = Reservation.objects.create(
+            room=self.room,
+            user=self.user,
+            date=self.date,
+            start_time=time(9, 0),
+            end_time=time(10, 0),
+            status=Reservation.Status.CONFIRMED,
+        )
+
+        reservation.end_time = time(12, 0)
+        reservation.save(update_fields=["end_time"])
+
+        self.assertEqual(self.columns(reservation), (18, 24, 180))
+
+    def test_bulk_and_series_fill_slot_columns(self):
+        results = create_reservations_bulk(
+            items=[
+                {
+                    "idempotency_key": str(uuid.uuid4()),
+                    "room_id": self.room.id,
+                    "date": str(self.date),
+                    "start_time": "14:00",
+                    "end_time": "15:00",
+                }
+            ],
+            user=self.user,
+        )
+        _, created, _ = create_reservation_series(
+            user=self.user,
+            room=self.room,
+            frequency=ReservationSeries.Frequency.WEEKLY,
+            start_date=self.date,
+            start_time=time(16, 0),
+            end_time=time(18, 0),
+            count=2,
+        )
+
+        self.assertEqual(self.columns(results[0]["reservation"]), (28, 30, 60))
+        for reservation in created:
+            self.assertEqual(self.columns(reservation), (32, 36, 120))
+
+    def test_overlap_fallback_compares_slots(self):
+        Reservation.objects.create(
+            room=self.room,
+            user=self.user,
+            date=self.date,
+            start_time=time(9, 0),
+            end_time=time(10, 0),
+            status=Reservation.Status.CONFIRMED,
+        )
+
+        self.assertNotIn(
+            self.room,
+            find_free_rooms(date=self.date, start_time=time(9, 30), end_time=time(11, 0)),
+        )
+        self.assertIn(
+            self.room,
+            find_free_rooms(date=self.date, start_time=time(10, 0), end_time=time(11, 0)),
+        )
@@ -0,0 +1,109 @@
+from datetime import date, datetime, time, timedelta, timezone as dt_timezone
+from reservations.services.lifecycle import (
+    booking_duration_stats,
+    booking_lead_time_stats,
+    lifecycle_summary,
+    time_to_confirmation_stats,
+)
+from reservations.models import Reservation
+from django.test import TestCase
+from rooms.models import Room
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+
+User = get_user_model()
+
+
+class LifecycleStatsTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="test",
+            password="1234",
+        )
+        self.room = Room.objects.create(name="Sala Pong", max_capacity=10)
+        self.start = date(2026, 3, 1)
+        self.end = date(2026, 3, 31)
+        created_at = datetime(2026, 3, 1, 12, 0, tzinfo=dt_timezone.utc)
+        # durations 1h, 1h, 2h, 4h; confirmed 5, 5, 10 and 20 minutes after creation
+        for day, hours, minutes in [(2, 1, 5), (3, 1, 5), (5, 2, 10), (9, 4, 20)]:
+            reservation = Reservation.objects.create(
+                room=self.room,
+                user=self.user,
+                date=date(2026, 3, day),
+                start_time=time(9, 0),
+                end_time=time(9 + hours, 0),
+                status=Reservation.Status.CONFIRMED,
+                confirmed_at=created_at + timedelta(minutes=minutes),
+            )
+            # created_at is auto_now_add, so set it afterwards
+            Reservation.objects.filter(pk=reservation.pk).update(created_at=created_at)
+
+    def test_booking_duration_stats(self):
+        with self.assertNumQueries(2):
+            stats = booking_duration_stats(self.start, self.end)
+
+        self.assertEqual(stats["count"], 4)
+        self.assertAlmostEqual(stats["avg"], 7200)
+        self.assertEqual((stats["min"], stats["max"]), (3600, 14400))
+        self.assertAlmostEqual(stats["stddev"], 4409.1, places=1)
+        self.assertEqual((stats["p50"], stats["p90"], stats["p99"]), (3600, 14400, 14400))
+
+    def test_confirmation_and_lead_time_stats(self):
+        confirmation = time_to_confirmation_stats(self.start, self.end)
+        self.assertAlmostEqual(confirmation["avg"], 600)
+        self.assertEqual(confirmation["p50"], 300)
+
+        lead_time = booking_lead_time_stats(self.start, self.end)
+        self.assertAlmostEqual(lead_time["avg"], 86400 * 3.75)
+        self.assertEqual((lead_time["min"], lead_time["max"]), (86400, 8 * 86400))
+
+    def test_empty_range(self):
+        stats = booking_duration_stats(date(2026, 4, 1), date(2026, 4, 30))
+        self.assertEqual(stats["avg"], 0)
+        self.assertEqual(stats["p99"], 0)
+
+
+class LifecycleSummaryTest(TestCase):
+    def setUp(self):
+        user = User.objects.create_user(
+            username="test",
+            password="1234",
+        )
+        room = Room.objects.create(name="Sala Pong", max_capacity=10)
+        self.day = timezone.localdate() + timedelta(days=1)
+        statuses = [
+            (Reservation.Status.CONFIRMED, None),
+            (Reservation.Status.CONFIRMED, None),
+            (Reservation.Status.PENDING, timezone.now() + timedelta(minutes=5)),
+            (Reservation.Status.PENDING, timezone.now() - timedelta(minutes=5)),
+            (Reservation.Status.CANCELLED, None),
+            (Reservation.Status.EXPIRED, None),
+        ]
+        for hour, (status, expires_at) in enumerate(statuses, start=8):
+            Reservation.objects.create(
+                room=room,
+                user=user,
+                date=self.day,
+                start_time=time(hour, 0),
+                end_time=time(hour + 1, 0),
+                status=status,
+                expires_at=expires_at,
+            )
+
+    def test_summary_is_one_query(self):
+        with self.assertNumQueries(1):
+            summary = lifecycle_summary(self.day, self.day)
+
+        self.assertEqual(
+            summary,
+            {
+                "total": 6,
+                "total_reservations": 4,
+                "confirmed": 2,
+                "pending": 1,
+                "cancelled": 1,
+                "expired": 2,
+                "conversion_rate": 2 / 6,
+                "expiration_rate": 2 / 6,
+            },
+        )
@@ -0,0 +1,101 @@
+from datetime import time, timedelta
+from django.core.cache import cache
+from django.test import TestCase
+from reservations.models import Reservation
+from rooms.models import Room
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+
+User = get_user_model()
+
+
+class MyReservationsPaginationTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.room = Room.objects.create(
+            name="Sala Pong",
+            max_capacity=10,
+        )
+        self.user = User.objects.create_user(
+            username="test",
+            password="1234",
+        )
+        self.client.login(username="test", password="1234")
+        self.url = "/api/my-reservations/"
+        today = timezone.localdate()
+        self.past = self.reserve(today - timedelta(days=3), 9, Reservation.Status.CONFIRMED)
+        self.reservations = [
+            self.reserve(today + timedelta(days=day), hour, status)
+            for day, hour, status in [
+                (1, 9, Reservation.Status.PENDING),
+                (1, 11, Reservation.Status.CONFIRMED),
+                (2, 9, Reservation.Status.CANCELLED),
+                (3, 14, Reservation.Status.CONFIRMED),
+            ]
+        ]
+
+    def reserve(self, day, hour, status):
+        return Reservation.objects.create(
+            room=self.room,
+            user=self.user,
+            date=day,
+            start_time=time(hour, 0),
+            end_time=time(hour + 1, 0),
+            status=status,
+        )
+
+    def test_pages_follow_the_cursor(self):
+        ids = []
+        cursor = ""
+        while True:
+            response = self.client.get(self.url, {"limit": 2, "cursor": cursor})
+            self.assertEqual(response.status_code, 200)
+            page = response.json()
+            self.assertLessEqual(len(page["reservations"]), 2)
+            ids += [row["id"] for row in page["reservations"]]
+            cursor = page["next_cursor"]
+            if not cursor:
+                break
+
+        self.assertEqual(ids, [self.past.id] + [r.id for r in self.reservations])
+
+    def test_filters_and_fields(self):
+        response = self.client.get(
+            self.url,
+            {"upcoming": "true", "status": "confirmed", "fields": "id,room,start_time"},
+        )
+
+        self.assertEqual(
+            response.json()["reservations"],
+            [
+                {"id": self.reservations[1].id, "room": "Sala Pong", "start_time": "11:00"},
+                {"id": self.reservations[3].id, "room": "Sala Pong", "start_time": "14:00"},
+            ],
+        )
+
+    def test_page_cost_does_not_depend_on_depth(self):
+        first = self.client.get(self.url, {"limit": 1}).json()
+        # Session, user, the validators aggregate and the page itself
+        with self.assertNumQueries(4):
+            self.client.get(self.url, {"limit": 1, "cursor": first["next_cursor"]})
+
+    def test_invalid_parameters(self):
+        for params in (
+            {"limit": 0},
+            {"limit": "x"},
+            {"fields": "id,secret"},
+            {"status": "DONE"},
+            {"from": "03/10/2026"},
+            {"cursor": "not-a-cursor"},
+        ):
+            self.assertEqual(self.client.get(self.url, params).status_code, 400, params)
+
+    def test_detail_route(self):
+        reservation = self.reservations[0]
+        response = self.client.get(f"{self.url}{reservation.id}/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["id"], reservation.id)
+
+        other = User.objects.create_user(username="other", password="1234")
+        self.client.force_login(other)
+        self.assertEqual(self.client.get(f"{self.url}{reservation.id}/").status_code, 404)
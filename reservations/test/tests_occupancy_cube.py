@@ -0,0 +1,118 @@
+import unittest
+from datetime import date, time
+from unittest import mock
+from django.core.exceptions import ImproperlyConfigured
+from reservations.services import occupancy_cube
+from reservations.services.occupancy import (
+    capacity_report,
+    daily_occupancy_series,
+    global_monthly_occupancy,
+    monthly_occupancy_rate,
+    occupancy_rate,
+)
+from reservations.services.occupancy_cube import OccupancyCube
+from reservations.services.ranking import total_hours_per_room, utilization_percentage_per_room
+from reservations.models import Reservation
+from django.test import TestCase, override_settings
+from rooms.models import Room
+
+
+@unittest.skipIf(occupancy_cube.np is None, "numpy is not installed")
+class OccupancyCubeTest(TestCase):
+    def setUp(self):
+        self.pong = Room.objects.create(name="Sala Pong", max_capacity=10)
+        self.pacman = Room.objects.create(name="Sala Pac-Man", max_capacity=6)
+        # Monday and Tuesday
+        self.start = date(2026, 3, 9)
+        self.end = date(2026, 3, 10)
+
+        for room, day, start, end, status in [
+            (self.pong, self.start, time(8, 0), time(10, 0), Reservation.Status.CONFIRMED),
+            (self.pong, self.start, time(14, 0), time(18, 0), Reservation.Status.CONFIRMED),
+            (self.pacman, self.start, time(9, 0), time(11, 0), Reservation.Status.CONFIRMED),
+            (self.pacman, self.end, time(12, 0), time(13, 0), Reservation.Status.CANCELLED),
+        ]:
+            Reservation.objects.create(
+                room=room, date=day, start_time=start, end_time=end, status=status
+            )
+
+    def load(self):
+        return OccupancyCube.load(self.start, self.end, [self.pong.id, self.pacman.id])
+
+    def test_cube_is_filled_from_one_query(self):
+        with self.assertNumQueries(1):
+            cube = self.load()
+
+        self.assertEqual(cube.counts.shape, (2, 2, 48))
+        self.assertEqual(cube.counts.dtype.name, "uint8")
+        # 08:00-10:00 is slots 16-19, 14:00-18:00 slots 28-35
+        self.assertEqual(cube.occupied[0, 0].nonzero()[0].tolist(), [16, 17, 18, 19, *range(28, 36)])
+        self.assertEqual(cube.occupied[1, 0].nonzero()[0].tolist(), [18, 19, 20, 21])
+        self.assertFalse(cube.occupied[:, 1].any())
+
+    def test_reductions(self):
+        cube = self.load()
+
+        self.assertEqual(cube.room_seconds(), {self.pong.id: 21600, self.pacman.id: 7200})
+        self.assertEqual(cube.room_utilization(), {self.pong.id: 6 / 20, self.pacman.id: 2 / 20})
+        self.assertEqual(cube.weekday_utilization(), {0: 16 / 40, 1: 0.0})
+        per_slot = cube.slot_utilization()
+        self.assertEqual(len(per_slot), 20)
+        self.assertEqual(per_slot["09:00"], 0.5)
+        self.assertEqual(per_slot["11:00"], 0.0)
+        self.assertEqual(
+            cube.peak_concurrency(),
+            {"rooms": 2, "date": self.start, "start_time": "09:00"},
+        )
+
+    def test_longest_free_block(self):
+        blocks = self.load().longest_free_block()
+
+        # Tuesday is free all day for both rooms
+        for room in (self.pong, self.pacman):
+            self.assertEqual(
+                blocks[room.id],
+                {"date": self.end, "start_time": "08:00", "end_time": "18:00", "minutes": 600},
+            )
+
+        one_day = OccupancyCube.load(self.start, self.start, [self.pong.id]).longest_free_block()
+        self.assertEqual(
+            one_day[self.pong.id],
+            {"date": self.start, "start_time": "10:00", "end_time": "14:00", "minutes": 240},
+        )
+
+    def test_capacity_report(self):
+        report = capacity_report(self.start, self.end)
+
+        self.assertEqual(
+            [row["room_name"] for row in report["per_room"]], ["Sala Pac-Man", "Sala Pong"]
+        )
+        self.assertEqual(report["per_weekday"], {"monday": 0.4, "tuesday": 0.0})
+        self.assertEqual(report["peak_concurrency"]["rooms"], 2)
+
+    def test_cube_backend_matches_rollup(self):
+        def metrics():
+            return (
+                total_hours_per_room(self.start, self.end),
+                utilization_percentage_per_room(self.start, self.end),
+                daily_occupancy_series(self.start, self.end),
+                occupancy_rate(self.pong, self.start),
+                monthly_occupancy_rate(self.pacman.id, 2026, 3),
+                global_monthly_occupancy(2026, 3),
+            )
+
+        expected = metrics()
+
+        with override_settings(OCCUPANCY_BACKEND="cube"):
+            self.assertEqual(metrics(), expected)
+
+    def test_rooms_keep_the_given_order(self):
+        cube = OccupancyCube.load(self.start, self.end, [self.pacman.id, self.pong.id])
+
+        self.assertEqual(cube.room_ids, [self.pacman.id, self.pong.id])
+        self.assertEqual(cube.occupied[0, 0].nonzero()[0].tolist(), [18, 19, 20, 21])
+
+    def test_missing_numpy_is_reported(self):
+        with mock.patch.object(occupancy_cube, "np", None):
+            with self.assertRaises(ImproperlyConfigured):
+                self.load()
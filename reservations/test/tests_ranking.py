@@ -0,0 +1,114 @@
+from datetime import date, time
+from asgiref.sync import async_to_sync, iscoroutinefunction
+from django.test import RequestFactory
+from reservations.middleware import RankingMemoMiddleware
+from reservations.services import ranking
+from reservations.services.ranking import (
+    best_performing_room,
+    ranking_memo,
+    rooms_monthly_ranking,
+    rooms_with_seconds,
+    top_3_rooms,
+    top_rooms,
+    total_hours_per_room,
+    utilization_percentage_per_room,
+)
+from reservations.models import Reservation
+from django.test import TestCase
+from rooms.models import Room
+from django.contrib.auth import get_user_model
+
+User = get_user_model()
+
+
+class RankingEngineTest(TestCase):
+    def setUp(self):
+        user = User.objects.create_user(
+            username="test",
+            password="1234",
+        )
+        self.pong = Room.objects.create(name="Sala Pong", max_capacity=10)
+        self.pacman = Room.objects.create(name="Sala Pac-Man", max_capacity=6)
+        self.mario = Room.objects.create(name="Sala Super Mario", max_capacity=8)
+        self.tetris = Room.objects.create(name="Sala Tetris", max_capacity=4)
+        self.start = date(2026, 3, 1)
+        self.end = date(2026, 3, 31)
+        for room, day, hours in [
+            (self.pong, 10, 3),
+            (self.pacman, 11, 1),
+            (self.mario, 12, 5),
+            (self.pacman, 13, 1),
+        ]:
+            Reservation.objects.create(
+                room=room,
+                user=user,
+                date=date(2026, 3, day),
+                start_time=time(9, 0),
+                end_time=time(9 + hours, 0),
+                status=Reservation.Status.CONFIRMED,
+            )
+
+    def test_rankings_include_unused_rooms(self):
+        self.assertEqual(best_performing_room(self.start, self.end), self.mario)
+        self.assertEqual(
+            top_3_rooms(self.start, self.end), [self.mario, self.pong, self.pacman]
+        )
+        self.assertEqual(
+            [room["room_id"] for room in rooms_monthly_ranking(2026, 3)],
+            [self.mario.id, self.pong.id, self.pacman.id, self.tetris.id],
+        )
+        utilization = utilization_percentage_per_room(self.start, self.end)
+        self.assertEqual(utilization[-1]["utilization_percentage"], 0)
+        self.assertEqual(
+            total_hours_per_room(self.start, self.end),
+            [
+                {"room_id": self.mario.id, "room_name": "Sala Super Mario", "total_hours": 5.0},
+                {"room_id": self.pong.id, "room_name": "Sala Pong", "total_hours": 3.0},
+                {"room_id": self.pacman.id, "room_name": "Sala Pac-Man", "total_hours": 2.0},
+            ],
+        )
+
+    def test_each_function_is_one_query(self):
+        with self.assertNumQueries(1):
+            top_3_rooms(self.start, self.end)
+        with self.assertNumQueries(1):
+            utilization_percentage_per_room(self.start, self.end)
+
+    def test_memo_shares_the_range(self):
+        with ranking_memo():
+            with self.assertNumQueries(1):
+                best_performing_room(self.start, self.end)
+                top_3_rooms(self.start, self.end)
+                top_rooms(self.start, self.end, 2)
+                total_hours_per_room(self.start, self.end)
+                utilization_percentage_per_room(self.start, self.end)
+            with self.assertNumQueries(1):
+                top_3_rooms(self.start, date(2026, 3, 15))
+
+        with self.assertNumQueries(1):
+            top_3_rooms(self.start, self.end)
+
+    def test_seconds_map_ranks_like_the_rollup(self):
+        functions = (top_3_rooms, total_hours_per_room, utilization_percentage_per_room)
+        expected = [function(self.start, self.end) for function in functions]
+        usage = rooms_with_seconds(
+            {self.mario.id: 5 * 3600, self.pong.id: 3 * 3600, self.pacman.id: 2 * 3600}
+        )
+
+        with self.assertNumQueries(0):
+            self.assertEqual(
+                [function(self.start, self.end, usage) for function in functions],
+                expected,
+            )
+
+    def test_memo_middleware_runs_async_views_on_the_event_loop(self):
+        async def view(request):
+            return ranking._memo.get() is not None
+
+        middleware = RankingMemoMiddleware(view)
+
+        self.assertTrue(iscoroutinefunction(middleware))
+        request = RequestFactory().get("/api/dashboard/async/")
+        self.assertTrue(async_to_sync(middleware)(request))
+        request = RequestFactory().post("/api/reservations/")
+        self.assertFalse(async_to_sync(middleware)(request))
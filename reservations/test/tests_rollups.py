@@ -0,0 +1,342 @@
+import uuid
+from datetime import date, time, timedelta
+from io import StringIO
+from django.core.management import call_command
+from reservations.services.occupancy import (
+    daily_occupancy_series,
+    monthly_occupancy_rate,
+    occupancy_rate,
+    peak_day,
+)
+from reservations.services.lifecycle import global_utilization
+from reservations.services.ranking import (
+    rooms_monthly_ranking,
+    total_hours_per_room,
+    utilization_percentage_per_room,
+)
+from reservations.services.rollups import confirmed_seconds_through
+from reservations.services.sync import sync_room_days
+from reservations.services.reservations import (
+    ReservationConfirmationError,
+    confirm_reservation,
+    create_reservation_service,
+    expire_pending_reservations,
+)
+from reservations.models import Reservation, RoomDailyOccupancy
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rooms.models import Room
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+
+User = get_user_model()
+
+
+class RoomDailyOccupancyTest(TestCase):
+    def setUp(self):
+        self.room = Room.objects.create(
+            name="Sala Pong",
+            max_capacity=10,
+        )
+        self.user = User.objects.create_user(
+            username="test",
+            password="1234",
+        )
+        self.date = timezone.localdate() + timedelta(days=1)
+
+    def rollup(self):
+        return RoomDailyOccupancy.objects.get(room=self.room, date=self.date)
+
+    def create(self, start, end):
+        return create_reservation_service(
+            idempotency_key=uuid.uuid4(),
+            room=self.room,
+            date=self.date,
+            start_time=start,
+            end_time=end,
+            user=self.user,
+        )
+
+    def test_create_and_confirm_update_rollup(self):
+        reservation = self.create(time(9, 0), time(11, 0))
+
+        rollup = self.rollup()
+        self.assertEqual(rollup.pending_seconds, 7200)
+        self.assertEqual(rollup.pending_count, 1)
+        self.assertEqual(rollup.confirmed_seconds, 0)
+
+        confirm_reservation(reservation=reservation, user=self.user)
+
+        rollup = self.rollup()
+        self.assertEqual(rollup.pending_seconds, 0)
+        self.assertEqual(rollup.confirmed_seconds, 7200)
+        self.assertEqual(rollup.confirmed_count, 1)
+
+    def test_cancel_removes_rollup_row(self):
+        reservation = self.create(time(9, 0), time(10, 0))
+
+        self.client.login(username="test", password="1234")
+        response = self.client.delete(f"/api/reservations/{reservation.id}/")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(RoomDailyOccupancy.objects.exists())
+
+    def test_expire_updates_rollup(self):
+        reservation = self.create(time(9, 0), time(10, 0))
+        self.create(time(12, 0), time(13, 0))
+        Reservation.objects.filter(id=reservation.id).update(
+            expires_at=timezone.now() - timedelta(minutes=1)
+        )
+
+        expire_pending_reservations()
+
+        rollup = self.rollup()
+        self.assertEqual(rollup.pending_seconds, 3600)
+        self.assertEqual(rollup.pending_count, 1)
+
+    def test_confirming_a_lapsed_hold_stores_expired(self):
+        reservation = self.create(time(9, 0), time(10, 0))
+        Reservation.objects.filter(id=reservation.id).update(
+            expires_at=timezone.now() - timedelta(minutes=1)
+        )
+        reservation.refresh_from_db()
+
+        with self.assertRaises(ReservationConfirmationError):
+            confirm_reservation(reservation=reservation, user=self.user)
+
+        reservation.refresh_from_db()
+        self.assertEqual(reservation.status, Reservation.Status.EXPIRED)
+        self.assertFalse(RoomDailyOccupancy.objects.exists())
+
+    def test_rebuild_command(self):
+        Reservation.objects.create(
+            room=self.room,
+            date=date(2026, 3, 10),
+            start_time=time(8, 0),
+            end_time=time(11, 0),
+            status=Reservation.Status.CONFIRMED,
+        )
+        RoomDailyOccupancy.objects.all().delete()
+
+        out = StringIO()
+        call_command("rebuild_occupancy_rollup", stdout=out)
+
+        self.assertIn("Rebuilt 1", out.getvalue())
+        rollup = RoomDailyOccupancy.objects.get(room=self.room, date=date(2026, 3, 10))
+        self.assertEqual(rollup.confirmed_seconds, 10800)
+
+    def test_rates_read_from_rollup(self):
+        Reservation.objects.create(
+            room=self.room,
+            date=date(2026, 3, 10),
+            start_time=time(8, 0),
+            end_time=time(11, 0),
+            status=Reservation.Status.CONFIRMED,
+        )
+
+        with self.assertNumQueries(1):
+            self.assertAlmostEqual(
+                occupancy_rate(self.room, date(2026, 3, 10)), 0.3, places=2
+            )
+        with self.assertNumQueries(1):
+            self.assertGreater(monthly_occupancy_rate(self.room.id, 2026, 3), 0)
+        with self.assertNumQueries(1):
+            ranking = rooms_monthly_ranking(2026, 3)
+        self.assertEqual(ranking[0]["room_id"], self.room.id)
+        self.assertEqual(ranking[0]["occupancy"], round(10800 / (36000 * 31), 3))
+
+
+class DailyOccupancySeriesTest(TestCase):
+    def setUp(self):
+        user = User.objects.create_user(
+            username="test",
+            password="1234",
+        )
+        self.pong = Room.objects.create(name="Sala Pong", max_capacity=10)
+        self.pacman = Room.objects.create(name="Sala Pac-Man", max_capacity=6)
+        for room, day, start, end in [
+            (self.pong, 10, time(8, 0), time(13, 0)),
+            (self.pacman, 10, time(9, 0), time(10, 0)),
+            (self.pacman, 20, time(8, 0), time(18, 0)),
+        ]:
+            Reservation.objects.create(
+                room=room,
+                user=user,
+                date=date(2026, 3, day),
+                start_time=start,
+                end_time=end,
+                status=Reservation.Status.CONFIRMED,
+            )
+
+    def test_series_covers_every_day_with_one_aggregate(self):
+        with self.assertNumQueries(2):
+            series = daily_occupancy_series(date(2026, 3, 9), date(2026, 3, 11))
+
+        self.assertEqual(
+            series,
+            [
+                {"date": date(2026, 3, 9), "occupancy_rate": 0.0},
+                {"date": date(2026, 3, 10), "occupancy_rate": 0.3},
+                {"date": date(2026, 3, 11), "occupancy_rate": 0.0},
+            ],
+        )
+
+    def test_peak_day_uses_the_series(self):
+        with self.assertNumQueries(2):
+            peak = peak_day(2026, 3)
+
+        self.assertEqual(peak, {"date": date(2026, 3, 20), "occupancy_rate": 0.5})
+
+    def test_series_endpoint(self):
+        response = self.client.get(
+            "/api/dashboard2/daily-occupancy-series/",
+            {"start": "2026-03-01", "end": "2026-03-31"},
+        )
+
+        self.assertEqual(response.status_code, 200)
+        series = response.json()["series"]
+        self.assertEqual(len(series), 31)
+        self.assertEqual(series[19], {"date": "2026-03-20", "occupancy": 0.5})
+
+
+class OccupancyPrefixSumTest(TestCase):
+    def setUp(self):
+        self.pong = Room.objects.create(name="Sala Pong", max_capacity=10)
+        self.pacman = Room.objects.create(name="Sala Pac-Man", max_capacity=6)
+
+    def book(self, room, day, hours, status=Reservation.Status.CONFIRMED):
+        return Reservation.objects.create(
+            room=room,
+            date=day,
+            start_time=time(8, 0),
+            end_time=time(8 + hours, 0),
+            status=status,
+        )
+
+    def prefix_sums(self):
+        return list(
+            RoomDailyOccupancy.objects.order_by("room_id", "date").values_list(
+                "room_id", "date", "confirmed_seconds_to_date"
+            )
+        )
+
+    def test_out_of_order_changes_keep_prefix_sums(self):
+        self.book(self.pong, date(2026, 3, 20), 2)
+        self.book(self.pong, date(2026, 3, 10), 3)
+        self.book(self.pong, date(2026, 3, 15), 1, Reservation.Status.PENDING)
+        cancelled = self.book(self.pong, date(2026, 3, 5), 4)
+        cancelled.status = Reservation.Status.CANCELLED
+        cancelled.save()
+
+        self.assertEqual(
+            self.prefix_sums(),
+            [
+                (self.pong.id, date(2026, 3, 10), 10800),
+                (self.pong.id, date(2026, 3, 15), 10800),
+                (self.pong.id, date(2026, 3, 20), 18000),
+            ],
+        )
+        self.assertEqual(confirmed_seconds_through(self.pong.id, date(2026, 3, 19)), 10800)
+        self.assertEqual(confirmed_seconds_through(self.pong.id, date(2026, 3, 1)), 0)
+
+    def test_range_utilization_query_count_does_not_grow_with_range(self):
+        self.book(self.pong, date(2020, 1, 6), 5)
+        self.book(self.pong, date(2026, 3, 10), 3)
+        self.book(self.pacman, date(2026, 3, 11), 2)
+
+        with self.assertNumQueries(1):
+            hours = total_hours_per_room(date(2020, 1, 1), date(2029, 12, 31))
+        self.assertEqual(
+            [(row["room_id"], row["total_hours"]) for row in hours],
+            [(self.pong.id, 8.0), (self.pacman.id, 2.0)],
+        )
+
+        with self.assertNumQueries(1):
+            per_room = utilization_percentage_per_room(date(2026, 3, 1), date(2026, 3, 31))
+        self.assertEqual(
+            {row["room_id"]: row["utilization_percentage"] for row in per_room},
+            {
+                self.pong.id: round(10800 / (36000 * 31) * 100, 2),
+                self.pacman.id: round(7200 / (36000 * 31) * 100, 2),
+            },
+        )
+
+        with self.assertNumQueries(1):
+            self.assertEqual(
+                global_utilization(date(2026, 3, 11), date(2026, 3, 11)),
+                round(7200 / (36000 * 2) * 100, 2),
+            )
+
+    def sync_queries(self, callback):
+        with CaptureQueriesContext(connection) as queries:
+            callback()
+        return [query["sql"] for query in queries.captured_queries]
+
+    def room_locks(self, queries):
+        return [
+            index for index, sql in enumerate(queries)
+            if sql.startswith('SELECT "rooms_room"."id" AS "pk" FROM "rooms_room"')
+        ]
+
+    def test_sync_locks_each_day_before_reading_it(self):
+        self.book(self.pong, date(2026, 3, 10), 3)
+
+        queries = self.sync_queries(
+            lambda: sync_room_days(
+                [(self.pacman.id, date(2026, 3, 11)), (self.pong.id, date(2026, 3, 10))]
+            )
+        )
+
+        day_locks = [
+            index for index, sql in enumerate(queries)
+            if 'FROM "reservations_roomdayavailability"' in sql
+            or sql.startswith('INSERT INTO "reservations_roomdayavailability"')
+        ]
+        first_refresh = next(
+            index for index, sql in enumerate(queries)
+            if sql.startswith('DELETE FROM "reservations_reservationslot"')
+        )
+        self.assertGreaterEqual(len(day_locks), 2)
+        self.assertLess(day_locks[1], first_refresh)
+        # Nothing confirmed changed, so no room-wide lock
+        self.assertEqual(self.room_locks(queries), [])
+
+    def test_room_is_locked_only_when_prefix_sums_move(self):
+        day = date(2026, 3, 10)
+        self.book(self.pong, day, 3)
+
+        pending = self.sync_queries(
+            lambda: Reservation.objects.create(
+                room=self.pong,
+                date=day,
+                start_time=time(12, 0),
+                end_time=time(13, 0),
+                status=Reservation.Status.PENDING,
+            )
+        )
+        self.assertEqual(self.room_locks(pending), [])
+
+        confirmed = self.sync_queries(lambda: self.book(self.pacman, day, 1))
+        room_locks = self.room_locks(confirmed)
+        self.assertEqual(len(room_locks), 2)
+        # Taken by sync_room_days before the day is locked or read
+        self.assertIn(f"IN ({self.pacman.id})", confirmed[room_locks[0]])
+        self.assertFalse(
+            any(
+                "reservations_roomdayavailability" in sql
+                for sql in confirmed[: room_locks[0]]
+            )
+        )
+
+    def test_prefix_only_rebuild_command(self):
+        self.book(self.pong, date(2026, 3, 10), 3)
+        self.book(self.pong, date(2026, 3, 12), 1)
+        expected = self.prefix_sums()
+        RoomDailyOccupancy.objects.update(confirmed_seconds_to_date=0)
+
+        out = StringIO()
+        call_command("rebuild_occupancy_rollup", "--prefix-only", stdout=out)
+
+        self.assertIn("Updated 2 prefix sums", out.getvalue())
+        self.assertEqual(self.prefix_sums(), expected)
@@ -0,0 +1,161 @@
+import json
+from datetime import date, time, timedelta
+from reservations.services.series import expand_occurrences
+from reservations.models import Reservation, ReservationSeries, RoomDailyOccupancy
+from django.test import TestCase
+from rooms.models import Room
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+
+User = get_user_model()
+
+
+class ExpandOccurrencesTest(TestCase):
+    def test_weekly_until(self):
+        dates = expand_occurrences(
+            frequency=ReservationSeries.Frequency.WEEKLY,
+            start_date=date(2026, 3, 3),
+            until=date(2026, 3, 31),
+        )
+        self.assertEqual(
+            dates,
+            [date(2026, 3, 3), date(2026, 3, 10), date(2026, 3, 17), date(2026, 3, 24), date(2026, 3, 31)],
+        )
+
+    def test_biweekly_count(self):
+        dates = expand_occurrences(
+            frequency=ReservationSeries.Frequency.BIWEEKLY,
+            start_date=date(2026, 3, 3),
+            count=3,
+        )
+        self.assertEqual(dates, [date(2026, 3, 3), date(2026, 3, 17), date(2026, 3, 31)])
+
+    def test_monthly_skips_short_months(self):
+        dates = expand_occurrences(
+            frequency=ReservationSeries.Frequency.MONTHLY,
+            start_date=date(2026, 1, 31),
+            count=3,
+        )
+        self.assertEqual(dates, [date(2026, 1, 31), date(2026, 3, 31), date(2026, 5, 31)])
+
+    def test_needs_exactly_one_end(self):
+        with self.assertRaises(ValueError):
+            expand_occurrences(
+                frequency=ReservationSeries.Frequency.WEEKLY,
+                start_date=date(2026, 3, 3),
+            )
+
+    def test_until_past_the_limit_is_rejected_like_count(self):
+        start_date = date(2026, 3, 3)
+        # 104 weeks after the start is the 105th occurrence
+        last_allowed = start_date + timedelta(weeks=103)
+
+        self.assertEqual(
+            len(
+                expand_occurrences(
+                    frequency=ReservationSeries.Frequency.WEEKLY,
+                    start_date=start_date,
+                    until=last_allowed,
+                )
+            ),
+            104,
+        )
+        for end in ({"until": last_allowed + timedelta(weeks=1)}, {"count": 105}):
+            with self.assertRaisesMessage(ValueError, "limited to 104 occurrences"):
+                expand_occurrences(
+                    frequency=ReservationSeries.Frequency.WEEKLY,
+                    start_date=start_date,
+                    **end,
+                )
+
+
+class ReservationSeriesAPITest(TestCase):
+    def setUp(self):
+        self.room = Room.objects.create(
+            name="Sala Pong",
+            max_capacity=10,
+        )
+        self.url = "/api/series/"
+        self.user = User.objects.create_user(
+            username="test",
+            password="1234",
+        )
+        self.date = timezone.localdate() + timedelta(days=1)
+
+    def post(self, **overrides):
+        payload = {
+            "room_id": self.room.id,
+            "frequency": "WEEKLY",
+            "start_date": str(self.date),
+            "start_time": "09:00",
+            "end_time": "11:00",
+            "count": 6,
+        }
+        payload.update(overrides)
+        return self.client.post(
+            self.url,
+            data=json.dumps(payload),
+            content_type="application/json",
+        )
+
+    def test_unauthenticated_returns_401(self):
+        self.assertEqual(self.post().status_code, 401)
+
+    def test_creates_free_occurrences_and_reports_conflicts(self):
+        conflict_date = self.date + timedelta(weeks=2)
+        Reservation.objects.create(
+            room=self.room,
+            date=conflict_date,
+            start_time=time(10, 0),
+            end_time=time(12, 0),
+            status=Reservation.Status.CONFIRMED,
+        )
+        self.client.login(username="test", password="1234")
+
+        response = self.post()
+
+        self.assertEqual(response.status_code, 201)
+        data = response.json()
+        self.assertEqual(data["conflicts"], [str(conflict_date)])
+        self.assertEqual(len(data["reservations"]), 5)
+        self.assertEqual(
+            Reservation.objects.filter(series_id=data["id"]).count(), 5
+        )
+        self.assertEqual(
+            RoomDailyOccupancy.objects.get(room=self.room, date=self.date).pending_count,
+            1,
+        )
+
+    def test_all_conflicting_returns_409(self):
+        Reservation.objects.create(
+            room=self.room,
+            date=self.date,
+            start_time=time(9, 0),
+            end_time=time(10, 0),
+            status=Reservation.Status.CONFIRMED,
+        )
+        self.client.login(username="test", password="1234")
+
+        response = self.post(count=1)
+
+        self.assertEqual(response.status_code, 409)
+        self.assertFalse(ReservationSeries.objects.exists())
+
+    def test_invalid_duration_returns_400(self):
+        self.client.login(username="test", password="1234")
+        self.assertEqual(self.post(end_time="09:30").status_code, 400)
+
+    def test_confirm_series(self):
+        self.client.login(username="test", password="1234")
+        series_id = self.post(count=3).json()["id"]
+
+        response = self.client.post(f"/api/series/{series_id}/confirm/")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["confirmed"], 3)
+        self.assertEqual(
+            Reservation.objects.filter(
+                series_id=series_id, status=Reservation.Status.CONFIRMED
+            ).count(),
+            3,
+        )
@@ -8,6 +8,7 @@ from django.contrib.auth.decorators import login_required
 from django.contrib.admin.views.decorators import staff_member_required
 from django.shortcuts import render, redirect
 from django.contrib.auth.forms import UserCreationForm
+from django.db import IntegrityError, transaction
 
 
 # Create your views here.
@@ -43,16 +44,24 @@ def my_reservation_info_view(request, reservation_id):
     statuses = [value for value, label in Reservation.Status.choices]
     reservation = get_user_reservation(request.user, reservation_id)
 
+    error = None
+
     if request.method == "POST":
         new_status = request.POST.get("status")
         if new_status in dict(Reservation.Status.choices):
-            reservation.status = new_status
-            reservation.save()
+            try:
+                with transaction.atomic():
+                    reservation.status = new_status
+                    reservation.save()
+            except IntegrityError:
+                # Reactivating a reservation whose slots were booked meanwhile
+                reservation.refresh_from_db()
+                error = "Time slot already booked"
 
     return render(
         request,
         "reservations/reservation_details.html",
-        {"reservation": reservation, "statuses": statuses},
+        {"reservation": reservation, "statuses": statuses, "error": error},
     )
 
 